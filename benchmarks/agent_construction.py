@@ -0,0 +1,43 @@
+"""Per-message SlackAgent construction overhead: rebuilding the supervisor graph vs reusing it.
+
+    python -m benchmarks.agent_construction [iterations]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SERVICE_ACCOUNT_INFO_PRIVATE_KEY", "")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import slack_bot.api.slack  # noqa: F401  (resolves the slack <-> agent import cycle)
+from slack_bot.api.agent.agent import SlackAgent, get_agent_graphs, get_supervisor_graph
+
+
+def rebuild_per_message() -> None:
+    get_agent_graphs.cache_clear()
+    get_supervisor_graph.cache_clear()
+    SlackAgent("C000", [], "U000", "Benchmark")
+
+
+def reuse_compiled_graph() -> None:
+    SlackAgent("C000", [], "U000", "Benchmark")
+
+
+def measure(func, iterations: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main(iterations: int = 20) -> None:
+    before = measure(rebuild_per_message, iterations)
+    after = measure(reuse_compiled_graph, iterations)
+    print(f"rebuild per message: {before:8.3f} ms/message")
+    print(f"reuse compiled graph: {after:8.3f} ms/message")
+    print(f"speedup:             {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,450 @@
+"""Offline end-to-end replay: Slack events through /slack/events with no external services.
+
+    python -m benchmarks.replay [--corpus FILE] [--events N] [--rate EVENTS_PER_SEC]
+                                [--llm-latency MS] [--api-latency MS] [--mongo-url URL]
+                                [--json FILE] [--baseline FILE] [--tolerance 0.2]
+
+Chat model calls go to a scripted fake model, Slack/Fireflies/Brevo calls to a
+stub HTTP server on localhost, and Mongo to mongomock (`pip install
+mongomock-motor`) or, with --mongo-url, to a throwaway local mongod whose
+`slack` database is dropped first.
+
+Corpus lines are Slack event payloads, or {"path": ..., "body": ...} for
+other webhooks such as /fireflies/call/report. Events are replayed in order,
+cycling the corpus with fresh event ids, at --rate or all at once.
+
+End-to-end latency of a Slack event runs from its POST to the bot's reply
+reaching the Slack stub; a reply answers the oldest unanswered event of its
+channel, so keep MESSAGE_COALESCE_WINDOW at 0 and SUPERSEDE_FOLLOW_UPS off.
+Other webhooks are timed by their response. The per-stage breakdown comes
+from the tracing spans. With --baseline the run fails (exit code 1) if
+throughput or p95 latency is worse than the baseline by more than --tolerance.
+"""
+import argparse
+import asyncio
+import copy
+import importlib.util
+import json
+import logging
+import os
+import socket
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List
+
+from aiohttp import web
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+MONGOMOCK_AVAILABLE = importlib.util.find_spec("mongomock_motor") is not None
+
+DEFAULT_CORPUS = Path(__file__).with_name("slack_events.jsonl")
+
+# Supervisor hands off by keyword, falling back to the last entry.
+SUPERVISOR_HANDOFFS = [
+    ("transfer_to_mongodbtranscriptionagent", ("transcript", "call")),
+    ("transfer_to_emailagent", ("email", "remind")),
+    ("transfer_to_mongodbagent", ()),
+]
+
+# Tools a sub-agent calls once before answering; other tools would leave the machine.
+SCRIPTED_TOOL_CALLS = {
+    "query_mongo_tool": {"query": [{"$match": {}}, {"$limit": 5}], "type_query": "read"},
+    "query_mongo_transcription_tool": {
+        "query": [{"$project": {"transcription": 0}}, {"$limit": 3}], "type_query": "read"
+    },
+    "send_email_tool": {"emails": ["benchmark@example.com"], "content": ["Benchmark reminder"]},
+}
+
+FIREFLIES_TRANSCRIPT = {
+    "title": "Benchmark call",
+    "dateString": "2025-10-01T10:00:00.000Z",
+    "user": {"email": "host@example.com", "name": "Host"},
+    "duration": 30,
+    "video_url": None,
+    "audio_url": None,
+    "sentences": [
+        {"speaker_name": speaker, "text": f"Point {i} about the roadmap and the open tasks."}
+        for i, speaker in enumerate(["Anna", "Ben", "Anna", "Chris"] * 10)
+    ],
+}
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    from slack_bot.api.agent.utils import message_text
+    return sum(len(message_text(message.content)) for message in messages) // 4 + 1
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic stand-in for the OpenAI chat model.
+
+    The supervisor hands each request to one agent and answers once it is
+    handed back; sub-agents make at most one scripted tool call and answer;
+    everything else (history and Fireflies summaries) answers directly.
+    """
+
+    latency: float = 0.0
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "ScriptedChatModel":
+        return self.model_copy(update={
+            "tool_names": [convert_to_openai_tool(tool)["function"]["name"] for tool in tools]
+        })
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        from slack_bot.api.agent.utils import message_text
+        last = messages[-1]
+        request = next((message_text(message.content) for message in reversed(messages)
+                        if isinstance(message, HumanMessage)), "")
+        tool_call = None
+        if any(name.startswith("transfer_to_") for name in self.tool_names):
+            if isinstance(last, HumanMessage):
+                tool_call = next(
+                    (name, {}) for name, keywords in SUPERVISOR_HANDOFFS
+                    if name in self.tool_names and (not keywords or any(word in request.lower() for word in keywords))
+                )
+        elif not (isinstance(last, ToolMessage) and last.name in SCRIPTED_TOOL_CALLS):
+            tool_call = next(
+                ((name, SCRIPTED_TOOL_CALLS[name]) for name in self.tool_names if name in SCRIPTED_TOOL_CALLS), None
+            )
+
+        usage = {"input_tokens": estimate_tokens(messages), "output_tokens": 20}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        if tool_call:
+            name, args = tool_call
+            return AIMessage(content=[], tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}],
+                             usage_metadata=usage)
+        # Same content shape as the Responses API model the bot runs on.
+        return AIMessage(content=[{"type": "text", "text": f"Benchmark answer to: {request[:200]}"}],
+                         usage_metadata=usage)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        from slack_bot.core.config import settings
+
+        async def request() -> ChatResult:
+            await asyncio.sleep(self.latency)
+            return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+        # Queue behind the same admission controller as the real model.
+        return await settings.LLM_ADMISSION.call(request, tokens=sum(len(str(m.content)) for m in messages) // 4)
+
+
+class ApiStub:
+    """Local Slack, Fireflies and Brevo APIs that also time replies to replayed events."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.pending: Dict[str, Deque[float]] = defaultdict(deque)
+        self.latencies: List[float] = []
+        self.last_reply = 0.0
+
+    def expect(self, channel: str, sent_at: float) -> None:
+        self.pending[channel].append(sent_at)
+
+    def unanswered(self) -> int:
+        return sum(len(sent) for sent in self.pending.values())
+
+    def record(self, sent_at: float) -> None:
+        self.last_reply = time.perf_counter()
+        self.latencies.append(self.last_reply - sent_at)
+
+    async def _payload(self, request: web.Request) -> dict:
+        payload = dict(request.query)
+        if request.can_read_body:
+            if request.content_type == "application/json":
+                payload.update(await request.json())
+            else:
+                payload.update(await request.post())
+        return payload
+
+    async def slack(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        method = request.match_info["method"]
+        self.calls[f"slack {method}"] += 1
+        payload = await self._payload(request)
+        if method == "chat.postMessage":
+            channel = payload.get("channel")
+            if self.pending.get(channel):
+                self.record(self.pending[channel].popleft())
+            return web.json_response({"ok": True, "channel": channel, "ts": f"{time.time():.6f}"})
+        if method == "users.info":
+            user_id = payload.get("user", "U0BENCH")
+            return web.json_response({"ok": True, "user": {
+                "id": user_id,
+                "name": user_id.lower(),
+                "real_name": f"Benchmark {user_id}",
+                "profile": {"title": "Engineer", "email": f"{user_id.lower()}@example.com"},
+            }})
+        if method in ("users.list", "conversations.members"):
+            return web.json_response({"ok": True, "members": [], "response_metadata": {"next_cursor": ""}})
+        return web.json_response({"ok": True})
+
+    async def fireflies(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        payload = await request.json()
+        if "deleteTranscript" in payload.get("query", ""):
+            self.calls["fireflies deleteTranscript"] += 1
+            return web.json_response({"data": {"deleteTranscript": {"id": "bench", "title": "Benchmark call"}}})
+        self.calls["fireflies transcript"] += 1
+        return web.json_response({"data": {"transcript": FIREFLIES_TRANSCRIPT}})
+
+    async def brevo(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        self.calls[f"brevo {request.match_info['path']}"] += 1
+        return web.json_response({"messageId": f"<{uuid.uuid4().hex}@benchmark>"}, status=201)
+
+    async def start(self) -> tuple:
+        app = web.Application()
+        app.router.add_route("*", "/slack/{method}", self.slack)
+        app.router.add_post("/fireflies/graphql", self.fireflies)
+        app.router.add_post("/brevo/{path:.*}", self.brevo)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        await web.SockSite(runner, sock).start()
+        return runner, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class SpanCollector(logging.Handler):
+    """Collects span durations from the `slack_bot.trace` JSON lines."""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.durations: Dict[tuple, List[float]] = defaultdict(list)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        span = json.loads(record.getMessage())
+        self.durations[(span["kind"], span["name"])].append(span["duration_ms"])
+
+
+def mongo_clients(url: str | None) -> tuple:
+    if url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo import MongoClient
+        return AsyncIOMotorClient(url), MongoClient(url)
+    if not MONGOMOCK_AVAILABLE:
+        sys.exit("mongomock-motor is not installed: pip install mongomock-motor, or pass --mongo-url of a local mongod")
+    import mongomock
+    from mongomock_motor import AsyncMongoMockClient
+    sync_client = mongomock.MongoClient()
+    return AsyncMongoMockClient(mock_mongo_client=sync_client), sync_client
+
+
+async def seed(db) -> None:
+    await db.tasks.insert_many([
+        {
+            "task_description": f"Benchmark task {i}",
+            "employee": f"Benchmark U0BENCH0{i % 4 + 1}",
+            "employee_id": f"U0BENCH0{i % 4 + 1}",
+            "deadline": "2025-12-01T00:00:00",
+            "status": "open" if i % 3 else "done",
+        }
+        for i in range(20)
+    ])
+
+
+def load_corpus(path: Path, events: int | None) -> List[dict]:
+    corpus = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    count = events or len(corpus)
+    run_id = uuid.uuid4().hex[:8]
+    started = int(time.time())
+    entries = []
+    for i in range(count):
+        entry = copy.deepcopy(corpus[i % len(corpus)])
+        if "path" not in entry:
+            entry = {"path": "/slack/events", "body": entry}
+        event = entry["body"].get("event")
+        if event is not None:
+            entry["body"]["event_id"] = f"Ev{run_id}{i:06d}"
+            event["ts"] = f"{started + i}.{i % 1000000:06d}"
+        entries.append(entry)
+    return entries
+
+
+async def send(client, stub: ApiStub, entry: dict, rejected: Counter) -> None:
+    channel = (entry["body"].get("event") or {}).get("channel")
+    sent_at = time.perf_counter()
+    if channel:
+        stub.expect(channel, sent_at)
+    response = await client.post(entry["path"], json=entry["body"])
+    if response.status_code >= 400:
+        rejected[entry["path"]] += 1
+        if channel and stub.pending[channel]:
+            stub.pending[channel].pop()
+    elif not channel:
+        stub.record(sent_at)
+
+
+def summarize(samples: List[float]) -> dict:
+    from slack_bot.api.slack.scheduler import percentile
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples) if samples else None,
+        "p50": percentile(samples, 0.5),
+        "p95": percentile(samples, 0.95),
+        "p99": percentile(samples, 0.99),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    stub = ApiStub(latency=args.api_latency / 1000)
+    runner, stub_url = await stub.start()
+    os.environ.setdefault("SERVICE_ACCOUNT_INFO_PRIVATE_KEY", "")
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-benchmark",
+        "SLACK_BOT_TOKEN": "xoxb-benchmark",
+        "SLACK_API_URL": f"{stub_url}/slack/",
+        "FIREFLIES_API_URL": f"{stub_url}/fireflies",
+        "BREVO_API_URL": f"{stub_url}/brevo",
+    })
+
+    # Settings are patched before anything else imports them, since some
+    # singletons (dedup store, checkpointer, compiled graphs) capture them.
+    from slack_bot.core.config import settings
+    async_client, sync_client = mongo_clients(args.mongo_url)
+    await async_client.drop_database("slack")
+    settings.DB_CLIENT = async_client.slack
+    settings.MONGO_CLIENT = sync_client
+    settings.LLM_MINI = ScriptedChatModel(latency=args.llm_latency / 1000)
+    # Every agent gets the scripted model instead of its configured tier.
+    settings.LLM_AGENT_MODELS = {}
+    await seed(settings.DB_CLIENT)
+
+    collector = SpanCollector()
+    trace_logger = logging.getLogger("slack_bot.trace")
+    trace_logger.addHandler(collector)
+    trace_logger.setLevel(logging.DEBUG)
+    trace_logger.propagate = False
+
+    import httpx
+    import slack_bot.api.slack  # noqa: F401  (resolves the slack <-> agent import cycle)
+    from slack_bot import create_app
+    from slack_bot.api.agent.usage import answer_paths
+    from slack_bot.api.slack.utils import slack_dispatcher
+    from slack_bot.api.slack.views import event_scheduler
+
+    entries = load_corpus(args.corpus, args.events)
+    rejected: Counter = Counter()
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            started = time.perf_counter()
+            tasks = []
+            for i, entry in enumerate(entries):
+                if args.rate:
+                    await asyncio.sleep(max(0.0, started + i / args.rate - time.perf_counter()))
+                tasks.append(asyncio.create_task(send(client, stub, entry, rejected)))
+            await asyncio.gather(*tasks)
+            deadline = time.perf_counter() + args.timeout
+            while stub.unanswered() and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+        scheduler_stats = event_scheduler.stats()
+        outbound_stats = slack_dispatcher.stats()
+        admission_stats = settings.LLM_ADMISSION.stats()
+    await runner.cleanup()
+
+    answered = len(stub.latencies)
+    duration = (stub.last_reply or time.perf_counter()) - started
+    return {
+        "events": len(entries),
+        "answered": answered,
+        "unanswered": stub.unanswered(),
+        "rejected": sum(rejected.values()),
+        "duration": duration,
+        "events_per_sec": answered / duration if duration > 0 else None,
+        "latency_ms": {key: value * 1000 if key != "count" and value is not None else value
+                       for key, value in summarize(stub.latencies).items()},
+        "stages_ms": {
+            f"{kind} {name}": summarize(durations)
+            for (kind, name), durations in sorted(collector.durations.items())
+        },
+        "scheduler_wait": scheduler_stats.get("wait_time"),
+        "outbound_latency": outbound_stats.get("latency"),
+        "answer_paths": answer_paths.stats(),
+        "llm_admission": admission_stats["classes"],
+        "api_calls": dict(stub.calls),
+    }
+
+
+def fmt(value: float | None) -> str:
+    return f"{value:9.1f}" if value is not None else "        -"
+
+
+def report(results: dict) -> None:
+    latency = results["latency_ms"]
+    print(f"events:      {results['events']} sent, {results['answered']} answered, "
+          f"{results['unanswered']} unanswered, {results['rejected']} rejected")
+    print(f"duration:    {results['duration']:.3f} s")
+    print(f"throughput:  {results['events_per_sec'] or 0:.2f} events/s")
+    print(f"latency ms:  p50 {fmt(latency['p50'])}  p95 {fmt(latency['p95'])}  p99 {fmt(latency['p99'])}")
+    print()
+    print(f"{'stage':<48}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in results["stages_ms"].items():
+        print(f"{stage:<48}{stats['count']:>7}{fmt(stats['mean'])} {fmt(stats['p50'])} "
+              f"{fmt(stats['p95'])} {fmt(stats['p99'])}")
+    print()
+    print(f"scheduler wait: {results['scheduler_wait']}")
+    print(f"outbound latency: {results['outbound_latency']}")
+    print(f"answer paths: {results['answer_paths']}")
+    print(f"llm admission: {results['llm_admission']}")
+    print(f"api calls: {results['api_calls']}")
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    found = []
+    if baseline.get("events_per_sec") and (results["events_per_sec"] or 0) < baseline["events_per_sec"] * (1 - tolerance):
+        found.append(f"throughput {results['events_per_sec'] or 0:.2f} < baseline {baseline['events_per_sec']:.2f} events/s")
+    base_p95 = baseline.get("latency_ms", {}).get("p95")
+    p95 = results["latency_ms"]["p95"]
+    if base_p95 and (p95 is None or p95 > base_p95 * (1 + tolerance)):
+        found.append(f"p95 latency {fmt(p95).strip()} > baseline {base_p95:.1f} ms")
+    if results["unanswered"] or results["rejected"]:
+        found.append(f"{results['unanswered']} unanswered, {results['rejected']} rejected events")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--events", type=int, default=None, help="events to replay, cycling the corpus")
+    parser.add_argument("--rate", type=float, default=0, help="events per second, 0 sends all at once")
+    parser.add_argument("--llm-latency", type=float, default=300, help="fake model latency per call, ms")
+    parser.add_argument("--api-latency", type=float, default=50, help="stub API latency per call, ms")
+    parser.add_argument("--mongo-url", default=None, help="local mongod instead of mongomock")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for outstanding replies")
+    parser.add_argument("--json", type=Path, default=None, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, default=None, help="results file of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, default=str))
+    if args.baseline:
+        found = regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in found:
+            print(f"REGRESSION: {regression}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,45 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from slack_bot.api.agent.agent import SUPERVISOR_NAME, get_agent_graphs, get_supervisor_graph
+    from slack_bot.api.agent.history import HISTORY_SUMMARY_NAME
+    from slack_bot.api.agent.checkpoint import checkpointer
+    from slack_bot.api.agent.db_requests import setup_message_history
+    from slack_bot.api.fireflies.summary import SUMMARY_NAME
+    from slack_bot.api.slack.utils import user_profile_cache, slack_client, slack_dispatcher
+    from slack_bot.api.slack.views import event_scheduler, dedup_store, message_coalescer
+    from slack_bot.core.config import settings
+    from slack_bot.core.http import http_clients
+    from slack_bot.core.monitoring import loop_monitor
+    settings.check_agent_models(get_agent_graphs(), [SUPERVISOR_NAME, HISTORY_SUMMARY_NAME, SUMMARY_NAME])
+    get_supervisor_graph()
+    loop_monitor.start()
+    slack_client.session = http_clients.aiohttp_session("slack_web")
+    await asyncio.gather(
+        dedup_store.setup(),
+        setup_message_history(),
+        *([checkpointer.setup()] if settings.CHECKPOINTER_ENABLED else [])
+    )
+    user_profile_cache.start()
+    event_scheduler.start()
+    yield
+    await message_coalescer.stop()
+    await event_scheduler.stop()
+    await user_profile_cache.stop()
+    await slack_dispatcher.stop()
+    await http_clients.aclose()
+    await loop_monitor.stop()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     from slack_bot.api.slack import slack_router
     app.include_router(slack_router, tags=["slack"])
@@ -23,4 +59,9 @@ def create_app() -> FastAPI:
     async def read_root():
         return {"report": "Hello world!"}
 
+    @app.get("/metrics")
+    async def read_metrics():
+        from slack_bot.core.metrics import CONTENT_TYPE, metrics
+        return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
     return app
@@ -1,14 +1,29 @@
 import asyncio
+import time
+import uuid
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Tuple
 
-from langchain_community.chat_message_histories import MongoDBChatMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END
+from langgraph.graph.state import CompiledStateGraph
 from langgraph_supervisor import create_supervisor
+from langgraph_supervisor.handoff import METADATA_KEY_IS_HANDOFF_BACK
 from langgraph.prebuilt import create_react_agent
 
+from slack_bot.api.agent.cache import response_cache
+from slack_bot.api.agent.checkpoint import checkpointer
 from slack_bot.api.agent.db_requests import save_messages
+from slack_bot.api.agent.fanout import FAN_OUT_TOOL_NAME, create_fan_out_tool
+from slack_bot.api.agent.history import history_compactor
 from slack_bot.api.agent.prompt import agent_prompts
+from slack_bot.api.agent.router import Route, pre_router
+from slack_bot.api.agent.usage import TracingCallbackHandler, agent_name_from_metadata, answer_paths
+from slack_bot.api.agent.utils import message_text
 from slack_bot.api.agent.tools import (
     get_document_tool,
     get_slack_users_tool,
@@ -20,113 +35,293 @@ from slack_bot.api.agent.tools import (
     query_vector_store_tool
 )
 from slack_bot.core.config import settings
+from slack_bot.core.tracing import Span, span, start_span
+
+
+SUPERVISOR_NAME = 'supervisor'
+
+
+@dataclass
+class AgentUpdate:
+    text: str
+    status: str | None = None
+    final: bool = False
+
+
+def agent_context(config: RunnableConfig) -> dict:
+    return config.get("configurable", {})
+
+
+@lru_cache()
+def static_system_message(system_prompt: str) -> SystemMessage:
+    # Prompts escape literal braces for str.format, so format once to unescape them.
+    return SystemMessage(content=system_prompt.format())
+
+
+def mongo_agent_prompt(state: dict, config: RunnableConfig) -> list:
+    # Static instructions first so OpenAI prompt caching can reuse them; volatile context last.
+    context = agent_context(config)
+    context_prompt = agent_prompts.mongo_agent_prompt.context_prompt.format(
+        today=context.get("today"),
+        channel_id=context.get("channel_id"),
+        user_id=context.get("user_id"),
+        user_name=context.get("user_name")
+    )
+    return [
+        static_system_message(agent_prompts.mongo_agent_prompt.system_prompt),
+        SystemMessage(content=context_prompt),
+        *state["messages"]
+    ]
+
+
+def supervisor_prompt(state: dict, config: RunnableConfig) -> list:
+    context = agent_context(config)
+    context_prompt = agent_prompts.supervisor_prompt.context_prompt.format(
+        today=context.get("today"),
+        channel_id=context.get("channel_id")
+    )
+    system_prompt = agent_prompts.supervisor_prompt.system_prompt
+    if settings.SUPERVISOR_FAN_OUT:
+        system_prompt = f"{system_prompt}\n\n{agent_prompts.supervisor_prompt.fan_out_prompt}"
+    return [
+        static_system_message(system_prompt),
+        SystemMessage(content=context_prompt),
+        *context.get("history", []),
+        *state["messages"]
+    ]
+
+
+def final_answer(messages: list) -> BaseMessage:
+    """Last message meant for the user, skipping the handoff-back pair appended after a sub-agent."""
+    for message in reversed(messages):
+        if not message.response_metadata.get(METADATA_KEY_IS_HANDOFF_BACK):
+            return message
+    return messages[-1]
+
+
+def static_prompt(system_prompt: str) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        static_system_message(system_prompt),
+        MessagesPlaceholder(variable_name="messages")
+    ])
+
+
+@lru_cache()
+def get_agent_graphs() -> Dict[str, CompiledStateGraph]:
+    """Sub-agents, compiled once. Per-request values come from `configurable`."""
+    agent_specs = [
+        ('MongoDBAgent', mongo_agent_prompt, [query_mongo_tool, get_slack_users_tool, get_slack_user_tool]),
+        ('DocsAgent', static_prompt(agent_prompts.docs_agent_prompt.system_prompt),
+         [get_document_tool, get_document_names_tool]),
+        ('EmailAgent', static_prompt(agent_prompts.email_agent_prompt.system_prompt), [send_email_tool]),
+        ('MongoDBTranscriptionAgent', static_prompt(agent_prompts.mongo_transcription_agent_prompt.system_prompt),
+         [query_mongo_transcription_tool]),
+        ('RagAgent', static_prompt(agent_prompts.mongo_transcription_agent_prompt.system_prompt),
+         [query_vector_store_tool]),
+    ]
+    return {
+        name: create_react_agent(
+            model=settings.llm(name).bind_tools(tools),
+            prompt=prompt,
+            tools=tools,
+            name=name,
+            # Sub-agents start fresh on every handoff; only the supervisor thread is checkpointed.
+            checkpointer=False
+        )
+        for name, prompt, tools in agent_specs
+    }
+
+
+@lru_cache()
+def get_supervisor_graph() -> CompiledStateGraph:
+    agents = get_agent_graphs()
+    tools = [create_fan_out_tool(agents)] if settings.SUPERVISOR_FAN_OUT else None
+    builder = create_supervisor(
+        prompt=supervisor_prompt,
+        model=settings.llm(SUPERVISOR_NAME),
+        agents=list(agents.values()),
+        tools=tools,
+        supervisor_name=SUPERVISOR_NAME
+    )
+    # Direct-answer agents end the run instead of handing back to the supervisor for a rewrite.
+    for name in settings.DIRECT_ANSWER_AGENTS:
+        if name in agents:
+            builder.edges.discard((name, SUPERVISOR_NAME))
+            builder.add_edge(name, END)
+    return builder.compile(checkpointer=checkpointer if settings.CHECKPOINTER_ENABLED else None)
 
 
 class SlackAgent:
-    def __init__(self, channel_id: str, last_3_msg: list, message_history: MongoDBChatMessageHistory, user_id: str, user_name: str):
+    def __init__(self, channel_id: str, history: list, user_id: str, user_name: str):
         self.channel_id = channel_id
         self.user_id = user_id
         self.user_name = user_name
-        self.message_history = message_history
-        self.flat_msgs = [msg for m in last_3_msg for msg in (m if isinstance(m, list) else [m])]
-        self.now_str = datetime.now().isoformat()
-
-        mongo_tools = [query_mongo_tool, get_slack_users_tool, get_slack_user_tool]
-        mongo_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(
-                content=agent_prompts.mongo_agent_prompt.system_prompt.format(
-                    today=self.now_str,
-                    channel_id=self.channel_id,
-                    user_id=self.user_id,
-                    user_name=self.user_name
-                )
-            ),
-            MessagesPlaceholder(variable_name="messages")
-        ])
-
-        mongo_agent_executor = create_react_agent(
-            model=settings.LLM_MINI.bind_tools(mongo_tools),
-            prompt=mongo_prompt,
-            tools=mongo_tools,
-            name='MongoDBAgent'
-        )
+        self.history = history
+        self.now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
 
-        docs_tools = [get_document_tool, get_document_names_tool]
-        docs_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=agent_prompts.docs_agent_prompt.system_prompt),
-            MessagesPlaceholder(variable_name="messages")
-        ])
-        docs_agent_executor = create_react_agent(
-            model=settings.LLM_MINI.bind_tools(docs_tools),
-            prompt=docs_prompt,
-            tools=docs_tools,
-            name='DocsAgent'
-        )
+        self.handoff_targets = {f"transfer_to_{name.lower()}": name for name in get_agent_graphs()}
+        self.direct_agents = set(settings.DIRECT_ANSWER_AGENTS)
+        self.supervisor_workflow = get_supervisor_graph()
 
-        email_tools = [send_email_tool]
-        email_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=agent_prompts.email_agent_prompt.system_prompt),
-            MessagesPlaceholder(variable_name="messages")
-        ])
-        email_agent_executor = create_react_agent(
-            model=settings.LLM_MINI.bind_tools(email_tools),
-            prompt=email_prompt,
-            tools=email_tools,
-            name='EmailAgent'
-        )
+    def _config(self, callbacks: list | None = None, route: Route | None = None) -> RunnableConfig:
+        config: RunnableConfig = {
+            "callbacks": callbacks or [],
+            "configurable": {
+                "channel_id": self.channel_id,
+                "user_id": self.user_id,
+                "user_name": self.user_name,
+                "today": self.now_str,
+                "history": self.history,
+                # With the checkpointer, the supervisor resumes the channel's thread instead.
+                "thread_id": self.channel_id,
+            }
+        }
+        if route:
+            config["metadata"] = {"agent_name": route.agent_name}
+        return config
 
-        transcription_tools = [query_mongo_transcription_tool]
-        transcription_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=agent_prompts.mongo_transcription_agent_prompt.system_prompt),
-            MessagesPlaceholder(variable_name="messages")
-        ])
-        transcription_agent_executor = create_react_agent(
-            model=settings.LLM_MINI.bind_tools(transcription_tools),
-            prompt=transcription_prompt,
-            tools=transcription_tools,
-            name='MongoDBTranscriptionAgent'
-        )
+    def _input(self, content: str, turn_id: str) -> dict:
+        return {
+            "messages": [HumanMessage(content=content, id=turn_id)]
+        }
 
-        vector_search_tools = [query_vector_store_tool]
-        vector_search_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=agent_prompts.mongo_transcription_agent_prompt.system_prompt),
-            MessagesPlaceholder(variable_name="messages")
-        ])
-        vector_search_agent_executor = create_react_agent(
-            model=settings.LLM_MINI.bind_tools(vector_search_tools),
-            prompt=vector_search_prompt,
-            tools=vector_search_tools,
-            name='RagAgent'
-        )
+    def _route(self, content: str) -> Tuple[Route | None, CompiledStateGraph]:
+        route = pre_router.route(content) if settings.PRE_ROUTER_ENABLED else None
+        if route:
+            return route, get_agent_graphs()[route.agent_name]
+        return None, self.supervisor_workflow
+
+    def _record(self, route: Route | None, answer: BaseMessage, latency: float) -> str:
+        pre_router.record(route, latency)
+        if route:
+            path = "fast_path"
+        elif answer.name in self.direct_agents:
+            path = "direct"
+        else:
+            path = "supervisor"
+        answer_paths.record(path, latency)
+        return path
+
+    def _tracer(self, run_span: Span) -> TracingCallbackHandler:
+        return TracingCallbackHandler(run_span, agent_names=[*get_agent_graphs(), SUPERVISOR_NAME])
+
+    def _cache_key(self, content: str, route: Route | None) -> tuple | None:
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return None
+        return response_cache.key(content, route.agent_name if route else None, self.channel_id, self.user_id)
+
+    def _save(self, content: str, answer: str, turn_id: str) -> None:
+        response_cache.record_turn(self.channel_id, content, answer)
+        asyncio.create_task(save_messages(content, answer, self.channel_id))
+        if settings.CHECKPOINTER_ENABLED:
+            history_compactor.save_turn(
+                self.supervisor_workflow, self.channel_id, SUPERVISOR_NAME, turn_id, content, answer
+            )
+
+    async def run(self, content: str, callbacks: list | None = None) -> str:
+        with span("agent", "run", channel_id=self.channel_id) as run_span:
+            route, graph = self._route(content)
+            started = time.monotonic()
+            turn_id = str(uuid.uuid4())
+            cache_key = self._cache_key(content, route)
+            cached = response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                answer_paths.record("cache", time.monotonic() - started)
+                run_span.set(path="cache")
+                self._save(content, cached, turn_id)
+                return cached
+
+            if settings.CHECKPOINTER_ENABLED:
+                await history_compactor.wait_for_thread(self.channel_id)
+            recorder = response_cache.recorder()
+            callbacks = [*(callbacks or []), recorder, self._tracer(run_span)]
+            result = await graph.ainvoke(
+                self._input(content, turn_id), config=self._config(callbacks, route), checkpoint_during=False
+            )
+            answer = final_answer(result["messages"])
+            run_span.set(path=self._record(route, answer, time.monotonic() - started))
+            final_text = message_text(answer.content)
+            if cache_key:
+                response_cache.put(cache_key, final_text, recorder)
+            self._save(content, final_text, turn_id)
+            return final_text
+
+    async def astream(self, content: str, callbacks: list | None = None) -> AsyncIterator[AgentUpdate]:
+        """Yield the answering agent's text as it is generated, plus sub-agent progress.
+
+        The answer comes from the supervisor, or from the sub-agent itself when
+        the pre-router dispatched the request directly or the agent is a
+        direct-answer agent.
+        """
+        run_span = start_span("agent", "stream", channel_id=self.channel_id)
+        error = None
+        try:
+            async for update in self._astream(content, callbacks, run_span):
+                yield update
+        except (Exception, asyncio.CancelledError) as e:
+            error = e
+            raise
+        finally:
+            run_span.end(error)
+
+    async def _astream(self, content: str, callbacks: list | None, run_span: Span) -> AsyncIterator[AgentUpdate]:
+        route, graph = self._route(content)
+        started = time.monotonic()
+        turn_id = str(uuid.uuid4())
+        cache_key = self._cache_key(content, route)
+        cached = response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            answer_paths.record("cache", time.monotonic() - started)
+            run_span.set(path="cache")
+            self._save(content, cached, turn_id)
+            yield AgentUpdate(text=cached, final=True)
+            return
+
+        if settings.CHECKPOINTER_ENABLED:
+            await history_compactor.wait_for_thread(self.channel_id)
+        recorder = response_cache.recorder()
+        answer = ""
+        final_message = None
+        callbacks = [*(callbacks or []), recorder, self._tracer(run_span)]
+        async for event in graph.astream_events(
+                self._input(content, turn_id), config=self._config(callbacks, route),
+                version="v2", checkpoint_during=False
+        ):
+            kind = event["event"]
+            metadata = event.get("metadata", {})
+            agent_name = agent_name_from_metadata(metadata)
+            # A direct-answer agent only answers as a graph node, not inside a fan-out call.
+            node = metadata.get("langgraph_checkpoint_ns", "").split(":")[0]
+            answering = (
+                route is not None
+                or agent_name == SUPERVISOR_NAME
+                or (agent_name in self.direct_agents and node == agent_name)
+            )
+
+            if kind == "on_chat_model_start" and answering:
+                answer = ""
+            elif kind == "on_chat_model_stream" and answering:
+                answer += message_text(event["data"]["chunk"].content)
+                if answer:
+                    yield AgentUpdate(text=answer)
+            elif kind == "on_tool_start":
+                tool_name = event["name"]
+                if tool_name.startswith("transfer_back_to_"):
+                    continue
+                if tool_name in self.handoff_targets:
+                    yield AgentUpdate(text=answer, status=f"Asking {self.handoff_targets[tool_name]}")
+                elif tool_name == FAN_OUT_TOOL_NAME:
+                    agents = [task["agent"] for task in event["data"].get("input", {}).get("tasks", [])]
+                    yield AgentUpdate(text=answer, status=f"Asking {', '.join(agents)}")
+                elif agent_name != SUPERVISOR_NAME:
+                    yield AgentUpdate(text=answer, status=f"{agent_name}: running `{tool_name}`")
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                final_message = final_answer(event["data"]["output"]["messages"])
 
-        supervisor_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=agent_prompts.supervisor_prompt.system_prompt),
-            *self.flat_msgs,
-            MessagesPlaceholder(variable_name="messages")
-        ])
-        self.supervisor_workflow = create_supervisor(
-            prompt=supervisor_prompt,
-            model=settings.LLM_MINI,
-            agents=[
-                mongo_agent_executor,
-                docs_agent_executor,
-                email_agent_executor,
-                transcription_agent_executor,
-                vector_search_agent_executor
-            ],
-            supervisor_name='supervisor'
-        ).compile()
-
-
-    async def run(self, content: str) -> str:
-        result = await self.supervisor_workflow.ainvoke({
-            "messages": [
-                {
-                    "role": "user",
-                    "content": content
-                }
-            ]
-        })
-        final_text = result["messages"][-1].content[0]["text"]
-        asyncio.create_task(save_messages(content, final_text, self.message_history))
-        return final_text
\ No newline at end of file
+        final_text = message_text(final_message.content) if final_message else ""
+        if final_message:
+            run_span.set(path=self._record(route, final_message, time.monotonic() - started))
+        if cache_key:
+            response_cache.put(cache_key, final_text, recorder)
+        self._save(content, final_text, turn_id)
+        yield AgentUpdate(text=final_text, final=True)
@@ -0,0 +1,149 @@
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from cachetools import LRUCache, TTLCache
+from langchain_core.callbacks import BaseCallbackHandler
+
+from slack_bot.api.agent.fanout import FAN_OUT_TOOL_NAME
+from slack_bot.core.config import settings
+
+
+# Tools whose results a cached answer may be built from, and the collection each one reads.
+READ_ONLY_TOOLS = {
+    "get_document_tool": None,
+    "get_document_names_tool": None,
+    "query_vector_store_tool": None,
+    "get_slack_users_tool": None,
+    "get_slack_user_tool": None,
+    "query_mongo_tool": "tasks",
+    "query_mongo_transcription_tool": "transcriptions",
+}
+# Answers from these agents do not depend on who asks or where. Only requests the
+# pre-router dispatches straight to one of them are cached globally, so each must
+# have a rule in router.DEFAULT_RULES.
+GLOBAL_AGENTS = ("DocsAgent", "MongoDBTranscriptionAgent")
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", PUNCTUATION_RE.sub(" ", text.lower())).strip()
+
+
+class ToolCallRecorder(BaseCallbackHandler):
+    """Collects the tools one agent run called, to decide whether its answer can be cached."""
+
+    run_inline = True
+
+    def __init__(self, generations: Dict[str, int] | None = None):
+        self.generations = generations or {}
+        self.calls: List[Tuple[str, Any]] = []
+
+    def on_tool_start(self, serialized: dict, input_str: str, *, run_id: UUID, inputs: dict | None = None,
+                      **kwargs: Any) -> None:
+        name = serialized.get("name") or kwargs.get("name", "")
+        # Handoffs and fan-out only route; the tools the agents call decide cacheability.
+        if name.startswith("transfer_") or name == FAN_OUT_TOOL_NAME:
+            return
+        self.calls.append((name, inputs or {}))
+
+    def read_only(self) -> bool:
+        return bool(self.calls) and all(
+            name in READ_ONLY_TOOLS and inputs.get("type_query", "read") == "read"
+            for name, inputs in self.calls
+        )
+
+    def collections(self) -> List[str]:
+        return sorted({READ_ONLY_TOOLS[name] for name, _ in self.calls if READ_ONLY_TOOLS.get(name)})
+
+
+@dataclass
+class CachedResponse:
+    text: str
+    generations: Dict[str, int] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """TTL + LRU cache of final answers, in front of the agent graph.
+
+    Only answers built purely from read-only tool calls are stored, keyed
+    on the normalized question. Requests the pre-router sends to a document
+    or transcription agent are cached globally; all others are scoped to the
+    channel and the user, so "show my tasks" never leaks across users, and
+    to the channel's last exchange, since the supervisor answers follow-ups
+    like "show more" from the history.
+    Writes bump a per-collection generation, which invalidates every answer
+    that read from that collection.
+
+    Entries and generations live in this process only: a write handled by
+    another worker is not seen here until the TTL expires. The cache is
+    therefore off by default and meant for single-process deployments.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 300):
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Counter = Counter()
+        self._last_turns: LRUCache = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.invalidated = 0
+
+    def key(self, text: str, agent_name: str | None, channel_id: str, user_id: str) -> tuple:
+        query = normalize_query(text)
+        if agent_name in GLOBAL_AGENTS:
+            return "global", query
+        return "user", channel_id, user_id, self._last_turns.get(channel_id), query
+
+    def record_turn(self, channel_id: str, question: str, answer: str) -> None:
+        self._last_turns[channel_id] = hashlib.sha256(f"{question}\0{answer}".encode()).hexdigest()
+
+    def recorder(self) -> ToolCallRecorder:
+        # Generations are taken before the run, so a write that lands mid-run still invalidates it.
+        return ToolCallRecorder(dict(self._generations))
+
+    def get(self, key: tuple) -> str | None:
+        entry: CachedResponse | None = self._entries.get(key)
+        if entry is not None and any(self._generations[name] != generation
+                                     for name, generation in entry.generations.items()):
+            self._entries.pop(key, None)
+            self.invalidated += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.text
+
+    def put(self, key: tuple, text: str, recorder: ToolCallRecorder) -> None:
+        if not text or not recorder.read_only():
+            return
+        generations = {name: recorder.generations.get(name, 0) for name in recorder.collections()}
+        self._entries[key] = CachedResponse(text=text, generations=generations)
+        self.stored += 1
+
+    def invalidate(self, collection: str) -> None:
+        self._generations[collection] += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "stored": self.stored,
+            "invalidated": self.invalidated,
+            "generations": dict(self._generations),
+        }
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL
+)
@@ -0,0 +1,195 @@
+from typing import Any, AsyncIterator, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from slack_bot.core.config import settings
+
+
+class MongoCheckpointSaver(BaseCheckpointSaver[str]):
+    """Async LangGraph checkpointer on the `checkpoints` / `checkpoint_writes` collections.
+
+    Channel values are stored inline with each checkpoint. With `keep` set,
+    only the newest checkpoints of a thread are kept, since the bot resumes
+    from the latest state and never time-travels.
+    """
+
+    def __init__(self, db=None, keep: int | None = 2):
+        super().__init__()
+        self.db = db if db is not None else settings.DB_CLIENT
+        self.keep = keep
+        self.reads = 0
+        self.writes = 0
+
+    @property
+    def checkpoints(self):
+        return self.db.checkpoints
+
+    @property
+    def checkpoint_writes(self):
+        return self.db.checkpoint_writes
+
+    async def setup(self) -> None:
+        await self.checkpoints.create_index(
+            [("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", DESCENDING)],
+            unique=True
+        )
+        await self.checkpoint_writes.create_index(
+            [("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", ASCENDING)]
+        )
+
+    def _load(self, doc: dict, writes: list) -> CheckpointTuple:
+        configurable = {
+            "thread_id": doc["thread_id"],
+            "checkpoint_ns": doc["checkpoint_ns"],
+        }
+        return CheckpointTuple(
+            config={"configurable": {**configurable, "checkpoint_id": doc["checkpoint_id"]}},
+            checkpoint=self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+            metadata=self.serde.loads_typed((doc["metadata_type"], doc["metadata"])),
+            parent_config=(
+                {"configurable": {**configurable, "checkpoint_id": doc["parent_checkpoint_id"]}}
+                if doc.get("parent_checkpoint_id") else None
+            ),
+            pending_writes=[
+                (write["task_id"], write["channel"], self.serde.loads_typed((write["type"], write["value"])))
+                for write in writes
+            ],
+        )
+
+    async def _writes_for(self, doc: dict) -> list:
+        cursor = self.checkpoint_writes.find({
+            "thread_id": doc["thread_id"],
+            "checkpoint_ns": doc["checkpoint_ns"],
+            "checkpoint_id": doc["checkpoint_id"],
+        }).sort([("task_id", ASCENDING), ("idx", ASCENDING)])
+        return await cursor.to_list(length=None)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        self.reads += 1
+        query = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+        doc = await self.checkpoints.find_one(query, sort=[("checkpoint_id", DESCENDING)])
+        if doc is None:
+            return None
+        return self._load(doc, await self._writes_for(doc))
+
+    async def alist(
+            self,
+            config: RunnableConfig | None,
+            *,
+            filter: dict[str, Any] | None = None,
+            before: RunnableConfig | None = None,
+            limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        query: dict = {}
+        if config:
+            query["thread_id"] = config["configurable"]["thread_id"]
+            if "checkpoint_ns" in config["configurable"]:
+                query["checkpoint_ns"] = config["configurable"]["checkpoint_ns"]
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before and (before_id := get_checkpoint_id(before)):
+            query["checkpoint_id"] = {"$lt": before_id}
+        cursor = self.checkpoints.find(query).sort("checkpoint_id", DESCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        async for doc in cursor:
+            checkpoint_tuple = self._load(doc, await self._writes_for(doc))
+            if filter and any(checkpoint_tuple.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            yield checkpoint_tuple
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self.writes += 1
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        key = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}
+        await self.checkpoints.update_one(key, {"$set": {
+            **key,
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "type": checkpoint_type,
+            "checkpoint": checkpoint_data,
+            "metadata_type": metadata_type,
+            "metadata": metadata_data,
+        }}, upsert=True)
+        if self.keep and not checkpoint_ns:
+            await self._prune(thread_id)
+        return {"configurable": key}
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        key = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+            "checkpoint_id": config["configurable"]["checkpoint_id"],
+        }
+        operations = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            value_type, value_data = self.serde.dumps_typed(value)
+            write_key = {**key, "task_id": task_id, "idx": write_idx}
+            # Regular writes are idempotent per task; special channels (errors, interrupts) overwrite.
+            update = {"$set" if write_idx < 0 else "$setOnInsert": {
+                **write_key,
+                "channel": channel,
+                "type": value_type,
+                "value": value_data,
+                "task_path": task_path,
+            }}
+            operations.append(UpdateOne(write_key, update, upsert=True))
+        if operations:
+            await self.checkpoint_writes.bulk_write(operations, ordered=False)
+
+    async def _prune(self, thread_id: str) -> None:
+        """Drop checkpoints older than the newest `keep` root checkpoints of a thread.
+
+        Checkpoint ids are time ordered, so this also removes the checkpoints
+        that subgraphs (the supervisor's own agent loop) wrote in earlier runs.
+        """
+        cursor = self.checkpoints.find(
+            {"thread_id": thread_id, "checkpoint_ns": ""}, {"checkpoint_id": 1}
+        ).sort("checkpoint_id", DESCENDING).skip(self.keep - 1).limit(1)
+        oldest_kept = await cursor.to_list(length=1)
+        if not oldest_kept:
+            return
+        query = {"thread_id": thread_id, "checkpoint_id": {"$lt": oldest_kept[0]["checkpoint_id"]}}
+        await self.checkpoints.delete_many(query)
+        await self.checkpoint_writes.delete_many(query)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.checkpoints.delete_many({"thread_id": thread_id})
+        await self.checkpoint_writes.delete_many({"thread_id": thread_id})
+
+    def stats(self) -> dict:
+        return {"reads": self.reads, "writes": self.writes, "keep": self.keep}
+
+
+checkpointer = MongoCheckpointSaver(keep=settings.CHECKPOINT_KEEP)
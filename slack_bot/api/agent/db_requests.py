@@ -1,83 +1,55 @@
+import asyncio
 import json
-from typing import List, Union
+from datetime import datetime, timezone
 
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_mongodb import MongoDBChatMessageHistory
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, message_to_dict
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
 
 
 from slack_bot.core.config import settings
 
 
-def get_last_3_messages(channel_id: str) -> List:
-    collection = settings.MONGO_CLIENT["slack"]["messages"]
+# Single-field index LangChain's MongoDBChatMessageHistory used to create; the compound index covers its queries.
+LEGACY_SESSION_INDEX = "sessionId_1"
+INDEX_NOT_FOUND = 27
 
-    cursor = collection.find(
-        {"sessionId": channel_id}
-    ).sort("_id", -1).limit(100)
 
-    human_messages = []
-    ai_messages = []
+async def setup_message_history() -> None:
+    messages = settings.DB_CLIENT.messages
+    # History is always read newest-first within one channel.
+    await messages.create_index([("sessionId", ASCENDING), ("_id", ASCENDING)])
+    if LEGACY_SESSION_INDEX in await messages.index_information():
+        try:
+            await messages.drop_index(LEGACY_SESSION_INDEX)
+        except OperationFailure as e:
+            # Another worker dropped it first.
+            if e.code != INDEX_NOT_FOUND:
+                raise
 
-    for doc in cursor:
-        raw = doc.get("History")
-        if not raw:
-            continue
 
-        try:
-            parsed = json.loads(raw)
-            msg_type = parsed.get("type")
-            content = parsed.get("data", {}).get("content", "")
-
-            if msg_type == "human" and len(human_messages) < 3:
-                human_messages.append(HumanMessage(content=content))
-            elif msg_type == "ai" and len(ai_messages) < 3:
-                ai_messages.append(AIMessage(content=content))
-
-            if len(human_messages) == 3 and len(ai_messages) == 3:
-                break
-
-        except (json.JSONDecodeError, KeyError):
-            continue
-
-    human_messages.reverse()
-    ai_messages.reverse()
-
-    mixed = []
-    for i in range(max(len(human_messages), len(ai_messages))):
-        if i < len(human_messages):
-            mixed.append(human_messages[i])
-        if i < len(ai_messages):
-            mixed.append(ai_messages[i])
-
-    return mixed
-
-
-async def get_message_history(channel_id: str) -> MongoDBChatMessageHistory:
-    return MongoDBChatMessageHistory(
-        session_id=channel_id,
-        client=settings.MONGO_CLIENT,
-        connection_string=None,
-        session_id_key="sessionId",
-        database_name="slack",
-        collection_name="messages",
-    )
-
-
-async def save_messages(
-        query: str, response: str, message_history: MongoDBChatMessageHistory
-) -> None:
-    await message_history.aadd_messages(
-        [
-            HumanMessage(content=query),
-            AIMessage(
-                content=response,
-            ),
-        ]
-    )
+def history_document(session_id: str, message: BaseMessage) -> dict:
+    """A `messages` document with typed fields, plus the JSON `History` blob releases before them read."""
+    return {
+        "sessionId": session_id,
+        "type": message.type,
+        "content": message.content,
+        "ts": datetime.now(timezone.utc),
+        "History": json.dumps(message_to_dict(message)),
+    }
+
+
+async def save_messages(query: str, response: str, channel_id: str) -> None:
+    await settings.DB_CLIENT.messages.insert_many([
+        history_document(channel_id, message)
+        for message in (HumanMessage(content=query), AIMessage(content=response))
+    ])
 
 
 if __name__ == "__main__":
-    print(get_last_3_messages('C090VM7R2AU'))
+    from slack_bot.api.agent.history import get_conversation_history
+
+    print(asyncio.run(get_conversation_history('C090VM7R2AU')))
 
 
 
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Dict, List
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.graph.state import CompiledStateGraph
+from pydantic import BaseModel, Field
+
+from slack_bot.api.agent.utils import message_text
+from slack_bot.core.tracing import report_error
+
+
+FAN_OUT_TOOL_NAME = "ask_agents_in_parallel"
+
+
+class AgentTask(BaseModel):
+    agent: str = Field(description="Name of the agent, e.g. MongoDBAgent or DocsAgent")
+    task: str = Field(description="Self-contained request for this agent only")
+
+
+class FanOutInput(BaseModel):
+    tasks: List[AgentTask] = Field(description="One entry per independent part of the user's request")
+
+
+class FanOutStats:
+    def __init__(self):
+        self.calls = 0
+        self.agent_calls = 0
+        self.wall_time = 0.0
+        self.serial_time = 0.0
+
+    def record(self, wall_time: float, agent_times: List[float]) -> None:
+        self.calls += 1
+        self.agent_calls += len(agent_times)
+        self.wall_time += wall_time
+        self.serial_time += sum(agent_times)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "avg_agents_per_call": self.agent_calls / self.calls if self.calls else None,
+            "avg_wall_time": self.wall_time / self.calls if self.calls else None,
+            # Time the same sub-agent runs would have taken back to back.
+            "time_saved": self.serial_time - self.wall_time,
+        }
+
+
+fan_out_stats = FanOutStats()
+
+
+def agent_config(config: RunnableConfig, agent_name: str) -> RunnableConfig:
+    """Per-agent config that keeps callbacks and request context but not the parent run's checkpoint keys."""
+    configurable = {
+        key: value for key, value in config.get("configurable", {}).items()
+        if not key.startswith("__") and key not in ("thread_id", "checkpoint_ns", "checkpoint_id")
+    }
+    return {
+        "callbacks": config.get("callbacks"),
+        "configurable": configurable,
+        "metadata": {"agent_name": agent_name},
+    }
+
+
+def create_fan_out_tool(agents: Dict[str, CompiledStateGraph]) -> BaseTool:
+    """Supervisor tool that runs several sub-agents concurrently and returns all of their answers.
+
+    Unlike a sequence of handoffs, the supervisor spends a single LLM turn on
+    the whole multi-intent request instead of one per agent.
+    """
+
+    async def run_agent(name: str, task: str, config: RunnableConfig) -> tuple:
+        started = time.monotonic()
+        if name not in agents:
+            return name, f"Unknown agent. Available agents: {', '.join(agents)}", 0.0
+        try:
+            result = await agents[name].ainvoke(
+                {"messages": [{"role": "user", "content": task}]},
+                config=agent_config(config, name)
+            )
+            answer = message_text(result["messages"][-1].content)
+        except Exception as e:
+            report_error(FAN_OUT_TOOL_NAME, f"{name}: {e}")
+            answer = f"Error: {e}"
+        return name, answer, time.monotonic() - started
+
+    async def ask_agents_in_parallel(tasks: List[AgentTask], config: RunnableConfig) -> str:
+        started = time.monotonic()
+        results = await asyncio.gather(*[
+            run_agent(item.agent, item.task, config) for item in tasks
+        ])
+        fan_out_stats.record(time.monotonic() - started, [elapsed for _, _, elapsed in results])
+        return "\n\n".join(f"## {name}\n{answer}" for name, answer, _ in results)
+
+    return StructuredTool.from_function(
+        coroutine=ask_agents_in_parallel,
+        name=FAN_OUT_TOOL_NAME,
+        description=(
+            "Send independent parts of a compound request to several agents at once. "
+            "Returns each agent's answer under its name."
+        ),
+        args_schema=FanOutInput,
+    )
@@ -0,0 +1,327 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from langgraph.graph.state import CompiledStateGraph
+
+from slack_bot.api.agent.prompt import agent_prompts
+from slack_bot.api.agent.usage import TokenUsageHandler
+from slack_bot.api.agent.utils import message_text
+from slack_bot.core.admission import Priority, llm_priority
+from slack_bot.core.config import settings
+from slack_bot.core.tracing import report_error, span
+
+
+MESSAGE_TYPES = {"human": HumanMessage, "ai": AIMessage}
+# Role and separator tokens OpenAI adds around every chat message.
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_MESSAGE_ID = "conversation-summary"
+SUMMARY_HEADER = "## Earlier conversation (summary)\n\n"
+# Name the summary chain's model and usage are configured and reported under.
+HISTORY_SUMMARY_NAME = "HistorySummary"
+
+
+@lru_cache()
+def get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(settings.HISTORY_ENCODING)
+    except Exception as e:
+        report_error("history", f"cannot load tiktoken encoding, estimating tokens instead: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def parse_history_blob(raw: str | None) -> tuple | None:
+    """(type, content) from the JSON `History` field documents had before typed fields."""
+    if not raw:
+        return None
+    try:
+        parsed = json.loads(raw)
+        return parsed.get("type"), parsed.get("data", {}).get("content", "")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def parse_history_document(doc: dict) -> BaseMessage | None:
+    if "type" in doc:
+        message_type, content = doc["type"], doc.get("content", "")
+    else:
+        parsed = parse_history_blob(doc.get("History"))
+        if parsed is None:
+            return None
+        message_type, content = parsed
+    message_cls = MESSAGE_TYPES.get(message_type)
+    if message_cls is None:
+        return None
+    return message_cls(content=content)
+
+
+# The JSON blob is only fetched for legacy documents that have no typed fields yet.
+HISTORY_PROJECTION = {
+    "type": 1,
+    "content": 1,
+    "History": {"$cond": [{"$ifNull": ["$type", False]}, "$$REMOVE", "$History"]},
+}
+
+
+async def read_history(channel_id: str, after=None, until=None, newest_first: bool = True,
+                       limit: int = 100) -> List[dict]:
+    """Message documents of a channel with `after` < _id <= `until`, served by the (sessionId, _id) index.
+
+    Documents written before typed fields are read from their blob until
+    the typed_fields migration has run.
+    """
+    query = {"sessionId": channel_id, "$or": [
+        {"type": {"$in": list(MESSAGE_TYPES)}},
+        {"type": {"$exists": False}},
+    ]}
+    bounds = {}
+    if after is not None:
+        bounds["$gt"] = after
+    if until is not None:
+        bounds["$lte"] = until
+    if bounds:
+        query["_id"] = bounds
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"_id": -1 if newest_first else 1}},
+        {"$limit": limit},
+        {"$project": HISTORY_PROJECTION},
+    ]
+    return await settings.DB_CLIENT.messages.aggregate(pipeline).to_list(None)
+
+
+@dataclass
+class ConversationHistory:
+    summary: str | None = None
+    messages: List[BaseMessage] = field(default_factory=list)
+    tokens: int = 0
+
+    def to_messages(self) -> List[BaseMessage]:
+        if not self.summary:
+            return list(self.messages)
+        return [SystemMessage(content=f"{SUMMARY_HEADER}{self.summary}", id=SUMMARY_MESSAGE_ID), *self.messages]
+
+
+class HistoryCompactor:
+    """Keeps conversation context within a token budget.
+
+    The newest turns that fit in `token_budget` are returned verbatim, in
+    chronological order. Older turns are folded into a running summary per
+    channel, stored in the `history_summaries` collection, in the background
+    so the request never waits for the summarizer. Compaction waits until at
+    least `summary_batch` messages have overflowed, then pages forward from
+    `summarized_until` so no message is skipped however far behind it is.
+    """
+
+    def __init__(self, token_budget: int = 2000, max_messages: int = 100, summarize: bool = True,
+                 summary_batch: int = 10):
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.summarize = summarize
+        self.summary_batch = summary_batch
+        self._compacting: dict = {}
+        self._saving: dict = {}
+        self.saved_turns = 0
+        self.compactions = 0
+        self.compacted_messages = 0
+
+    @property
+    def summaries(self):
+        return settings.DB_CLIENT.history_summaries
+
+    async def load(self, channel_id: str) -> ConversationHistory:
+        with span("mongo", "history_load", channel_id=channel_id) as load_span:
+            history = await self._load(channel_id)
+            load_span.set(messages=len(history.messages), tokens=history.tokens)
+            return history
+
+    async def _load(self, channel_id: str) -> ConversationHistory:
+        summary_doc = await self.summaries.find_one({"_id": channel_id}) or {}
+        summarized_until = summary_doc.get("summarized_until")
+
+        history = ConversationHistory(summary=summary_doc.get("summary"))
+        overflow = 0
+        newest_overflow = None
+        # One document past the window tells whether older unsummarized messages remain.
+        docs = await read_history(channel_id, after=summarized_until, limit=self.max_messages + 1)
+        backlog = len(docs) > self.max_messages
+        for doc in docs[:self.max_messages]:
+            message = parse_history_document(doc)
+            if message is None:
+                continue
+            if not overflow:
+                tokens = count_tokens(message_text(message.content)) + MESSAGE_OVERHEAD_TOKENS
+                if history.tokens + tokens <= self.token_budget:
+                    history.tokens += tokens
+                    history.messages.append(message)
+                    continue
+            overflow += 1
+            newest_overflow = newest_overflow or doc["_id"]
+        if backlog:
+            newest_overflow = newest_overflow or docs[-1]["_id"]
+
+        history.messages.reverse()
+        if self.summarize and (overflow >= self.summary_batch or backlog):
+            self._schedule(channel_id, history.summary, summarized_until, newest_overflow)
+        return history
+
+    def _schedule(self, channel_id: str, summary: str | None, after, until) -> None:
+        task = self._compacting.get(channel_id)
+        if task is not None and not task.done():
+            return
+        self._compacting[channel_id] = asyncio.create_task(self.compact(channel_id, summary, after, until))
+
+    async def summarize_messages(self, summary: str | None, messages: List[BaseMessage]) -> str:
+        transcript = "\n".join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message_text(message.content)}"
+            for message in messages
+        )
+        # Summaries are never on a user's critical path; let interactive calls go first.
+        with llm_priority(Priority.BACKGROUND):
+            response = await summary_chain().ainvoke({
+                "summary": summary or "(none)",
+                "messages": transcript
+            }, config={"callbacks": [TokenUsageHandler()], "metadata": {"agent_name": HISTORY_SUMMARY_NAME}})
+        return message_text(response.content)
+
+    async def compact(self, channel_id: str, summary: str | None, after, until) -> None:
+        """Fold the messages after `after` up to and including `until` into the summary, oldest page first."""
+        try:
+            while True:
+                docs = await read_history(channel_id, after=after, until=until, newest_first=False,
+                                          limit=self.max_messages)
+                if not docs:
+                    break
+                messages = [message for message in map(parse_history_document, docs) if message is not None]
+                if messages:
+                    summary = await self.summarize_messages(summary, messages)
+                after = docs[-1]["_id"]
+                # Advanced after every page, so an interrupted compaction resumes where it stopped.
+                await self.summaries.update_one(
+                    {"_id": channel_id},
+                    {"$set": {"summary": summary, "summarized_until": after}},
+                    upsert=True
+                )
+                self.compactions += 1
+                self.compacted_messages += len(messages)
+                if len(docs) < self.max_messages:
+                    break
+        except Exception as e:
+            report_error("HistoryCompactor", e)
+        finally:
+            self._compacting.pop(channel_id, None)
+
+    def save_turn(self, graph: CompiledStateGraph, thread_id: str, as_node: str, turn_id: str, content: str,
+                  answer: str) -> None:
+        previous = self._saving.get(thread_id)
+        self._saving[thread_id] = asyncio.create_task(
+            self._save_turn(previous, graph, thread_id, as_node, turn_id, content, answer)
+        )
+
+    async def wait_for_thread(self, thread_id: str) -> None:
+        """Wait until the previous turn of a checkpointed thread has been rewritten."""
+        task = self._saving.get(thread_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _save_turn(self, previous: asyncio.Task | None, graph: CompiledStateGraph, thread_id: str,
+                         as_node: str, turn_id: str, content: str, answer: str) -> None:
+        """Rewrite a checkpointed thread to its compact form after a turn.
+
+        The turn's handoffs, tool calls and sub-agent messages are dropped so
+        only the user message and the final answer remain. Turns beyond the
+        token budget are folded into the summary message.
+        """
+        config: RunnableConfig = {"configurable": {"thread_id": thread_id}}
+        try:
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            state = await graph.aget_state(config)
+            summary = None
+            turns = []
+            for message in state.values.get("messages", []):
+                if message.id == turn_id:
+                    break
+                if message.id == SUMMARY_MESSAGE_ID:
+                    summary = message_text(message.content).removeprefix(SUMMARY_HEADER)
+                elif isinstance(message, HumanMessage) or (isinstance(message, AIMessage) and not message.tool_calls):
+                    turns.append(message)
+            turns += [HumanMessage(content=content), AIMessage(content=answer)]
+
+            kept, tokens = [], 0
+            for message in reversed(turns):
+                tokens += count_tokens(message_text(message.content)) + MESSAGE_OVERHEAD_TOKENS
+                if tokens > self.token_budget:
+                    break
+                kept.append(message)
+            kept.reverse()
+            overflow = turns[:len(turns) - len(kept)]
+            if overflow and self.summarize:
+                if len(overflow) >= self.summary_batch:
+                    summary = await self.summarize_messages(summary, overflow)
+                    self.compactions += 1
+                    self.compacted_messages += len(overflow)
+                else:
+                    # The thread is their only copy: keep them verbatim until a whole batch can be summarized.
+                    kept = turns
+
+            messages = [RemoveMessage(id=REMOVE_ALL_MESSAGES)]
+            if summary:
+                messages.append(SystemMessage(content=f"{SUMMARY_HEADER}{summary}", id=SUMMARY_MESSAGE_ID))
+            messages += kept
+            await graph.aupdate_state(config, {"messages": messages}, as_node=as_node)
+            self.saved_turns += 1
+        except Exception as e:
+            report_error("HistoryCompactor", e)
+        finally:
+            if self._saving.get(thread_id) is asyncio.current_task():
+                self._saving.pop(thread_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "token_budget": self.token_budget,
+            "compactions": self.compactions,
+            "compacted_messages": self.compacted_messages,
+            "in_progress": len(self._compacting),
+            "saved_turns": self.saved_turns,
+            "saving": len(self._saving),
+        }
+
+
+@lru_cache()
+def summary_chain():
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", agent_prompts.history_summary_prompt.system_prompt),
+        ("human", agent_prompts.history_summary_prompt.human_prompt),
+    ])
+    return prompt | settings.llm(HISTORY_SUMMARY_NAME)
+
+
+history_compactor = HistoryCompactor(
+    token_budget=settings.HISTORY_TOKEN_BUDGET,
+    max_messages=settings.HISTORY_MAX_MESSAGES,
+    summarize=settings.HISTORY_SUMMARY_ENABLED,
+    summary_batch=settings.HISTORY_SUMMARY_BATCH
+)
+
+
+async def get_conversation_history(channel_id: str) -> List[BaseMessage]:
+    if settings.CHECKPOINTER_ENABLED:
+        # The checkpointed supervisor resumes the channel's thread instead.
+        return []
+    history = await history_compactor.load(channel_id)
+    return history.to_messages()
@@ -0,0 +1,87 @@
+"""One-off migrations of stored conversation history.
+
+    python -m slack_bot.api.agent.migrate_history {typed_fields,checkpoints} [--dry-run]
+
+`typed_fields` creates the (sessionId, _id) index, drops the old sessionId
+index and adds the `type`, `content` and `ts` fields to documents that only
+have the JSON `History` blob. Until it has run, history reads fetch and parse
+the blob of those documents instead. Documents whose blob cannot be parsed
+get type "invalid" so they are skipped, not re-read.
+
+`checkpoints` seeds a LangGraph checkpoint thread for every channel in the
+`messages` collection that does not have one yet, using the same token budget
+and running summary as the live history builder, so CHECKPOINTER_ENABLED can
+be switched on without channels losing their context. It reads legacy
+documents the same way, so it does not depend on `typed_fields` running first.
+"""
+import asyncio
+import sys
+
+from pymongo import UpdateOne
+
+import slack_bot.api.slack  # noqa: F401  (resolves the slack <-> agent import cycle)
+from slack_bot.api.agent.agent import SUPERVISOR_NAME, get_supervisor_graph
+from slack_bot.api.agent.checkpoint import checkpointer
+from slack_bot.api.agent.db_requests import setup_message_history
+from slack_bot.api.agent.history import HistoryCompactor, parse_history_blob
+from slack_bot.core.config import settings
+
+
+BATCH_SIZE = 1000
+
+
+async def migrate_to_typed_fields(dry_run: bool = False) -> int:
+    if not dry_run:
+        await setup_message_history()
+    messages = settings.DB_CLIENT.messages
+    migrated = 0
+    for channel_id in await messages.distinct("sessionId", {"type": {"$exists": False}}):
+        cursor = messages.find({"sessionId": channel_id, "type": {"$exists": False}}, {"History": 1})
+        updates, invalid = [], 0
+        async for doc in cursor:
+            message_type, content = parse_history_blob(doc.get("History")) or ("invalid", None)
+            invalid += message_type == "invalid"
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+                "type": message_type,
+                "content": content,
+                "ts": doc["_id"].generation_time,
+            }}))
+        print(f"{channel_id}: {len(updates)} messages, {invalid} invalid")
+        if not dry_run:
+            for start in range(0, len(updates), BATCH_SIZE):
+                await messages.bulk_write(updates[start:start + BATCH_SIZE], ordered=False)
+        migrated += 1
+    return migrated
+
+
+async def migrate_to_checkpoints(dry_run: bool = False) -> int:
+    await checkpointer.setup()
+    graph = get_supervisor_graph().copy(update={"checkpointer": checkpointer})
+    # Summaries of older turns already exist or are written in the background by regular loads.
+    compactor = HistoryCompactor(token_budget=settings.HISTORY_TOKEN_BUDGET, summarize=False)
+    migrated = 0
+    for channel_id in await settings.DB_CLIENT.messages.distinct("sessionId"):
+        config = {"configurable": {"thread_id": channel_id}}
+        if await checkpointer.aget_tuple(config):
+            continue
+        history = await compactor.load(channel_id)
+        print(f"{channel_id}: {len(history.messages)} messages, {history.tokens} tokens, "
+              f"summary: {'yes' if history.summary else 'no'}")
+        if not dry_run:
+            await graph.aupdate_state(config, {"messages": history.to_messages()}, as_node=SUPERVISOR_NAME)
+        migrated += 1
+    return migrated
+
+
+MIGRATIONS = {
+    "typed_fields": migrate_to_typed_fields,
+    "checkpoints": migrate_to_checkpoints,
+}
+
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else ""
+    if name not in MIGRATIONS:
+        sys.exit(f"usage: python -m slack_bot.api.agent.migrate_history {{{','.join(MIGRATIONS)}}} [--dry-run]")
+    count = asyncio.run(MIGRATIONS[name](dry_run="--dry-run" in sys.argv))
+    print(f"{name}: migrated {count} channel(s)")
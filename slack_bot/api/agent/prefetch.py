@@ -0,0 +1,323 @@
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Tuple
+
+from slack_bot.api.slack.utils import get_channel_users, get_user_info, get_users_info
+from slack_bot.api.user.model import SlackUserModel
+from slack_bot.core.config import settings
+from slack_bot.core.tracing import report_error
+
+
+MISSING = object()
+# Fields a task read must pin to the requesting user to be answered from the prefetched tasks.
+TASK_USER_FIELDS = ("employees_ids", "employee_id")
+
+
+class Unsupported(Exception):
+    """A read uses a filter or stage the in-memory evaluation does not implement; it goes to Mongo."""
+
+
+async def load_channel_roster(channel_id: str) -> List[SlackUserModel]:
+    user_ids = await get_channel_users(channel_id)
+    profiles = await get_users_info(user_ids)
+    return [profile for profile in profiles if profile]
+
+
+async def load_user_tasks(user_id: str, limit: int) -> List[dict] | object:
+    query = {"$or": [{name: user_id} for name in TASK_USER_FIELDS]}
+    tasks = await settings.DB_CLIENT.tasks.find(query).to_list(limit + 1)
+    # Reads are only answered from a complete set.
+    return tasks if len(tasks) <= limit else MISSING
+
+
+def field_values(value: Any) -> List[Any]:
+    """Values a Mongo filter compares against: an array matches by its elements and as a whole."""
+    return [*value, value] if isinstance(value, list) else [value]
+
+
+def check_bool_mix(value: Any, operand: Any) -> None:
+    # Python treats True/False as 1/0 but Mongo does not; leave such reads to Mongo.
+    if isinstance(value, list) and isinstance(operand, list):
+        for item, operand_item in zip(value, operand):
+            check_bool_mix(item, operand_item)
+    elif isinstance(value, bool) != isinstance(operand, bool) \
+            and isinstance(value, (int, float)) and isinstance(operand, (int, float)):
+        raise Unsupported("bool")
+
+
+def contains(values: List[Any], operand: Any) -> bool:
+    for value in values:
+        check_bool_mix(value, operand)
+    return operand in values
+
+
+def compare(operator: str, value: Any, operand: Any) -> bool:
+    check_bool_mix(value, operand)
+    numbers = isinstance(value, (int, float)) and isinstance(operand, (int, float))
+    if not numbers and type(value) is not type(operand):
+        # Mongo only compares values of the same type, e.g. a date never matches a date string.
+        return False
+    try:
+        return {
+            "$gt": value > operand,
+            "$gte": value >= operand,
+            "$lt": value < operand,
+            "$lte": value <= operand,
+        }[operator]
+    except TypeError:
+        raise Unsupported(operator)
+
+
+def match_condition(doc: dict, name: str, condition: Any) -> bool:
+    if "." in name or name.startswith("$"):
+        raise Unsupported(name)
+    present = name in doc
+    values = field_values(doc.get(name))
+    if not (isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)):
+        return contains(values, condition)
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            matched = contains(values, operand)
+        elif operator == "$ne":
+            matched = not contains(values, operand)
+        elif operator == "$in" and isinstance(operand, list):
+            matched = any(contains(values, item) for item in operand)
+        elif operator == "$nin" and isinstance(operand, list):
+            matched = not any(contains(values, item) for item in operand)
+        elif operator == "$exists":
+            matched = present == bool(operand)
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            matched = any(compare(operator, value, operand) for value in values if not isinstance(value, list))
+        else:
+            raise Unsupported(operator)
+        if not matched:
+            return False
+    return True
+
+
+def match_document(doc: dict, query: dict) -> bool:
+    for name, condition in query.items():
+        if name == "$and" and isinstance(condition, list):
+            if not all(match_document(doc, item) for item in condition):
+                return False
+        elif not match_condition(doc, name, condition):
+            return False
+    return True
+
+
+def project(docs: List[dict], spec: dict) -> List[dict]:
+    if not spec or any(value not in (0, 1) or "." in name for name, value in spec.items()):
+        raise Unsupported("$project")
+    included = {name for name, value in spec.items() if value and name != "_id"}
+    if included and any(not value for name, value in spec.items() if name != "_id"):
+        raise Unsupported("$project")
+    keep_id = spec.get("_id", 1)
+    if included:
+        return [{name: value for name, value in doc.items() if name in included or (name == "_id" and keep_id)}
+                for doc in docs]
+    return [{name: value for name, value in doc.items() if not (name in spec and not spec[name])} for doc in docs]
+
+
+def sort(docs: List[dict], spec: dict) -> List[dict]:
+    for name, direction in reversed(list(spec.items())):
+        if direction not in (1, -1) or "." in name:
+            raise Unsupported("$sort")
+        present = [doc.get(name) for doc in docs if doc.get(name) is not None]
+        if len({type(value) for value in present}) > 1 or any(isinstance(value, (dict, list)) for value in present):
+            raise Unsupported("$sort")
+        # Missing and null values sort first, as in Mongo.
+        docs = sorted(
+            docs,
+            key=lambda doc: (doc.get(name) is not None, doc.get(name) if doc.get(name) is not None else 0),
+            reverse=direction == -1
+        )
+    return docs
+
+
+def scoped_to_user(query: dict, user_id: str) -> bool:
+    for name in TASK_USER_FIELDS:
+        condition = query.get(name)
+        if condition == user_id or condition == {"$eq": user_id}:
+            return True
+    return False
+
+
+def evaluate_task_read(tasks: List[dict], pipeline: List[dict], user_id: str) -> List[dict]:
+    """Run a read pipeline over the user's tasks; it must start with a $match pinned to that user."""
+    first = pipeline[0] if pipeline else {}
+    if list(first) != ["$match"] or not isinstance(first["$match"], dict) \
+            or not scoped_to_user(first["$match"], user_id):
+        raise Unsupported("scope")
+    docs = list(tasks)
+    for stage in pipeline:
+        if len(stage) != 1:
+            raise Unsupported("stage")
+        (operator, spec), = stage.items()
+        if operator == "$match" and isinstance(spec, dict):
+            docs = [doc for doc in docs if match_document(doc, spec)]
+        elif operator == "$project" and isinstance(spec, dict):
+            docs = project(docs, spec)
+        elif operator == "$sort" and isinstance(spec, dict):
+            docs = sort(docs, spec)
+        elif operator == "$skip" and isinstance(spec, int):
+            docs = docs[spec:]
+        elif operator == "$limit" and isinstance(spec, int):
+            docs = docs[:spec]
+        elif operator == "$count" and isinstance(spec, str):
+            docs = [{spec: len(docs)}] if docs else []
+        else:
+            raise Unsupported(operator)
+    return docs
+
+
+@dataclass
+class RequestContext:
+    channel_id: str
+    user_id: str
+    lookups: Dict[str, Tuple[str, asyncio.Task]] = field(default_factory=dict)
+    used: set = field(default_factory=set)
+
+
+_request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+class Prefetcher:
+    """Speculatively loads what most runs ask for while the supervisor is still routing.
+
+    As soon as a user message is picked up, the requester's profile, the
+    channel roster (profiles of every member) and the requester's tasks
+    are fetched concurrently into a per-request context. Tools read from it
+    first: profiles and rosters by awaiting the lookup, task reads by
+    evaluating simple pipelines pinned to the requester over the prefetched
+    tasks. Anything else, or a lookup that failed, falls back to the usual
+    path. A write to the tasks collection drops the snapshot for the rest of
+    the run.
+    """
+
+    def __init__(self, enabled: bool = False, task_limit: int = 200):
+        self.enabled = enabled
+        self.task_limit = task_limit
+        self.started: Counter = Counter()
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.unused: Counter = Counter()
+        self.failed: Counter = Counter()
+
+    def _start(self, name: str, coroutine) -> asyncio.Task:
+        self.started[name] += 1
+
+        async def run():
+            try:
+                return await coroutine
+            except Exception as e:
+                self.failed[name] += 1
+                report_error("prefetch", f"{name}: {e}")
+                return MISSING
+
+        return asyncio.create_task(run())
+
+    @contextmanager
+    def prefetch(self, channel_id: str, user_id: str) -> Iterator[RequestContext | None]:
+        """Start the lookups and make them visible to the block and every task it creates."""
+        if not self.enabled:
+            yield None
+            return
+        context = RequestContext(channel_id, user_id)
+        context.lookups = {
+            "user_profile": (user_id, self._start("user_profile", get_user_info(user_id))),
+            "channel_roster": (channel_id, self._start("channel_roster", load_channel_roster(channel_id))),
+            "user_tasks": (user_id, self._start("user_tasks", load_user_tasks(user_id, self.task_limit))),
+        }
+        token = _request_context.set(context)
+        try:
+            yield context
+        finally:
+            _request_context.reset(token)
+            for name, (_, task) in context.lookups.items():
+                if name not in context.used:
+                    self.unused[name] += 1
+                task.cancel()
+
+    async def _value(self, name: str, key: str) -> Any:
+        context = _request_context.get()
+        lookup = context.lookups.get(name) if context is not None else None
+        if lookup is None or lookup[0] != key:
+            return MISSING
+        task = lookup[1]
+        try:
+            # Shielded: a cancelled tool call must not cancel the lookup other calls share.
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # The lookup was discarded while this call waited for it, not the call cancelled.
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                return MISSING
+            raise
+
+    def _count(self, name: str, hit: bool) -> None:
+        context = _request_context.get()
+        if context is None:
+            return
+        if hit:
+            context.used.add(name)
+            self.hits[name] += 1
+        else:
+            self.misses[name] += 1
+
+    async def get(self, name: str, key: str) -> Any:
+        """The prefetched value of `name` for `key`, or MISSING."""
+        value = await self._value(name, key)
+        self._count(name, value is not MISSING)
+        return value
+
+    def discard(self, name: str) -> None:
+        """Drop a lookup whose data a write has made stale, cancelling it if it is still running."""
+        context = _request_context.get()
+        if context is None:
+            return
+        lookup = context.lookups.pop(name, None)
+        if lookup is not None:
+            lookup[1].cancel()
+
+    async def user_profile(self, user_id: str) -> SlackUserModel | None:
+        user = await self.get("user_profile", user_id)
+        return await get_user_info(user_id) if user is MISSING else user
+
+    async def channel_roster(self, channel_id: str) -> List[SlackUserModel]:
+        roster = await self.get("channel_roster", channel_id)
+        return await load_channel_roster(channel_id) if roster is MISSING else roster
+
+    async def read_tasks(self, pipeline: List[dict]) -> List[dict] | None:
+        """Results of a task read answered from the prefetched tasks, or None if it has to go to Mongo."""
+        context = _request_context.get()
+        if context is None or "user_tasks" not in context.lookups:
+            return None
+        try:
+            # Checked before awaiting so a read that needs Mongo anyway doesn't wait for the prefetch.
+            evaluate_task_read([], pipeline, context.user_id)
+            tasks = await self._value("user_tasks", context.user_id)
+            results = None if tasks is MISSING else evaluate_task_read(tasks, pipeline, context.user_id)
+        except Unsupported:
+            results = None
+        self._count("user_tasks", results is not None)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "lookups": {
+                name: {
+                    "started": started,
+                    "hits": self.hits[name],
+                    "misses": self.misses[name],
+                    "unused": self.unused[name],
+                    "failed": self.failed[name],
+                }
+                for name, started in self.started.items()
+            },
+        }
+
+
+prefetcher = Prefetcher(enabled=settings.PREFETCH_ENABLED, task_limit=settings.PREFETCH_TASK_LIMIT)
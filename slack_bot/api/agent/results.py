@@ -0,0 +1,191 @@
+import json
+from collections import Counter
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List
+
+from bson import ObjectId
+
+from slack_bot.api.agent.history import count_tokens
+from slack_bot.core.config import settings
+from slack_bot.core.metrics import metrics
+
+
+result_tokens = metrics.histogram(
+    "slack_bot_tool_result_tokens",
+    "Tokens of tool results returned to the model.",
+    labels=("tool",),
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+
+# Room left for the summary line above a partial row.
+PART_SUMMARY_TOKENS = 40
+
+
+def requests_field(pipeline: List[dict], field: str) -> bool:
+    """Whether a pipeline explicitly projects or references `field`, e.g. {"$project": {"transcription": 1}}."""
+
+    def references(value: Any) -> bool:
+        if isinstance(value, str):
+            return value == f"${field}" or value.startswith(f"${field}.")
+        if isinstance(value, dict):
+            return any(references(item) for item in value.values())
+        if isinstance(value, list):
+            return any(references(item) for item in value)
+        return False
+
+    for stage in pipeline:
+        for operator, spec in stage.items():
+            if operator in ("$project", "$addFields", "$set") and isinstance(spec, dict):
+                if spec.get(field) not in (None, 0, False):
+                    return True
+            if references(spec):
+                return True
+    return False
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        if value.time() == time(0):
+            return value.date().isoformat()
+        return value.replace(microsecond=0, tzinfo=None).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, list) and all(not isinstance(item, (dict, list)) for item in value):
+        return ", ".join(format_value(item) for item in value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=format_value, ensure_ascii=False, separators=(",", ":"))
+    return str(value).replace("\n", " ").replace("|", "/")
+
+
+def columns_of(docs: List[dict]) -> List[str]:
+    columns = {}
+    for doc in docs:
+        for key in doc:
+            columns.setdefault(key, None)
+    # Generated document ids are never shown to users and writes filter by fields, so they only cost
+    # tokens; an `_id` that is something else, e.g. a $group key, stays.
+    if "_id" in columns and all(isinstance(doc.get("_id"), ObjectId) for doc in docs):
+        columns.pop("_id")
+    return list(columns)
+
+
+class ToolResultShaper:
+    """Turns read results into compact tables the model can afford.
+
+    Reads are paged with `$skip`/`$limit`, bulky fields are projected out
+    unless the pipeline asks for them, and rows are added until the token
+    budget is spent. A truncated result ends with the `cursor` to pass to
+    continue from the first row that was left out. A row too big for the
+    budget on its own is returned alone with its `page_field` (e.g. a whole
+    transcript) in budget-sized parts, continued with `cursor` and `offset`.
+    """
+
+    def __init__(self, token_budget: int = 1500, max_rows: int = 50):
+        self.token_budget = token_budget
+        self.max_rows = max_rows
+        self.calls: Counter = Counter()
+        self.tokens: Counter = Counter()
+        self.max_tokens: Dict[str, int] = {}
+        self.truncated: Counter = Counter()
+
+    def pipeline(self, query: dict | List[dict], cursor: int = 0, exclude: Iterable[str] = ()) -> List[dict]:
+        pipeline = list(query) if isinstance(query, list) else [query]
+        excluded = [field for field in exclude if not requests_field(pipeline, field)]
+        if excluded:
+            pipeline.append({"$project": {field: 0 for field in excluded}})
+        if cursor:
+            pipeline.append({"$skip": cursor})
+        # One row more than a page tells whether there is a next page.
+        pipeline.append({"$limit": self.max_rows + 1})
+        return pipeline
+
+    def format(self, tool_name: str, docs: List[dict], cursor: int = 0, page_field: str | None = None,
+               offset: int = 0) -> str:
+        has_more = len(docs) > self.max_rows
+        docs = docs[:self.max_rows]
+        columns = columns_of(docs)
+        header = " | ".join(columns)
+        if page_field in columns and offset:
+            return self.format_part(tool_name, docs, columns, header, cursor, page_field, offset, has_more)
+        rows = []
+        used = count_tokens(header)
+        for doc in docs:
+            row = " | ".join(format_value(doc.get(column)) for column in columns)
+            tokens = count_tokens(row)
+            if used + tokens > self.token_budget:
+                if not rows and page_field in columns:
+                    return self.format_part(tool_name, docs, columns, header, cursor, page_field, 0, has_more)
+                if not rows:
+                    # A single oversized row is cut rather than dropped.
+                    row = row[:max(0, self.token_budget - used) * 4] + "…"
+                    rows.append(row)
+                has_more = True
+                break
+            used += tokens
+            rows.append(row)
+
+        first, last = cursor + 1, cursor + len(rows)
+        summary = f"rows {first}-{last}"
+        if has_more:
+            summary += f", more available: call again with cursor={last}"
+        result = "\n".join([summary, header, *rows])
+        self.record(tool_name, count_tokens(result), has_more)
+        return result
+
+    def format_part(self, tool_name: str, docs: List[dict], columns: List[str], header: str, cursor: int,
+                    page_field: str, offset: int, has_more: bool) -> str:
+        """The first row alone, with the part of `page_field` from `offset` that fits the budget."""
+        doc = docs[0]
+        text = format_value(doc.get(page_field))
+        others = " | ".join("" if column == page_field else format_value(doc.get(column)) for column in columns)
+        available = max(0, self.token_budget - count_tokens(header) - count_tokens(others) - PART_SUMMARY_TOKENS)
+        end = min(len(text), offset + available * 4)
+        while end > offset + 1 and count_tokens(text[offset:end]) > available:
+            end = offset + (end - offset) * 9 // 10
+        part = text[offset:end]
+        row = " | ".join(part if column == page_field else format_value(doc.get(column)) for column in columns)
+
+        summary = f"row {cursor + 1}, {page_field} characters {offset}-{end} of {len(text)}"
+        truncated = end < len(text) or has_more or len(docs) > 1
+        if end < len(text):
+            summary += f", more available: call again with cursor={cursor} and offset={end}"
+        elif truncated:
+            summary += f", more available: call again with cursor={cursor + 1}"
+        result = "\n".join([summary, header, row])
+        self.record(tool_name, count_tokens(result), truncated)
+        return result
+
+    def record(self, tool_name: str, tokens: int, truncated: bool) -> None:
+        self.calls[tool_name] += 1
+        self.tokens[tool_name] += tokens
+        self.max_tokens[tool_name] = max(tokens, self.max_tokens.get(tool_name, 0))
+        if truncated:
+            self.truncated[tool_name] += 1
+        result_tokens.observe(tokens, tool=tool_name)
+
+    def stats(self) -> dict:
+        return {
+            "token_budget": self.token_budget,
+            "max_rows": self.max_rows,
+            "tools": {
+                name: {
+                    "calls": calls,
+                    "avg_tokens": self.tokens[name] / calls,
+                    "max_tokens": self.max_tokens[name],
+                    "truncated": self.truncated[name],
+                }
+                for name, calls in self.calls.items()
+            },
+        }
+
+
+tool_results = ToolResultShaper(
+    token_budget=settings.TOOL_RESULT_TOKEN_BUDGET,
+    max_rows=settings.TOOL_RESULT_MAX_ROWS
+)
@@ -0,0 +1,132 @@
+import importlib
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from slack_bot.api.agent.usage import usage_tracker
+from slack_bot.core.config import settings
+
+
+@dataclass
+class Route:
+    agent_name: str
+    confidence: float
+    rule: str
+
+
+@dataclass
+class RouteRule:
+    agent_name: str
+    pattern: re.Pattern
+    confidence: float = 0.9
+
+    def match(self, text: str) -> Route | None:
+        if self.pattern.search(text):
+            return Route(agent_name=self.agent_name, confidence=self.confidence, rule=self.pattern.pattern)
+        return None
+
+
+def rule(agent_name: str, pattern: str, confidence: float = 0.9) -> RouteRule:
+    return RouteRule(agent_name=agent_name, pattern=re.compile(pattern, re.IGNORECASE), confidence=confidence)
+
+
+DEFAULT_RULES = [
+    rule('MongoDBAgent', r"\b(show|list|what are|what's|get)\b.{0,40}\btasks?\b"),
+    rule('MongoDBAgent', r"\b(my|open|active|overdue|current)\s+tasks?\b"),
+    rule('DocsAgent', r"\b(list|show|browse|available|how many)\b.{0,30}\b(documents?|docs|files)\b"),
+    rule('DocsAgent', r"\b(send|give|share|find|get)\b.{0,20}\b(the\s+)?(document|doc)\b"),
+    rule('MongoDBTranscriptionAgent', r"\b(transcriptions?|transcripts?|call reports?)\b"),
+]
+# Email and RAG requests are too varied for a keyword to pick the agent reliably, so they
+# are never dispatched directly. Mentioning them sends a request to the supervisor even if
+# a rule above matched, e.g. "list my tasks and email them to Anna".
+SUPERVISOR_PATTERNS = [
+    re.compile(r"\b(e-?mails?|remind(er)?s?)\b", re.IGNORECASE),
+    re.compile(r"\b(sops?|policy|policies|kpis?|strategy)\b", re.IGNORECASE),
+]
+
+
+class PreRouter:
+    """Dispatches obvious single-intent requests straight to a sub-agent.
+
+    Keyword rules (and an optional classifier) vote for agents. A request is
+    routed only when exactly one agent matched with at least `threshold`
+    confidence and no `supervisor_patterns` matched; everything else goes
+    through the supervisor.
+    """
+
+    def __init__(
+            self,
+            rules: List[RouteRule],
+            classifier: Callable[[str], Route | None] | None = None,
+            threshold: float = 0.8,
+            supervisor_patterns: List[re.Pattern] | None = None
+    ):
+        self.rules = rules
+        self.supervisor_patterns = supervisor_patterns or []
+        self.classifier = classifier
+        self.threshold = threshold
+        self.requests = 0
+        self.hits: Dict[str, int] = {}
+        self.fallbacks = 0
+        self.fast_path_latency = 0.0
+        self.supervisor_latency = 0.0
+
+    def route(self, text: str) -> Route | None:
+        self.requests += 1
+        if any(pattern.search(text) for pattern in self.supervisor_patterns):
+            self.fallbacks += 1
+            return None
+        matches: Dict[str, Route] = {}
+        for route_rule in self.rules:
+            route = route_rule.match(text)
+            if route and (route.agent_name not in matches or route.confidence > matches[route.agent_name].confidence):
+                matches[route.agent_name] = route
+        if self.classifier and not matches:
+            route = self.classifier(text)
+            if route:
+                matches[route.agent_name] = route
+
+        if len(matches) == 1:
+            route = next(iter(matches.values()))
+            if route.confidence >= self.threshold:
+                self.hits[route.agent_name] = self.hits.get(route.agent_name, 0) + 1
+                return route
+        self.fallbacks += 1
+        return None
+
+    def record(self, route: Route | None, latency: float) -> None:
+        if route:
+            self.fast_path_latency += latency
+        else:
+            self.supervisor_latency += latency
+
+    def stats(self) -> dict:
+        hits = sum(self.hits.values())
+        # A fast-path run skips the supervisor's routing call and its final rewrite.
+        supervisor_call = usage_tracker.avg_latency('supervisor')
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "hit_rate": hits / self.requests if self.requests else None,
+            "fallbacks": self.fallbacks,
+            "avg_fast_path_latency": self.fast_path_latency / hits if hits else None,
+            "avg_supervisor_latency": self.supervisor_latency / self.fallbacks if self.fallbacks else None,
+            "latency_saved_estimate": 2 * supervisor_call * hits if supervisor_call else None,
+        }
+
+
+def load_classifier(path: str | None) -> Callable[[str], Route | None] | None:
+    """Load an optional classifier given as `module:attribute`."""
+    if not path:
+        return None
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+pre_router = PreRouter(
+    DEFAULT_RULES,
+    classifier=load_classifier(settings.PRE_ROUTER_CLASSIFIER),
+    threshold=settings.PRE_ROUTER_THRESHOLD,
+    supervisor_patterns=SUPERVISOR_PATTERNS
+)
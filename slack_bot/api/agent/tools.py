@@ -3,12 +3,15 @@ from typing import List, Literal
 
 from langchain_community.tools import tool
 
+from slack_bot.api.agent.cache import response_cache
+from slack_bot.api.agent.prefetch import prefetcher
+from slack_bot.api.agent.results import tool_results
 from slack_bot.api.agent.utils import normalize_deadline_field, send_verification_email
 from slack_bot.api.google.utils import find_doc_by_name, list_doc_names_range
 from slack_bot.api.responses.responses import generate_answer
-from slack_bot.api.slack.utils import get_channel_users, get_user_info
 from slack_bot.api.user.model import SlackUserModel
 from slack_bot.core.config import settings
+from slack_bot.core.tracing import report_error
 
 
 @tool
@@ -21,10 +24,10 @@ async def get_document_tool(document_title: str) -> str | None:
         str | None - A URL link to the document if found, otherwise None.
     """
     try:
-        document = find_doc_by_name(document_title)
+        document = await asyncio.to_thread(find_doc_by_name, document_title)
         return document
     except Exception as e:
-        print(f"[get_document_tool] Error: {e}")
+        report_error("get_document_tool", e)
         return None
 
 
@@ -43,18 +46,15 @@ async def get_document_names_tool(start: int = 1, end: int = 10, return_count_on
                                 or None if an error occurs.
     """
     try:
-        docs = list_doc_names_range(start=start, end=end, return_count_only=return_count_only)
+        docs = await asyncio.to_thread(
+            list_doc_names_range, start=start, end=end, return_count_only=return_count_only
+        )
         return docs
     except Exception as e:
-        print(f"[get_document_names_tool] Error: {e}")
+        report_error("get_document_names_tool", e)
         return None
 
 
-async def process_profile(user_id, semaphore):
-    async with semaphore:
-        return await asyncio.to_thread(get_user_info, user_id)
-
-
 @tool
 async def get_slack_users_tool(channel_id: str) -> List[SlackUserModel] | None:
     """Fetch Slack user profiles from a given channel.
@@ -65,14 +65,9 @@ async def get_slack_users_tool(channel_id: str) -> List[SlackUserModel] | None:
         List[SlackUserModel] | None - A list of Slack user profiles in the channel, or None if failed.
     """
     try:
-        user_ids = get_channel_users(channel_id)
-        semaphore = asyncio.Semaphore(10)
-        profiles = await asyncio.gather(
-            *[process_profile(user_id, semaphore) for user_id in user_ids]
-        )
-        return [profile for profile in profiles if profile]
+        return await prefetcher.channel_roster(channel_id)
     except Exception as e:
-        print(f"[get_slack_users_tool] Error: {e}")
+        report_error("get_slack_users_tool", e)
         return None
 
 
@@ -86,15 +81,19 @@ async def get_slack_user_tool(user_id: str) -> SlackUserModel | None:
         SlackUserModel | None - The user's profile object if found, otherwise None.
     """
     try:
-        user = get_user_info(user_id)
+        user = await prefetcher.user_profile(user_id)
         return user
     except Exception as e:
-        print(f"[get_slack_user_tool] Error: {e}")
+        report_error("get_slack_user_tool", e)
         return None
 
 
 @tool
-async def query_mongo_tool(query: dict | list[dict], type_query: Literal["read", "insert", "update", "delete", "delete_many"]):
+async def query_mongo_tool(
+        query: dict | list[dict],
+        type_query: Literal["read", "insert", "update", "delete", "delete_many"],
+        cursor: int = 0
+):
     """
     Perform an operation on the MongoDB 'tasks' collection.
 
@@ -114,12 +113,18 @@ async def query_mongo_tool(query: dict | list[dict], type_query: Literal["read",
             - For "delete_many": a MongoDB filter (dict) to match multiple tasks to delete
 
         type_query (Literal): Type of the operation — one of "read", "insert", "update", "delete", "delete_many".
+        cursor (int): For "read" only — the cursor given by a previous result that said more rows are available.
 
     Returns:
-        Any: Result of the query or a confirmation message.
+        Any: For "read", a table with a header row and one " | "-separated row per document; otherwise a
+        confirmation message.
     """
+    write = type_query != "read"
     try:
         normalize_deadline_field(query)
+        if write:
+            response_cache.invalidate("tasks")
+            prefetcher.discard("user_tasks")
 
         if type_query == "delete":
             await settings.DB_CLIENT.tasks.delete_one(query)
@@ -134,18 +139,31 @@ async def query_mongo_tool(query: dict | list[dict], type_query: Literal["read",
             await settings.DB_CLIENT.tasks.update_one(query["filter"], query["update"])
             return "Task updated"
         elif type_query == "read":
-            cursor = settings.DB_CLIENT.tasks.aggregate(query)
-            results = await cursor.to_list(length=50)
+            pipeline = tool_results.pipeline(query, cursor)
+            results = await prefetcher.read_tasks(pipeline)
+            if results is None:
+                results = await settings.DB_CLIENT.tasks.aggregate(pipeline).to_list(None)
             if not results:
-                return "This employee has no tasks"
-            return results
+                return "No more tasks" if cursor else "This employee has no tasks"
+            return tool_results.format("query_mongo_tool", results, cursor)
     except Exception as e:
-        print(f"[query_mongo_tool] Error: {e}")
+        report_error("query_mongo_tool", e)
         return None
+    finally:
+        # Again once the write is done: a run that started reading mid-write must not be cached either.
+        if write:
+            response_cache.invalidate("tasks")
+            prefetcher.discard("user_tasks")
 
 
 @tool
-async def query_mongo_transcription_tool(query: dict | list[dict], type_query: Literal["read", "delete", "delete_many"]):
+async def query_mongo_transcription_tool(
+        query: dict | list[dict],
+        type_query: Literal["read", "delete", "delete_many"],
+        cursor: int = 0,
+        include_transcription: bool = False,
+        offset: int = 0
+):
     """
     Perform an operation on the MongoDB 'transcriptions' collection.
 
@@ -156,12 +174,22 @@ async def query_mongo_transcription_tool(query: dict | list[dict], type_query: L
             - For "delete_many": a MongoDB filter (dict) to match multiple transcriptions to delete
 
         type_query (Literal): Type of the operation — one of "read", "delete", "delete_many".
+        cursor (int): For "read" only — the cursor given by a previous result that said more rows are available.
+        include_transcription (bool): For "read" only — also return the full `transcription` text. Only set it
+            when the user asks for what was said; the `summary` is enough otherwise. A long transcription is
+            returned in parts, one call per part.
+        offset (int): For "read" with include_transcription only — where to continue inside a transcription, as
+            given by a previous result together with `cursor`.
 
     Returns:
-        Any: Result of the query or a confirmation message.
+        Any: For "read", a table with a header row and one " | "-separated row per document; otherwise a
+        confirmation message.
     """
+    write = type_query != "read"
     try:
         normalize_deadline_field(query)
+        if write:
+            response_cache.invalidate("transcriptions")
 
         if type_query == "delete":
             await settings.DB_CLIENT.transcriptions.delete_one(query)
@@ -170,14 +198,20 @@ async def query_mongo_transcription_tool(query: dict | list[dict], type_query: L
             result = await settings.DB_CLIENT.transcriptions.delete_many(query)
             return f"{result.deleted_count} transcription(s) deleted"
         elif type_query == "read":
-            cursor = settings.DB_CLIENT.transcriptions.aggregate(query)
-            results = await cursor.to_list(length=50)
+            pipeline = tool_results.pipeline(query, cursor, exclude=() if include_transcription else ("transcription",))
+            results = await settings.DB_CLIENT.transcriptions.aggregate(pipeline).to_list(None)
             if not results:
-                return "No one transcription found"
-            return results
+                return "No more transcriptions" if cursor else "No one transcription found"
+            return tool_results.format(
+                "query_mongo_transcription_tool", results, cursor,
+                page_field="transcription" if include_transcription else None, offset=offset
+            )
     except Exception as e:
-        print(f"[query_mongo_transcription_tool] Error: {e}")
+        report_error("query_mongo_transcription_tool", e)
         return None
+    finally:
+        if write:
+            response_cache.invalidate("transcriptions")
 
 
 @tool
@@ -193,14 +227,14 @@ async def send_email_tool(emails: List[str], content: List[str]) -> None:
     """
     try:
         if len(emails) != len(content):
-            print("The number of emails must match the number of content entries.")
+            report_error("send_email_tool", "the number of emails must match the number of content entries")
 
         await asyncio.gather(*[
             send_verification_email(email, message)
             for email, message in zip(emails, content)
         ])
     except Exception as e:
-        print(f"[send_email_tool] Error: {e}")
+        report_error("send_email_tool", e)
 
 
 @tool
@@ -218,5 +252,5 @@ async def query_vector_store_tool(query: str) -> str:
         answer = await generate_answer(query)
         return answer
     except Exception as e:
-        print(f"[query_vector_store_tool] Error: {e}")
+        report_error("query_vector_store_tool", e)
 
@@ -0,0 +1,257 @@
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.errors import GraphBubbleUp
+
+from slack_bot.core.metrics import metrics
+from slack_bot.core.tracing import Span
+
+
+llm_cost = metrics.counter(
+    "slack_bot_llm_cost_usd_total",
+    "Estimated OpenAI spend by agent and model.",
+    labels=("agent", "model"),
+)
+
+# USD per million input, cached input and output tokens.
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+
+def model_cost(model: str | None, usage: dict) -> float | None:
+    """Estimated cost of one call; dated snapshots like gpt-4.1-mini-2025-04-14 use their base model's price."""
+    if not model:
+        return None
+    known = [name for name in MODEL_PRICES if model == name or model.startswith(f"{name}-")]
+    if not known:
+        return None
+    input_price, cached_price, output_price = MODEL_PRICES[max(known, key=len)]
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    return (
+        (usage.get("input_tokens", 0) - cached) * input_price
+        + cached * cached_price
+        + usage.get("output_tokens", 0) * output_price
+    ) / 1_000_000
+
+
+@dataclass
+class AgentUsage:
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    latency: float = 0.0
+    cost: float = 0.0
+    model: str | None = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def avg_latency(self) -> float | None:
+        return self.latency / self.calls if self.calls else None
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else None
+
+    @property
+    def avg_cost(self) -> float | None:
+        return self.cost / self.calls if self.calls else None
+
+    def add(self, usage: dict, latency: float = 0.0, model: str | None = None) -> None:
+        self.calls += 1
+        self.latency += latency
+        self.model = model or self.model
+        self.cost += model_cost(model, usage) or 0.0
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+        self.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+
+class UsageTracker:
+    """Process-wide token usage, latency and estimated cost per agent, including prompt-cache hits."""
+
+    def __init__(self):
+        self.agents: Dict[str, AgentUsage] = {}
+
+    def record(self, agent_name: str, usage: dict, latency: float = 0.0, model: str | None = None) -> None:
+        self.agents.setdefault(agent_name, AgentUsage()).add(usage, latency, model)
+        cost = model_cost(model, usage)
+        if cost is not None:
+            llm_cost.inc(cost, agent=agent_name, model=model)
+
+    def avg_latency(self, agent_name: str) -> float | None:
+        usage = self.agents.get(agent_name)
+        return usage.avg_latency if usage else None
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                **asdict(usage),
+                "avg_latency": usage.avg_latency,
+                "avg_cost": usage.avg_cost,
+                "cache_hit_ratio": usage.cache_hit_ratio,
+            }
+            for name, usage in self.agents.items()
+        }
+
+
+usage_tracker = UsageTracker()
+
+
+class AnswerPathTracker:
+    """End-to-end latency per answer path: supervisor rewrite, direct sub-agent answer or pre-router fast path."""
+
+    def __init__(self):
+        self.paths: Dict[str, AgentUsage] = {}
+
+    def record(self, path: str, latency: float) -> None:
+        usage = self.paths.setdefault(path, AgentUsage())
+        usage.calls += 1
+        usage.latency += latency
+
+    def stats(self) -> dict:
+        stats = {
+            path: {"requests": usage.calls, "avg_latency": usage.avg_latency}
+            for path, usage in self.paths.items()
+        }
+        # Every direct answer skips one supervisor call.
+        direct = self.paths.get("direct")
+        supervisor_call = usage_tracker.avg_latency("supervisor")
+        stats["latency_saved_estimate"] = direct.calls * supervisor_call if direct and supervisor_call else None
+        return stats
+
+
+answer_paths = AnswerPathTracker()
+
+
+def agent_name_from_metadata(metadata: dict | None) -> str:
+    metadata = metadata or {}
+    if metadata.get("agent_name"):
+        return metadata["agent_name"]
+    namespace = metadata.get("langgraph_checkpoint_ns", "")
+    return namespace.split(":")[0] or metadata.get("langgraph_node") or "unknown"
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Sums the tokens reported by every chat model call of one agent run.
+
+    Usage is attributed to the agent that made the call and also recorded
+    in the process-wide `usage_tracker`.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracker: UsageTracker | None = usage_tracker):
+        self.tracker = tracker
+        self.total = AgentUsage()
+        self.agents: Dict[str, AgentUsage] = {}
+        self._run_agents: Dict[UUID, Tuple[str, str | None, float]] = {}
+
+    @property
+    def calls(self) -> int:
+        return self.total.calls
+
+    @property
+    def total_tokens(self) -> int:
+        return self.total.total_tokens
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, metadata: dict | None = None,
+                            **kwargs: Any) -> None:
+        model = (metadata or {}).get("ls_model_name")
+        self._run_agents[run_id] = (agent_name_from_metadata(metadata), model, time.monotonic())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        agent_name, model, started = self._run_agents.pop(run_id, ("unknown", None, time.monotonic()))
+        latency = time.monotonic() - started
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                self.total.add(usage, latency, model)
+                self.agents.setdefault(agent_name, AgentUsage()).add(usage, latency, model)
+                if self.tracker is not None:
+                    self.tracker.record(agent_name, usage, latency, model)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns one agent run's callbacks into spans: sub-agent hops, LLM calls and tool calls.
+
+    Runs in between (graph internals, prompts, parsers) are not traced, but
+    are followed so every span gets its nearest traced ancestor as parent.
+    """
+
+    run_inline = True
+
+    def __init__(self, root: Span, agent_names: Iterable[str] = ()):
+        self.root = root
+        self.agent_names = set(agent_names)
+        self._parents: Dict[UUID, UUID | None] = {}
+        self._spans: Dict[UUID, Span] = {}
+
+    def _parent_span(self, parent_run_id: UUID | None) -> Span:
+        while parent_run_id is not None:
+            if parent_run_id in self._spans:
+                return self._spans[parent_run_id]
+            parent_run_id = self._parents.get(parent_run_id)
+        return self.root
+
+    def _start(self, run_id: UUID, parent_run_id: UUID | None, kind: str | None, name: str, **attributes) -> None:
+        self._parents[run_id] = parent_run_id
+        if not kind:
+            return
+        parent = self._parent_span(parent_run_id)
+        # A compiled agent runs as a graph node of the same name; trace the pair once.
+        if kind == "agent" and parent.kind == "agent" and parent.name == name:
+            return
+        self._spans[run_id] = Span(kind, name, parent, **attributes)
+
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> None:
+        self._parents.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            # Handoffs leave an agent by raising a Command to the parent graph; that is not a failure.
+            span.end(None if isinstance(error, GraphBubbleUp) else error)
+
+    def on_chain_start(self, serialized: dict, inputs: Any, *, run_id: UUID, parent_run_id: UUID | None = None,
+                       **kwargs: Any) -> None:
+        name = kwargs.get("name") or ""
+        self._start(run_id, parent_run_id, "agent" if name in self.agent_names else None, name)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID,
+                            parent_run_id: UUID | None = None, metadata: dict | None = None, **kwargs: Any) -> None:
+        self._start(run_id, parent_run_id, "llm", agent_name_from_metadata(metadata))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized: dict, input_str: str, *, run_id: UUID, parent_run_id: UUID | None = None,
+                      **kwargs: Any) -> None:
+        self._start(run_id, parent_run_id, "tool", serialized.get("name") or kwargs.get("name", ""))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
@@ -1,8 +1,15 @@
 import asyncio
 
-import httpx
+from slack_bot.core.http import http_clients
 
-from slack_bot.core.config import settings
+
+def message_text(content: str | list) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") for part in content
+        if isinstance(part, dict) and part.get("type") == "text"
+    )
 
 
 def normalize_deadline_field(d):
@@ -18,27 +25,21 @@ def normalize_deadline_field(d):
 
 
 async def send_verification_email(email: str, content: str) -> None:
-    async with httpx.AsyncClient(timeout=httpx.Timeout(timeout=15)) as client:
-        response = await client.post(
-            "https://api.brevo.com/v3/smtp/email",
-            headers={
-                "accept": "application/json",
-                "api-key": settings.BREVO_API_KEY,
-                "content-type": "application/json"
+    response = await http_clients.get("brevo").post(
+        "/smtp/email",
+        json={
+            "sender": {
+                "email": "security@marscapita.com",
+                "name": "MarsCAPITA"
             },
-            json={
-                "sender": {
-                    "email": "security@marscapita.com",
-                    "name": "MarsCAPITA"
-                },
-                "to": [
-                    {
-                        "email": email,
-                    }
-                ],
-                "subject": "Reminder",
-                "textContent": content
-            }
-        )
-        response.raise_for_status()
-
+            "to": [
+                {
+                    "email": email,
+                }
+            ],
+            "subject": "Reminder",
+            "textContent": content
+        },
+        timeout=15
+    )
+    response.raise_for_status()
@@ -2,12 +2,15 @@ from typing import Dict, List
 
 from langchain.prompts import PromptTemplate
 
+from slack_bot.api.agent.usage import TokenUsageHandler
 from slack_bot.api.fireflies.prompt import transcription_prompts
 
 from slack_bot.core.config import settings
 
 
-chat = settings.LLM_MINI
+SUMMARY_NAME = "FirefliesSummary"
+
+chat = settings.llm(SUMMARY_NAME)
 
 claude_prompt = PromptTemplate(
     template=transcription_prompts.prompt,
@@ -17,5 +20,8 @@ claude_prompt = PromptTemplate(
 chain = claude_prompt | chat
 
 async def generate_transcription_summary(transcription: List[Dict[str, str]]) -> str:
-    response = await chain.ainvoke({"transcription": transcription})
+    response = await chain.ainvoke(
+        {"transcription": transcription},
+        config={"callbacks": [TokenUsageHandler()], "metadata": {"agent_name": SUMMARY_NAME}}
+    )
     return response.content[0]["text"]
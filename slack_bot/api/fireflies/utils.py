@@ -1,44 +1,38 @@
 import asyncio
 from datetime import datetime
 
-import httpx
-
 from slack_bot.api.fireflies.model import TranscriptionModel
 from slack_bot.api.slack.utils import post_message
-from slack_bot.core.config import settings
+from slack_bot.core.http import http_clients
 
 
 async def get_call_transcription(transcription_id: str):
-    async with httpx.AsyncClient(timeout=httpx.Timeout(timeout=20)) as client:
-        query = '''
-            query Transcript($transcriptId: String!) {
-              transcript(id: $transcriptId) {
-                title
-                dateString
-                user {
-                  email
-                  name
-                }
-                duration
-                video_url
-                audio_url
-                sentences {
-                  speaker_name
-                  text
-                }
-              }
+    query = '''
+        query Transcript($transcriptId: String!) {
+          transcript(id: $transcriptId) {
+            title
+            dateString
+            user {
+              email
+              name
+            }
+            duration
+            video_url
+            audio_url
+            sentences {
+              speaker_name
+              text
             }
-            '''
-        data = {
-            'query': query,
-            'variables': {'transcriptId': transcription_id}
+          }
         }
-        response = await client.post("https://api.fireflies.ai/graphql",
-                                     json=data,
-                                     headers={"Authorization": f"Bearer {settings.FIREFLIES_TOKEN}",
-                                                "Content-Type": "application/json"})
-        response.raise_for_status()
-        response = response.json()
+        '''
+    data = {
+        'query': query,
+        'variables': {'transcriptId': transcription_id}
+    }
+    response = await http_clients.get("fireflies").post("/graphql", json=data, timeout=20)
+    response.raise_for_status()
+    response = response.json()
 
     return response['data']['transcript']
 
@@ -96,13 +90,7 @@ async def delete_call_transcription(transcription_id: str):
         'variables': {'transcriptId': transcription_id}
     }
 
-    headers = {
-        "Authorization": f"Bearer {settings.FIREFLIES_TOKEN}",
-        "Content-Type": "application/json"
-    }
-
-    async with httpx.AsyncClient(timeout=20) as client:
-        await client.post("https://api.fireflies.ai/graphql", json=data, headers=headers)
+    await http_clients.get("fireflies").post("/graphql", json=data, timeout=20)
 
 
 async def post_call_transcripton(transcription: TranscriptionModel):
@@ -7,6 +7,7 @@ from slack_bot.api.fireflies.db_requests import add_transcription_obj
 from slack_bot.api.fireflies.summary import generate_transcription_summary
 from slack_bot.api.fireflies.utils import get_call_transcription, parse_conversation, delete_call_transcription, \
     post_call_transcripton
+from slack_bot.core.admission import Priority, llm_priority
 
 
 @fireflies_router.post("/call/report")
@@ -17,6 +18,7 @@ async def add_transcription(
     transcription_id = payload['meetingId']
     transcription_data = await get_call_transcription(transcription_id)
     transcription_model = parse_conversation(transcription_data)
-    summary = await generate_transcription_summary(transcription_model.transcription)
+    with llm_priority(Priority.BACKGROUND):
+        summary = await generate_transcription_summary(transcription_model.transcription)
     transcription_model = await add_transcription_obj(transcription_model, summary)
     await post_call_transcripton(transcription_model)
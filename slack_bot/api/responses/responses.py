@@ -11,13 +11,18 @@ async def generate_answer(
     query: str,
 ) -> str | bool:
     prompt = responses_prompts.prompt.format(query=query)
-    response = await settings.OPENAI_CLIENT.responses.create(
-        model="gpt-4o-mini",
-        input=prompt,
-        tools=[{
-            "type": "file_search",
-            "vector_store_ids": [settings.VECTOR_STORE_ID]
-        }]
+    # Retries on 429 are left to the shared admission controller.
+    client = settings.OPENAI_CLIENT.with_options(max_retries=0)
+    response = await settings.LLM_ADMISSION.call(
+        lambda: client.responses.create(
+            model="gpt-4o-mini",
+            input=prompt,
+            tools=[{
+                "type": "file_search",
+                "vector_store_ids": [settings.VECTOR_STORE_ID]
+            }]
+        ),
+        tokens=len(prompt) // 4 + settings.LLM_FILE_SEARCH_TOKENS_ESTIMATE
     )
     return response.output_text
 
@@ -0,0 +1,133 @@
+import asyncio
+import copy
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from slack_bot.core.tracing import report_error
+
+
+def is_user_message(event: dict) -> bool:
+    return (
+        event.get("type") == "message" and
+        "subtype" not in event and
+        "bot_id" not in event
+    )
+
+
+@dataclass
+class PendingMessages:
+    key: str
+    bodies: List[dict] = field(default_factory=list)
+    first_at: float = field(default_factory=time.monotonic)
+    timer: asyncio.TimerHandle | None = None
+
+
+class MessageCoalescer:
+    """Debounces consecutive messages of one user in one channel.
+
+    Messages are held until the user has been quiet for `window` seconds (but
+    never longer than `max_wait` after the first one) and are then submitted
+    as a single event whose text is the messages joined by newlines.
+
+    Held messages were already acknowledged to Slack. If the queue is full
+    when they are flushed, `on_drop` gets their bodies so their dedup leases
+    can be released and Slack's retries are handled instead of suppressed.
+    """
+
+    def __init__(
+            self,
+            submit: Callable[[str, dict], Awaitable[bool]],
+            window: float = 0,
+            max_wait: float = 0,
+            on_drop: Callable[[List[dict]], Awaitable[None]] | None = None
+    ):
+        self.submit = submit
+        self.on_drop = on_drop
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self._pending: Dict[Tuple[str, str], PendingMessages] = {}
+        self._flushes: set[asyncio.Task] = set()
+        self.received = 0
+        self.submitted = 0
+        self.merged = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    async def add(self, key: str, body: dict) -> bool:
+        event = body.get("event", {})
+        if not self.enabled or not is_user_message(event):
+            return await self.submit(key, body)
+
+        self.received += 1
+        pending_key = (key, event.get("user"))
+        pending = self._pending.get(pending_key)
+        if pending is None:
+            pending = self._pending[pending_key] = PendingMessages(key=key)
+        pending.bodies.append(body)
+
+        if pending.timer:
+            pending.timer.cancel()
+        delay = min(self.window, pending.first_at + self.max_wait - time.monotonic())
+        pending.timer = asyncio.get_running_loop().call_later(
+            max(delay, 0), self._schedule_flush, pending_key
+        )
+        return True
+
+    def _schedule_flush(self, pending_key: Tuple[str, str]) -> None:
+        pending = self._pending.pop(pending_key, None)
+        if pending is None:
+            return
+        task = asyncio.create_task(self._flush(pending))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, pending: PendingMessages) -> None:
+        body = merge_message_bodies(pending.bodies)
+        self.submitted += 1
+        self.merged += len(pending.bodies) - 1
+        if await self.submit(pending.key, body):
+            return
+        self.dropped += len(pending.bodies)
+        report_error(
+            "MessageCoalescer", f"event queue is full, dropped {len(pending.bodies)} message(s) for {pending.key}"
+        )
+        if self.on_drop is not None:
+            try:
+                await self.on_drop(pending.bodies)
+            except Exception as e:
+                report_error("MessageCoalescer", e)
+
+    async def stop(self) -> None:
+        for pending_key in list(self._pending):
+            self._pending[pending_key].timer.cancel()
+            self._schedule_flush(pending_key)
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "window": self.window,
+            "max_wait": self.max_wait,
+            "pending": sum(len(pending.bodies) for pending in self._pending.values()),
+            "received": self.received,
+            "submitted": self.submitted,
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
+
+
+def merge_message_bodies(bodies: List[dict]) -> dict:
+    if len(bodies) == 1:
+        return bodies[0]
+    merged = copy.deepcopy(bodies[-1])
+    merged["event"]["text"] = "\n".join(
+        body["event"].get("text", "") for body in bodies if body["event"].get("text")
+    )
+    merged["coalesced_event_ids"] = [body.get("event_id") for body in bodies]
+    merged["run_versions"] = {
+        ts: version for body in bodies for ts, version in body.get("run_versions", {}).items()
+    }
+    return merged
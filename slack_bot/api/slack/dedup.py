@@ -0,0 +1,128 @@
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Tuple
+
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from slack_bot.core.config import settings
+
+
+INDEX_OPTIONS_CONFLICT = 85
+
+
+class EventDedupStore(ABC):
+    """Records which Slack event ids are already being handled.
+
+    `acquire` returns True only for the first caller of an event id within
+    the TTL, so retries delivered to any worker or pod are dropped.
+    """
+
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self.acquired = 0
+        self.duplicates = 0
+        self.retries = 0
+
+    async def setup(self) -> None:
+        pass
+
+    async def acquire(self, event_id: str, retry_num: int = 0) -> bool:
+        if retry_num:
+            self.retries += 1
+        acquired = await self._acquire(event_id)
+        if acquired:
+            self.acquired += 1
+        else:
+            self.duplicates += 1
+        return acquired
+
+    @abstractmethod
+    async def release(self, event_id: str) -> None:
+        """Forget an event id so a retry of it is handled again."""
+
+    @abstractmethod
+    async def _acquire(self, event_id: str) -> bool:
+        """Record the event id; False if it is already recorded and not expired."""
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.__class__.__name__,
+            "ttl": self.ttl,
+            "acquired": self.acquired,
+            "duplicates": self.duplicates,
+            "retries": self.retries,
+        }
+
+
+class MemoryDedupStore(EventDedupStore):
+    """Single-process store: ids expire in insertion order, no timers."""
+
+    def __init__(self, ttl: int = 300):
+        super().__init__(ttl)
+        self._expires: Dict[str, float] = {}
+        self._order: Deque[Tuple[float, str]] = deque()
+
+    def _purge(self, now: float) -> None:
+        while self._order and self._order[0][0] <= now:
+            expires_at, event_id = self._order.popleft()
+            if self._expires.get(event_id) == expires_at:
+                del self._expires[event_id]
+
+    async def _acquire(self, event_id: str) -> bool:
+        now = time.monotonic()
+        self._purge(now)
+        if event_id in self._expires:
+            return False
+        expires_at = now + self.ttl
+        self._expires[event_id] = expires_at
+        self._order.append((expires_at, event_id))
+        return True
+
+    async def release(self, event_id: str) -> None:
+        self._expires.pop(event_id, None)
+
+
+class MongoDedupStore(EventDedupStore):
+    """Shared store: the event id is the document `_id`, a TTL index expires it."""
+
+    def __init__(self, ttl: int = 300, collection_name: str = "event_leases"):
+        super().__init__(ttl)
+        self.collection = settings.DB_CLIENT[collection_name]
+
+    async def setup(self) -> None:
+        try:
+            await self.collection.create_index("createdAt", expireAfterSeconds=self.ttl)
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            # The index exists with a different TTL: EVENT_DEDUP_TTL changed since it was created.
+            await self.collection.database.command(
+                "collMod", self.collection.name,
+                index={"keyPattern": {"createdAt": 1}, "expireAfterSeconds": self.ttl}
+            )
+
+    async def _acquire(self, event_id: str) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.insert_one({"_id": event_id, "createdAt": now})
+            return True
+        except DuplicateKeyError:
+            # The TTL monitor only runs once a minute, so take over stale leases ourselves.
+            result = await self.collection.update_one(
+                {"_id": event_id, "createdAt": {"$lt": now - timedelta(seconds=self.ttl)}},
+                {"$set": {"createdAt": now}}
+            )
+            return result.modified_count == 1
+
+    async def release(self, event_id: str) -> None:
+        await self.collection.delete_one({"_id": event_id})
+
+
+def get_dedup_store() -> EventDedupStore:
+    stores = {
+        "memory": MemoryDedupStore,
+        "mongo": MongoDedupStore,
+    }
+    return stores[settings.EVENT_DEDUP_BACKEND](ttl=settings.EVENT_DEDUP_TTL)
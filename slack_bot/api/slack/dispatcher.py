@@ -0,0 +1,200 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Tuple
+
+import httpx
+
+from slack_bot.api.slack.scheduler import percentile
+from slack_bot.core.http import http_clients
+from slack_bot.core.tracing import report_error
+
+
+@dataclass
+class OutboundCall:
+    method: str
+    payload: dict
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """Split text into ordered chunks, preferring paragraph, then line, then word breaks."""
+    chunks = []
+    while len(text) > max_chars:
+        window = text[:max_chars]
+        # A break at 0 would give an empty chunk, which Slack rejects with no_text.
+        cut = next((cut for cut in map(window.rfind, ("\n\n", "\n", " ")) if cut > 0), max_chars)
+        chunk = text[:cut].rstrip()
+        if chunk:
+            chunks.append(chunk)
+        text = text[cut:].lstrip()
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+
+class SlackDispatcher:
+    """Outbound Slack Web API calls, queued per channel.
+
+    Each channel gets its own FIFO worker that keeps at most one call per
+    `min_interval` seconds (Slack allows about one message per second per
+    channel), waits out `Retry-After` on 429 responses and retries.
+
+    Text over `max_chars` is split over several messages. The overflow
+    messages are remembered per first message, so later updates of it
+    (streamed answers) edit them in place and only post chunks that are new.
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_retries: int = 3, max_chars: int = 3500, samples: int = 1000,
+                 max_tracked: int = 1000):
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.max_chars = max_chars
+        self.max_tracked = max_tracked
+        self._queues: Dict[str, Deque[OutboundCall]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._paused_until: Dict[str, float] = {}
+        # (channel, ts of the first message) -> ts of its overflow messages, in order.
+        self._overflow: OrderedDict[Tuple[str, str], List[str]] = OrderedDict()
+        self._overflow_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._latencies: Deque[float] = deque(maxlen=samples)
+        self.delivered = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.chunked = 0
+        self.superseded_updates = 0
+
+    async def call(self, method: str, payload: dict) -> dict:
+        channel = payload["channel"]
+        queue = self._queues.setdefault(channel, deque())
+
+        if method == "chat.update":
+            for pending in queue:
+                if pending.method == method and pending.payload.get("ts") == payload.get("ts"):
+                    pending.payload = payload
+                    self.superseded_updates += 1
+                    return await asyncio.shield(pending.future)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append(OutboundCall(method=method, payload=payload, future=future))
+        worker = self._workers.get(channel)
+        if worker is None or worker.done():
+            self._workers[channel] = asyncio.create_task(self._worker(channel))
+        return await asyncio.shield(future)
+
+    def _track_overflow(self, channel: str, ts: str | None, overflow: List[str]) -> None:
+        if ts is None:
+            return
+        key = (channel, ts)
+        if not overflow:
+            self._overflow.pop(key, None)
+            return
+        self._overflow[key] = overflow
+        self._overflow.move_to_end(key)
+        while len(self._overflow) > self.max_tracked:
+            self._overflow_locks.pop(self._overflow.popitem(last=False)[0], None)
+
+    async def _post_chunks(self, channel: str, chunks: List[str]) -> List[str | None]:
+        results = await asyncio.gather(*[
+            self.call("chat.postMessage", {"channel": channel, "text": chunk}) for chunk in chunks
+        ])
+        return [result.get("ts") for result in results]
+
+    async def post_message(self, channel: str, text: str) -> str | None:
+        chunks = split_text(text, self.max_chars)
+        if len(chunks) > 1:
+            self.chunked += 1
+        ts, *overflow = await self._post_chunks(channel, chunks)
+        self._track_overflow(channel, ts, [item for item in overflow if item])
+        return ts
+
+    async def update_message(self, channel: str, ts: str, text: str) -> None:
+        first, *rest = split_text(text, self.max_chars)
+        if rest:
+            self.chunked += 1
+        key = (channel, ts)
+        async with self._overflow_locks.setdefault(key, asyncio.Lock()):
+            overflow = self._overflow.get(key, [])
+            kept, extra = overflow[:len(rest)], overflow[len(rest):]
+            results = await asyncio.gather(
+                self.call("chat.update", {"channel": channel, "ts": ts, "text": first}),
+                *[self.call("chat.update", {"channel": channel, "ts": item, "text": chunk})
+                  for item, chunk in zip(kept, rest)],
+                self._post_chunks(channel, rest[len(kept):]),
+                *[self.call("chat.delete", {"channel": channel, "ts": item}) for item in extra]
+            )
+            posted = results[1 + len(kept)]
+            self._track_overflow(channel, ts, kept + [item for item in posted if item])
+
+    async def delete_message(self, channel: str, ts: str) -> None:
+        overflow = self._overflow.pop((channel, ts), [])
+        self._overflow_locks.pop((channel, ts), None)
+        await asyncio.gather(*[
+            self.call("chat.delete", {"channel": channel, "ts": item}) for item in [ts, *overflow]
+        ])
+
+    async def _worker(self, channel: str) -> None:
+        queue = self._queues[channel]
+        while queue:
+            item = queue[0]
+            wait = max(
+                self._last_sent.get(channel, 0) + self.min_interval,
+                self._paused_until.get(channel, 0)
+            ) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            queue.popleft()
+            try:
+                result = await self._send(channel, item)
+                self.delivered += 1
+                self._latencies.append(time.monotonic() - item.enqueued_at)
+                item.future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+                report_error("SlackDispatcher", f"{item.method} to {channel} failed: {e}")
+                item.future.set_result({"ok": False, "error": str(e)})
+        self._queues.pop(channel, None)
+        self._workers.pop(channel, None)
+
+    async def _send(self, channel: str, item: OutboundCall) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self._last_sent[channel] = time.monotonic()
+            response = await http_clients.get("slack").post(item.method, json=item.payload)
+            if response.status_code == 429:
+                self.rate_limited += 1
+                retry_after = float(response.headers.get("Retry-After", 1))
+                # chat.postMessage limits are per channel; other channels keep going.
+                self._paused_until[channel] = max(self._paused_until.get(channel, 0), time.monotonic() + retry_after)
+                await asyncio.sleep(retry_after)
+                continue
+            response.raise_for_status()
+            result = response.json()
+            if not result.get("ok"):
+                raise httpx.HTTPError(result.get("error", "unknown_error"))
+            return result
+        raise httpx.HTTPError(f"rate limited after {self.max_retries} retries")
+
+    async def stop(self) -> None:
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    def stats(self) -> dict:
+        latencies = list(self._latencies)
+        return {
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "channels": len(self._queues),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "chunked": self.chunked,
+            "superseded_updates": self.superseded_updates,
+            "latency": {
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+            },
+        }
@@ -0,0 +1,199 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from slack_bot.api.agent.usage import TokenUsageHandler
+
+
+RunKey = Tuple[str, str]
+
+
+@dataclass
+class AgentRun:
+    channel_id: str
+    user_id: str
+    text: str
+    versions: Dict[str, int]
+    usage: TokenUsageHandler = field(default_factory=TokenUsageHandler)
+    task: asyncio.Task | None = None
+
+
+class RunRegistry:
+    """Tracks agent runs per (channel, message ts) so they can be superseded.
+
+    Every incoming message gets a version. Editing or deleting the message
+    bumps the version, which cancels the run if it is in flight, or makes it
+    skip itself when it is still waiting in the queue.
+
+    Messages answered by one run (coalesced messages, superseded follow-ups)
+    are linked into a group, and each message's text is kept, so editing or
+    deleting one of them reruns the group with the others' texts intact.
+    """
+
+    def __init__(self, supersede_follow_ups: bool = False, max_tracked: int = 10000):
+        self.supersede_follow_ups = supersede_follow_ups
+        self.max_tracked = max_tracked
+        self._versions: OrderedDict[RunKey, int] = OrderedDict()
+        self._runs: Dict[RunKey, AgentRun] = {}
+        self._texts: Dict[RunKey, str] = {}
+        self._groups: Dict[RunKey, Tuple[str, ...]] = {}
+        self._deleted: set = set()
+
+        self.completed = 0
+        self.completed_tokens = 0
+        self.cancelled = 0
+        self.skipped = 0
+        self.cancelled_tokens_spent = 0
+        self.tokens_saved = 0
+
+    def track(self, channel_id: str, ts: str, text: str | None = None) -> int:
+        key = (channel_id, ts)
+        version = self._versions.get(key, -1) + 1
+        self._versions[key] = version
+        self._versions.move_to_end(key)
+        if text is not None:
+            self._texts[key] = text
+        while len(self._versions) > self.max_tracked:
+            self._forget(self._versions.popitem(last=False)[0])
+        return version
+
+    def _forget(self, key: RunKey) -> None:
+        self._versions.pop(key, None)
+        self._texts.pop(key, None)
+        self._groups.pop(key, None)
+        self._deleted.discard(key)
+
+    def link(self, channel_id: str, timestamps: List[str]) -> None:
+        """Record that these messages are answered together, in this order."""
+        if len(timestamps) > 1:
+            for ts in timestamps:
+                self._groups[(channel_id, ts)] = tuple(timestamps)
+
+    def is_tracked(self, channel_id: str, ts: str) -> bool:
+        return (channel_id, ts) in self._versions
+
+    def supersede(self, channel_id: str, ts: str) -> int | None:
+        key = (channel_id, ts)
+        if key not in self._versions:
+            return None
+        version = self.track(channel_id, ts)
+        run = self._runs.get(key)
+        if run and run.task and not run.task.done():
+            run.task.cancel()
+        return version
+
+    def supersede_run(self, run: AgentRun) -> Dict[str, int]:
+        """Supersede every message of a run; returns their new versions, for the run that replaces it."""
+        versions = {}
+        for ts in run.versions:
+            version = self.supersede(run.channel_id, ts)
+            if version is not None:
+                versions[ts] = version
+        return versions
+
+    def supersede_message(self, channel_id: str, ts: str, text: str | None) -> Tuple[str, Dict[str, int]] | None:
+        """Supersede the run answering an edited (`text`) or deleted (None) message.
+
+        Returns the text and versions of the run that replaces it: the
+        group's messages in order, with the edit applied or the deleted
+        message left out. None if the message is not tracked or nothing is
+        left to answer.
+        """
+        key = (channel_id, ts)
+        if key not in self._versions:
+            return None
+        members = [member for member in self._groups.get(key, (ts,)) if (channel_id, member) in self._versions]
+        versions = {member: self.supersede(channel_id, member) for member in members}
+        if text is None:
+            # The deleted message keeps its bumped version until the old run has finished or skipped itself.
+            members.remove(ts)
+            self._texts.pop(key, None)
+            self._groups.pop(key, None)
+            self._deleted.add(key)
+        else:
+            self._texts[key] = text
+        if not members:
+            return None
+        self.link(channel_id, members)
+        texts = [self._texts.get((channel_id, member)) for member in members]
+        return "\n".join(text for text in texts if text), {member: versions[member] for member in members}
+
+    def find_user_run(self, channel_id: str, user_id: str) -> AgentRun | None:
+        for run in self._runs.values():
+            if run.channel_id == channel_id and run.user_id == user_id:
+                return run
+        return None
+
+    def _is_current(self, channel_id: str, versions: Dict[str, int]) -> bool:
+        return all(
+            self._versions.get((channel_id, ts), version) == version
+            for ts, version in versions.items()
+        )
+
+    async def run(
+            self,
+            channel_id: str,
+            user_id: str,
+            text: str,
+            versions: Dict[str, int],
+            agent_run: Callable[[AgentRun], Awaitable[str]]
+    ) -> str | None:
+        if not self._is_current(channel_id, versions):
+            self._forget_deleted(channel_id, versions)
+            self.skipped += 1
+            self.tokens_saved += self._avg_tokens()
+            return None
+
+        run = AgentRun(channel_id=channel_id, user_id=user_id, text=text, versions=versions)
+        run.task = asyncio.create_task(agent_run(run))
+        for ts in versions:
+            self._runs[(channel_id, ts)] = run
+        try:
+            await asyncio.wait({run.task})
+        finally:
+            if not run.task.done():
+                run.task.cancel()
+            self._finish(run)
+
+        if run.task.cancelled():
+            self._record_cancelled(run)
+            return None
+        self.completed += 1
+        self.completed_tokens += run.usage.total_tokens
+        return run.task.result()
+
+    def _finish(self, run: AgentRun) -> None:
+        for ts, version in run.versions.items():
+            key = (run.channel_id, ts)
+            if self._runs.get(key) is run:
+                del self._runs[key]
+            if self._versions.get(key) == version:
+                self._forget(key)
+        self._forget_deleted(run.channel_id, run.versions)
+
+    def _forget_deleted(self, channel_id: str, versions: Dict[str, int]) -> None:
+        for ts in versions:
+            if (channel_id, ts) in self._deleted:
+                self._forget((channel_id, ts))
+
+    def _avg_tokens(self) -> int:
+        return self.completed_tokens // self.completed if self.completed else 0
+
+    def _record_cancelled(self, run: AgentRun) -> None:
+        self.cancelled += 1
+        spent = run.usage.total_tokens
+        self.cancelled_tokens_spent += spent
+        self.tokens_saved += max(self._avg_tokens() - spent, 0)
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._versions),
+            "in_flight": len({id(run) for run in self._runs.values()}),
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "skipped": self.skipped,
+            "avg_tokens_per_run": self._avg_tokens(),
+            "cancelled_tokens_spent": self.cancelled_tokens_spent,
+            "tokens_saved_estimate": self.tokens_saved,
+        }
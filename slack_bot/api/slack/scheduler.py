@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Set
+
+from slack_bot.core.tracing import report_error
+
+
+@dataclass
+class QueuedEvent:
+    key: str
+    body: dict
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def percentile(samples: List[float], q: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class EventScheduler:
+    """Bounded worker pool for Slack events.
+
+    Events are queued per key (channel), a key is processed by at most one
+    worker at a time in FIFO order, and workers pick keys round-robin so one
+    busy channel cannot starve the others.
+    """
+
+    def __init__(
+            self,
+            handler: Callable[[dict], Awaitable[None]],
+            workers: int = 8,
+            max_queue_size: int = 1000,
+            samples: int = 1000
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+
+        self._queues: Dict[str, Deque[QueuedEvent]] = {}
+        self._ready: Deque[str] = deque()
+        self._active: Set[str] = set()
+        self._size = 0
+        self._condition: asyncio.Condition | None = None
+        self._tasks: List[asyncio.Task] = []
+
+        self._wait_times: Deque[float] = deque(maxlen=samples)
+        self._run_times: Deque[float] = deque(maxlen=samples)
+        self._submitted = 0
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_depth = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._condition = asyncio.Condition()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"slack-event-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, key: str, body: dict) -> bool:
+        if self._size >= self.max_queue_size:
+            self._rejected += 1
+            return False
+        if not self._tasks:
+            self.start()
+
+        async with self._condition:
+            self._queues.setdefault(key, deque()).append(QueuedEvent(key=key, body=body))
+            self._size += 1
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, self._size)
+            if key not in self._active and key not in self._ready:
+                self._ready.append(key)
+                self._condition.notify()
+        return True
+
+    async def _next(self) -> QueuedEvent:
+        async with self._condition:
+            await self._condition.wait_for(lambda: bool(self._ready))
+            key = self._ready.popleft()
+            self._active.add(key)
+            item = self._queues[key].popleft()
+            self._size -= 1
+            return item
+
+    async def _release(self, key: str) -> None:
+        async with self._condition:
+            self._active.discard(key)
+            if self._queues.get(key):
+                self._ready.append(key)
+                self._condition.notify()
+            else:
+                self._queues.pop(key, None)
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._next()
+            started = time.monotonic()
+            self._wait_times.append(started - item.enqueued_at)
+            try:
+                await self.handler(item.body)
+                self._processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                report_error("EventScheduler", f"while processing event for {item.key}: {e}")
+            finally:
+                self._run_times.append(time.monotonic() - started)
+                await self._release(item.key)
+
+    def stats(self) -> dict:
+        wait_times = list(self._wait_times)
+        run_times = list(self._run_times)
+        return {
+            "workers": self.workers,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": self._size,
+            "max_queue_depth": self._max_depth,
+            "active_channels": len(self._active),
+            "waiting_channels": len(self._ready),
+            "channel_depths": {key: len(queue) for key, queue in self._queues.items() if queue},
+            "submitted": self._submitted,
+            "processed": self._processed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "wait_time": {
+                "p50": percentile(wait_times, 0.5),
+                "p95": percentile(wait_times, 0.95),
+                "p99": percentile(wait_times, 0.99),
+            },
+            "run_time": {
+                "p50": percentile(run_times, 0.5),
+                "p95": percentile(run_times, 0.95),
+                "p99": percentile(run_times, 0.99),
+            },
+        }
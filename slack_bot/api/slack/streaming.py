@@ -0,0 +1,73 @@
+import time
+
+from slack_bot.api.agent.agent import AgentUpdate
+from slack_bot.api.slack.utils import post_message, update_message, delete_message
+
+
+ERROR_TEXT = "_Sorry, something went wrong while answering. Please try again._"
+
+
+class SlackMessageStream:
+    """Shows an agent answer while it is generated.
+
+    Posts a placeholder right away and edits it with `chat.update`, at most
+    once per `min_interval` seconds, until the final answer is written. A
+    run that fails replaces the message with an error, and a final update
+    without text removes it, so no placeholder or partial answer is left.
+    """
+
+    def __init__(self, channel_id: str, min_interval: float = 1.0, placeholder: str = "_Thinking…_"):
+        self.channel_id = channel_id
+        self.min_interval = min_interval
+        self.placeholder = placeholder
+        self.ts: str | None = None
+        self._last_text = placeholder
+        self._last_update = 0.0
+        self.started_at: float | None = None
+        self.first_update_at: float | None = None
+        self.updates = 0
+
+    async def start(self) -> None:
+        self.started_at = time.monotonic()
+        self.ts = await post_message(self.channel_id, self.placeholder)
+        self._last_update = time.monotonic()
+
+    @staticmethod
+    def render(update: AgentUpdate) -> str:
+        if update.final or not update.status:
+            return update.text
+        if update.text:
+            return f"{update.text}\n_{update.status}…_"
+        return f"_{update.status}…_"
+
+    async def update(self, update: AgentUpdate) -> None:
+        text = self.render(update)
+        if update.final and not text:
+            await self.discard()
+            return
+        if not text or text == self._last_text:
+            return
+        now = time.monotonic()
+        if not update.final and now - self._last_update < self.min_interval:
+            return
+        if self.ts is None:
+            self.ts = await post_message(self.channel_id, text)
+        else:
+            await update_message(self.channel_id, self.ts, text)
+        self._last_text = text
+        self._last_update = now
+        self.updates += 1
+        if self.first_update_at is None:
+            self.first_update_at = now
+
+    async def fail(self, text: str = ERROR_TEXT) -> None:
+        if self.ts is None:
+            self.ts = await post_message(self.channel_id, text)
+        else:
+            await update_message(self.channel_id, self.ts, text)
+        self._last_text = text
+
+    async def discard(self) -> None:
+        if self.ts is not None:
+            await delete_message(self.channel_id, self.ts)
+            self.ts = None
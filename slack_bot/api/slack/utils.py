@@ -1,57 +1,270 @@
-from typing import List
+import asyncio
+import time
+from typing import Dict, List, Tuple
 
-import httpx
-from slack import WebClient
+from slack import AsyncWebClient
 from slack.errors import SlackApiError
 
+from slack_bot.api.slack.dispatcher import SlackDispatcher
 from slack_bot.api.user.model import SlackUserModel
 from slack_bot.core.config import settings
+from slack_bot.core.tracing import report_error
 
 
-slack_client = WebClient(token=settings.SLACK_BOT_TOKEN)
+slack_client = AsyncWebClient(token=settings.SLACK_BOT_TOKEN, base_url=settings.SLACK_API_URL)
 
 
-async def post_message(channel, text):
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            "https://slack.com/api/chat.postMessage",
-            headers={"Authorization": f"Bearer {settings.SLACK_BOT_TOKEN}"},
-            json={"channel": channel, "text": text}
-        )
+slack_dispatcher = SlackDispatcher(
+    min_interval=settings.SLACK_CHANNEL_POST_INTERVAL,
+    max_chars=settings.SLACK_MESSAGE_MAX_CHARS
+)
 
 
-def get_user_info(user_id: str) -> SlackUserModel | None:
-    try:
-        response = slack_client.users_info(user=user_id)
-        user_info = response["user"]
-        if not user_info['is_bot']:
-            user_profile_info = user_info['profile']
-            name = user_profile_info["first_name"] + " " + user_profile_info["last_name"]
-            email = user_profile_info["email"]
-            user = SlackUserModel(
-                position=user_profile_info["title"],
-                name=name,
-                email=email,
-                employee_id=user_id
-            )
-            return user
+async def post_message(channel, text) -> str | None:
+    return await slack_dispatcher.post_message(channel, text)
+
+
+async def update_message(channel: str, ts: str, text: str) -> None:
+    await slack_dispatcher.update_message(channel, ts, text)
+
+
+async def delete_message(channel: str, ts: str) -> None:
+    await slack_dispatcher.delete_message(channel, ts)
+
+
+def parse_user_profile(user_info: dict) -> SlackUserModel | None:
+    if user_info.get('is_bot') or user_info.get('deleted'):
         return None
+    user_profile_info = user_info.get('profile', {})
+    name = f"{user_profile_info.get('first_name', '')} {user_profile_info.get('last_name', '')}".strip()
+    return SlackUserModel(
+        position=user_profile_info.get("title"),
+        name=name or user_info.get("real_name") or user_info.get("name", ""),
+        email=user_profile_info.get("email"),
+        employee_id=user_info["id"]
+    )
+
+
+class UserProfileCache:
+    """In-memory Slack profile cache.
+
+    Filled in bulk from paginated `users.list`, refreshed in the background
+    and updated from `user_change` / `team_join` events. Bots, deleted users
+    and ids Slack does not know are cached as None so they are not looked up
+    again either. Lookups of many uncached ids trigger at most one bulk
+    refresh per `min_refresh_interval`; ids that `users.list` does not
+    return are looked up one by one instead.
+    """
+
+    def __init__(self, ttl: float = 3600, refresh_interval: float = 900, bulk_threshold: int = 10,
+                 min_refresh_interval: float = 60):
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.bulk_threshold = bulk_threshold
+        self.min_refresh_interval = min_refresh_interval
+        self._profiles: Dict[str, Tuple[float, SlackUserModel | None]] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_started: float | None = None
+        self._task: asyncio.Task | None = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refreshes_skipped = 0
+        self.last_refresh: float | None = None
+
+    def contains(self, user_id: str) -> bool:
+        entry = self._profiles.get(user_id)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def get(self, user_id: str) -> Tuple[bool, SlackUserModel | None]:
+        if not self.contains(user_id):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, self._profiles[user_id][1]
+
+    def set(self, user_id: str, profile: SlackUserModel | None) -> None:
+        self._profiles[user_id] = (time.monotonic() + self.ttl, profile)
+
+    def update(self, user_info: dict) -> None:
+        self.set(user_info["id"], parse_user_profile(user_info))
+
+    def invalidate(self, user_id: str) -> None:
+        self._profiles.pop(user_id, None)
+
+    async def refresh(self) -> None:
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return
+        async with self._refresh_lock:
+            self._refresh_started = time.monotonic()
+            cursor = None
+            while True:
+                response = await slack_client.users_list(limit=200, cursor=cursor)
+                for user_info in response["members"]:
+                    self.update(user_info)
+                cursor = response.get('response_metadata', {}).get('next_cursor')
+                if not cursor:
+                    break
+            self.refreshes += 1
+            self.last_refresh = time.time()
+
+    async def refresh_for(self, user_ids: List[str]) -> None:
+        """Bulk-refresh if more than `bulk_threshold` of these ids are uncached and no refresh started recently."""
+        missing = [user_id for user_id in user_ids if not self.contains(user_id)]
+        if len(missing) <= self.bulk_threshold:
+            return
+        if self._refresh_started is not None and time.monotonic() - self._refresh_started < self.min_refresh_interval:
+            self.refreshes_skipped += 1
+            return
+        await self.refresh()
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except SlackApiError as e:
+                report_error("UserProfileCache", f"cannot refresh user profiles: {e.response['error']}")
+            except Exception as e:
+                # Network errors or a malformed response must not stop refreshing for the life of the process.
+                report_error("UserProfileCache", f"cannot refresh user profiles: {e!r}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever(), name="slack-user-cache-refresh")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._profiles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refreshes_skipped": self.refreshes_skipped,
+            "last_refresh": self.last_refresh,
+        }
+
+
+user_profile_cache = UserProfileCache(
+    ttl=settings.USER_CACHE_TTL,
+    refresh_interval=settings.USER_CACHE_REFRESH_INTERVAL,
+    min_refresh_interval=settings.USER_CACHE_MIN_REFRESH_INTERVAL
+)
+
+
+async def get_user_info(user_id: str) -> SlackUserModel | None:
+    found, user = user_profile_cache.get(user_id)
+    if found:
+        return user
+    try:
+        response = await slack_client.users_info(user=user_id)
+        user = parse_user_profile(response["user"])
+        user_profile_cache.set(user_id, user)
+        return user
     except SlackApiError as e:
-        print(f"Error while retrieving user info: {e.response['error']}")
+        if e.response['error'] == 'user_not_found':
+            user_profile_cache.set(user_id, None)
+        report_error("get_user_info", f"cannot retrieve user info: {e.response['error']}")
 
 
-def get_channel_users(channel_id: str) -> List[str]:
+async def get_users_info(user_ids: List[str]) -> List[SlackUserModel | None]:
     try:
-        members = []
-        cursor = None
-        while True:
-            response = slack_client.conversations_members(channel=channel_id, cursor=cursor)
-            members.extend(response['members'])
-            cursor = response.get('response_metadata', {}).get('next_cursor')
-            if not cursor:
-                break
-        return members
+        await user_profile_cache.refresh_for(user_ids)
     except SlackApiError as e:
-        print(f"Error while retrieving channel participants: {e.response['error']}")
+        report_error("get_users_info", f"cannot refresh user profiles: {e.response['error']}")
+
+    semaphore = asyncio.Semaphore(10)
+
+    async def process_profile(user_id: str) -> SlackUserModel | None:
+        async with semaphore:
+            return await get_user_info(user_id)
+
+    return await asyncio.gather(*[process_profile(user_id) for user_id in user_ids])
+
+
+class ChannelMembersCache:
+    """Per-channel member lists.
+
+    Each channel is fetched once via `conversations.members`, then kept
+    current from `member_joined_channel` / `member_left_channel` events. The
+    TTL is only a safety net for missed events.
+    """
+
+    def __init__(self, ttl: float = 86400):
+        self.ttl = ttl
+        self._members: Dict[str, Tuple[float, Dict[str, None]]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, channel_id: str) -> List[str] | None:
+        entry = self._members.get(channel_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return list(entry[1])
 
+    def set(self, channel_id: str, members: List[str]) -> None:
+        self._members[channel_id] = (time.monotonic() + self.ttl, dict.fromkeys(members))
 
+    def member_joined(self, channel_id: str, user_id: str) -> None:
+        entry = self._members.get(channel_id)
+        if entry:
+            entry[1][user_id] = None
+
+    def member_left(self, channel_id: str, user_id: str) -> None:
+        entry = self._members.get(channel_id)
+        if entry:
+            entry[1].pop(user_id, None)
+
+    def invalidate(self, channel_id: str) -> None:
+        self._members.pop(channel_id, None)
+
+    async def get_or_fetch(self, channel_id: str) -> List[str]:
+        members = self.get(channel_id)
+        if members is not None:
+            self.hits += 1
+            return members
+        async with self._locks.setdefault(channel_id, asyncio.Lock()):
+            members = self.get(channel_id)
+            if members is not None:
+                self.hits += 1
+                return members
+            self.misses += 1
+            members = await fetch_channel_users(channel_id)
+            self.set(channel_id, members)
+            return members
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._members),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+channel_members_cache = ChannelMembersCache(ttl=settings.CHANNEL_CACHE_TTL)
+
+
+async def fetch_channel_users(channel_id: str) -> List[str]:
+    members = []
+    cursor = None
+    while True:
+        response = await slack_client.conversations_members(channel=channel_id, cursor=cursor)
+        members.extend(response['members'])
+        cursor = response.get('response_metadata', {}).get('next_cursor')
+        if not cursor:
+            break
+    return members
+
+
+async def get_channel_users(channel_id: str) -> List[str]:
+    try:
+        return await channel_members_cache.get_or_fetch(channel_id)
+    except SlackApiError as e:
+        report_error("get_channel_users", f"cannot retrieve channel participants: {e.response['error']}")
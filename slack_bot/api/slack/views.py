@@ -1,15 +1,39 @@
 import asyncio
 
-from fastapi import Request
+from fastapi import Request, HTTPException
+from fastapi.responses import JSONResponse
+
 from slack_bot.api.agent.agent import SlackAgent
-from slack_bot.api.agent.db_requests import get_last_3_messages, get_message_history
+from slack_bot.api.agent.cache import response_cache
+from slack_bot.api.agent.checkpoint import checkpointer
+from slack_bot.api.agent.fanout import fan_out_stats
+from slack_bot.api.agent.history import get_conversation_history, history_compactor
+from slack_bot.api.agent.prefetch import prefetcher
+from slack_bot.api.agent.results import tool_results
+from slack_bot.api.agent.router import pre_router
+from slack_bot.api.agent.usage import answer_paths, usage_tracker
 from slack_bot.api.slack import slack_router
-from slack_bot.api.slack.utils import post_message, get_user_info
-
-
+from slack_bot.api.slack.coalescer import MessageCoalescer, is_user_message
+from slack_bot.api.slack.dedup import get_dedup_store
+from slack_bot.api.slack.runs import RunRegistry, AgentRun
+from slack_bot.api.slack.scheduler import EventScheduler
+from slack_bot.api.slack.streaming import SlackMessageStream
+from slack_bot.api.slack.utils import (
+    post_message,
+    user_profile_cache,
+    channel_members_cache,
+    slack_dispatcher
+)
+from slack_bot.core.config import settings
+from slack_bot.core.http import http_clients
+from slack_bot.core.metrics import metrics
+from slack_bot.core.monitoring import loop_monitor
+from slack_bot.core.tracing import report_error, span
+
+
+MESSAGE_UPDATE_SUBTYPES = ("message_changed", "message_deleted")
+USER_UPDATE_EVENTS = ("user_change", "team_join")
 
-processed_event_ids = set()
-event_id_lock = asyncio.Lock()
 
 @slack_router.post('')
 async def slack_events(request: Request):
@@ -20,43 +44,191 @@ async def slack_events(request: Request):
 
 
     if body.get("type") == "event_callback":
-        asyncio.create_task(process_event(body))
+        event = body.get("event", {})
+        if event.get("type") in USER_UPDATE_EVENTS:
+            user_profile_cache.update(event["user"])
+            return {"ok": True}
+        if event.get("type") == "member_joined_channel":
+            channel_members_cache.member_joined(event["channel"], event["user"])
+            return {"ok": True}
+        if event.get("type") == "member_left_channel":
+            channel_members_cache.member_left(event["channel"], event["user"])
+            return {"ok": True}
+
+        event_id = body.get("event_id")
+        retry_num = int(request.headers.get("X-Slack-Retry-Num", 0))
+        if not await dedup_store.acquire(event_id, retry_num):
+            return JSONResponse({"ok": True}, headers={"X-Slack-No-Retry": "1"})
+
+        if event.get("type") == "message" and event.get("subtype") in MESSAGE_UPDATE_SUBTYPES:
+            body = supersede_message(body)
+            if body is None:
+                return {"ok": True}
+        elif is_user_message(event):
+            track_message(body)
+
+        key = body["event"].get("channel") or event_id
+        if not await message_coalescer.add(key, body):
+            await dedup_store.release(event_id)
+            raise HTTPException(status_code=503, detail="Event queue is full")
 
     return {"ok": True}
 
 
-async def process_event(body: dict):
+@slack_router.get('/stats')
+async def slack_events_stats():
+    return {
+        "scheduler": event_scheduler.stats(),
+        "dedup": dedup_store.stats(),
+        "coalescer": message_coalescer.stats(),
+        "runs": run_registry.stats(),
+        "loop": loop_monitor.stats(),
+        "user_cache": user_profile_cache.stats(),
+        "channel_cache": channel_members_cache.stats(),
+        "http": http_clients.stats(),
+        "outbound": slack_dispatcher.stats(),
+        "llm_usage": usage_tracker.stats(),
+        "llm_admission": settings.LLM_ADMISSION.stats(),
+        "router": pre_router.stats(),
+        "fan_out": fan_out_stats.stats(),
+        "answer_paths": answer_paths.stats(),
+        "response_cache": response_cache.stats(),
+        "history": history_compactor.stats(),
+        "tool_results": tool_results.stats(),
+        "prefetch": prefetcher.stats(),
+        "checkpointer": checkpointer.stats() if settings.CHECKPOINTER_ENABLED else None,
+    }
+
+
+def track_message(body: dict) -> None:
+    event = body["event"]
+    channel_id = event.get("channel")
+    text = event.get("text", "")
+    versions = {}
+    if run_registry.supersede_follow_ups:
+        run = run_registry.find_user_run(channel_id, event.get("user"))
+        if run:
+            # The follow-up's run takes over the superseded messages, so it also untracks them when it finishes.
+            versions = run_registry.supersede_run(run)
+            event["text"] = f"{run.text}\n{text}"
+    versions[event.get("ts")] = run_registry.track(channel_id, event.get("ts"), text)
+    run_registry.link(channel_id, list(versions))
+    body["run_versions"] = versions
+
+
+def supersede_message(body: dict) -> dict | None:
     event = body["event"]
-    event_id = body.get("event_id")
+    channel_id = event.get("channel")
+    previous_message = event.get("previous_message", {})
+
+    if event["subtype"] == "message_deleted":
+        user_id = previous_message.get("user")
+        rerun = run_registry.supersede_message(channel_id, event.get("deleted_ts"), None)
+    else:
+        message = event.get("message", {})
+        if "bot_id" in message or message.get("text") == previous_message.get("text"):
+            return None
+        user_id = message.get("user")
+        rerun = run_registry.supersede_message(channel_id, message.get("ts"), message.get("text"))
+    if rerun is None:
+        return None
+
+    text, versions = rerun
+    return {
+        **body,
+        "event": {
+            "type": "message",
+            "channel": channel_id,
+            "user": user_id,
+            "text": text,
+            "ts": list(versions)[-1],
+        },
+        "run_versions": versions,
+    }
+
 
-    async with event_id_lock:
-        if event_id in processed_event_ids:
-            return
-        processed_event_ids.add(event_id)
+async def process_event(body: dict):
+    event = body["event"]
+    with span("event", event.get("type") or "unknown", channel_id=event.get("channel")):
+        await handle_event(body, event)
 
 
-    asyncio.create_task(remove_event_id_later(event_id))
-    if (
-            event.get("type") == "message" and
-            "subtype" not in event and
-            "bot_id" not in event
-    ):
+async def handle_event(body: dict, event: dict):
+    if is_user_message(event):
         user_msg = event.get("text")
         user_id = event.get("user")
-        user_info = get_user_info(user_id)
-        user_name = user_info.name
         channel_id = event.get("channel")
 
-        last_3_msg = get_last_3_messages(channel_id),
-        message_history = await get_message_history(channel_id)
-
-        agent = SlackAgent(channel_id, last_3_msg, message_history, user_id, user_name)
-        response = await agent.run(user_msg)
-        await post_message(channel_id, response)
-
-
-async def remove_event_id_later(event_id: str, delay: int = 300):
-    await asyncio.sleep(delay)
-    async with event_id_lock:
-        processed_event_ids.discard(event_id)
-
+        async def agent_run(run: AgentRun) -> str:
+            stream = None
+            if settings.SLACK_STREAMING:
+                stream = SlackMessageStream(channel_id, min_interval=settings.SLACK_STREAM_UPDATE_INTERVAL)
+                await stream.start()
+            try:
+                user_info, history = await asyncio.gather(
+                    prefetcher.user_profile(user_id),
+                    get_conversation_history(channel_id)
+                )
+                # A profile lookup that failed must not cost the user their answer.
+                user_name = user_info.name if user_info else user_id
+
+                agent = SlackAgent(channel_id, history, user_id, user_name)
+                if stream is None:
+                    response = await agent.run(run.text, callbacks=[run.usage])
+                    await post_message(channel_id, response)
+                    return response
+
+                async for update in agent.astream(run.text, callbacks=[run.usage]):
+                    await stream.update(update)
+                return update.text
+            except asyncio.CancelledError:
+                if stream is not None:
+                    await stream.discard()
+                raise
+            except Exception:
+                if stream is not None:
+                    try:
+                        await stream.fail()
+                    except Exception as e:
+                        report_error("SlackMessageStream", e)
+                raise
+
+        versions = body.get("run_versions", {})
+        # Warm the requester's profile, tasks and the channel roster while the supervisor routes.
+        with prefetcher.prefetch(channel_id, user_id):
+            await run_registry.run(channel_id, user_id, user_msg, versions, agent_run)
+
+
+event_scheduler = EventScheduler(
+    process_event,
+    workers=settings.EVENT_WORKERS,
+    max_queue_size=settings.EVENT_QUEUE_SIZE
+)
+run_registry = RunRegistry(supersede_follow_ups=settings.SUPERSEDE_FOLLOW_UPS)
+dedup_store = get_dedup_store()
+
+
+async def release_dropped(bodies: list) -> None:
+    """Let Slack's retries of dropped events through the dedup store again."""
+    await asyncio.gather(*[dedup_store.release(body["event_id"]) for body in bodies if body.get("event_id")])
+
+
+async def submit_event(key: str, body: dict) -> bool:
+    # Coalesced messages are answered by one run; an edit to any of them reruns all of them.
+    run_registry.link(body["event"].get("channel"), list(body.get("run_versions", {})))
+    return await event_scheduler.submit(key, body)
+
+
+message_coalescer = MessageCoalescer(
+    submit_event,
+    window=settings.MESSAGE_COALESCE_WINDOW,
+    max_wait=settings.MESSAGE_COALESCE_MAX_WAIT,
+    on_drop=release_dropped
+)
+
+metrics.gauge("slack_bot_event_queue_depth", "Slack events waiting for a worker.",
+              lambda: event_scheduler.stats()["queue_depth"])
+metrics.gauge("slack_bot_outbound_queued", "Slack messages waiting to be sent.",
+              lambda: slack_dispatcher.stats()["queued"])
+metrics.gauge("slack_bot_loop_max_lag_seconds", "Largest event loop lag seen.",
+              lambda: loop_monitor.stats()["max_lag"])
@@ -0,0 +1,312 @@
+import asyncio
+import heapq
+import random
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import count
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, TypeVar
+
+import openai
+from langchain_openai import ChatOpenAI
+from pydantic import Field
+
+from slack_bot.core.metrics import metrics
+
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+queue_wait = metrics.histogram(
+    "slack_bot_llm_queue_wait_seconds",
+    "Time OpenAI calls waited for admission.",
+    labels=("priority",),
+)
+throttled_total = metrics.counter(
+    "slack_bot_llm_throttled_total",
+    "OpenAI calls rejected with 429.",
+    labels=("priority",),
+)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Admit the block's OpenAI calls, and those of tasks it creates, in the given priority class."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+def used_tokens(result: Any) -> int | None:
+    """Total tokens reported by a LangChain result or chunk, or by an OpenAI SDK response."""
+    if getattr(result, "generations", None):
+        result = result.generations[0]
+    usage = getattr(getattr(result, "message", None), "usage_metadata", None)
+    if usage:
+        return usage.get("total_tokens")
+    return getattr(getattr(result, "usage", None), "total_tokens", None)
+
+
+def retry_after(error: openai.RateLimitError) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class TokenBucket:
+    """A per-minute budget that refills continuously. A rate of 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.per_minute, self.available + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.per_minute:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.per_minute) - self.available
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float) -> None:
+        """Spend `amount`; a negative amount refunds an over-estimate. The balance may go below zero."""
+        if self.per_minute:
+            self._refill()
+            self.available = min(self.per_minute, self.available - amount)
+
+
+@dataclass(order=True)
+class Waiter:
+    priority: Priority
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+class LLMAdmissionController:
+    """Shared gate in front of every OpenAI call.
+
+    Calls wait in one queue ordered by priority class, then arrival, and are
+    admitted while there is a free in-flight slot and room in the
+    requests-per-minute and (estimated) tokens-per-minute buckets. Background
+    calls get at most `background_max_in_flight` slots, so interactive calls
+    always find one. A 429 pauses all admissions for the Retry-After time (or
+    an exponential backoff) before the call is queued again, instead of every
+    client retrying on its own.
+    """
+
+    def __init__(
+            self,
+            max_in_flight: int = 16,
+            background_max_in_flight: int = 4,
+            tokens_per_minute: int = 0,
+            requests_per_minute: int = 0,
+            max_retries: int = 5,
+            backoff: float = 1.0,
+            max_backoff: float = 60.0
+    ):
+        self.max_in_flight = max_in_flight
+        self.background_max_in_flight = min(background_max_in_flight, max_in_flight)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._waiters: List[Waiter] = []
+        self._seq = count()
+        self._in_flight: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._cooldown_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._waits: Dict[Priority, Deque[float]] = {priority: deque(maxlen=1000) for priority in Priority}
+        self.admitted: Counter = Counter()
+        self.throttled: Counter = Counter()
+
+    def _limit(self, priority: Priority) -> int:
+        return self.max_in_flight if priority == Priority.INTERACTIVE else self.background_max_in_flight
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if sum(self._in_flight.values()) >= self.max_in_flight:
+                return
+            if self._in_flight[waiter.priority] >= self._limit(waiter.priority):
+                return
+            delay = max(
+                self._cooldown_until - time.monotonic(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(waiter.tokens)
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self._in_flight[waiter.priority] += 1
+            self.admitted[waiter.priority] += 1
+            wait = time.monotonic() - waiter.enqueued_at
+            self._waits[waiter.priority].append(wait)
+            queue_wait.observe(wait, priority=waiter.priority.name.lower())
+            waiter.future.set_result(None)
+
+    async def acquire(self, tokens: int, priority: Priority) -> Waiter:
+        waiter = Waiter(priority, next(self._seq), tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Admitted just before the caller was cancelled: hand the slot back.
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter)
+            else:
+                self._dispatch()
+            raise
+        return waiter
+
+    def release(self, waiter: Waiter, tokens: int | None = None) -> None:
+        self._in_flight[waiter.priority] -= 1
+        if tokens is not None:
+            self.tokens.take(tokens - waiter.tokens)
+        self._dispatch()
+
+    def _throttle(self, error: openai.RateLimitError, attempt: int, priority: Priority) -> None:
+        self.throttled[priority] += 1
+        throttled_total.inc(priority=priority.name.lower())
+        delay = retry_after(error) or min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1)
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    async def call(self, request: Callable[[], Awaitable[T]], tokens: int, priority: Priority | None = None) -> T:
+        priority = current_priority() if priority is None else priority
+        for attempt in count():
+            waiter = await self.acquire(tokens, priority)
+            try:
+                result = await request()
+            except openai.RateLimitError as e:
+                self.release(waiter)
+                if attempt >= self.max_retries:
+                    raise
+                self._throttle(e, attempt, priority)
+                continue
+            except BaseException:
+                self.release(waiter)
+                raise
+            self.release(waiter, used_tokens(result))
+            return result
+
+    async def stream(self, request: Callable[[], AsyncIterator[T]], tokens: int,
+                     priority: Priority | None = None) -> AsyncIterator[T]:
+        """Like `call` for streaming requests; a 429 is only retried before the first chunk."""
+        priority = current_priority() if priority is None else priority
+        for attempt in count():
+            waiter = await self.acquire(tokens, priority)
+            used = None
+            started = False
+            try:
+                async for chunk in request():
+                    started = True
+                    used = used_tokens(chunk) or used
+                    yield chunk
+            except openai.RateLimitError as e:
+                self.release(waiter)
+                if started or attempt >= self.max_retries:
+                    raise
+                self._throttle(e, attempt, priority)
+                continue
+            except BaseException:
+                self.release(waiter)
+                raise
+            self.release(waiter, used)
+            return
+
+    def stats(self) -> dict:
+        classes = {}
+        for priority in Priority:
+            waits = sorted(self._waits[priority])
+            classes[priority.name.lower()] = {
+                "in_flight": self._in_flight[priority],
+                "queued": sum(1 for waiter in self._waiters
+                              if waiter.priority == priority and not waiter.future.done()),
+                "admitted": self.admitted[priority],
+                "throttled": self.throttled[priority],
+                "wait_p50": waits[int(0.5 * (len(waits) - 1))] if waits else None,
+                "wait_p95": waits[int(0.95 * (len(waits) - 1))] if waits else None,
+            }
+        return {
+            "max_in_flight": self.max_in_flight,
+            "background_max_in_flight": self.background_max_in_flight,
+            "tokens_per_minute": self.tokens.per_minute,
+            "requests_per_minute": self.requests.per_minute,
+            "cooldown": max(0.0, self._cooldown_until - time.monotonic()),
+            "classes": classes,
+        }
+
+
+class AdmittedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose async calls are admitted by an LLMAdmissionController.
+
+    Create it with `max_retries=0` so 429s reach the controller instead of
+    being retried inside the OpenAI client.
+    """
+
+    admission: Any = Field(default=None, exclude=True)
+    output_tokens_estimate: int = 500
+
+    def _estimate_tokens(self, messages: list) -> int:
+        return sum(len(str(message.content)) for message in messages) // 4 + self.output_tokens_estimate
+
+    async def _agenerate(self, messages: list, stop=None, run_manager=None, **kwargs: Any):
+        request = super()._agenerate
+        if self.admission is None:
+            return await request(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return await self.admission.call(
+            lambda: request(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._estimate_tokens(messages)
+        )
+
+    async def _astream(self, messages: list, stop=None, run_manager=None, **kwargs: Any):
+        request = super()._astream
+        chunks = (
+            self.admission.stream(
+                lambda: request(messages, stop=stop, run_manager=run_manager, **kwargs),
+                self._estimate_tokens(messages)
+            )
+            if self.admission is not None
+            else request(messages, stop=stop, run_manager=run_manager, **kwargs)
+        )
+        async for chunk in chunks:
+            yield chunk
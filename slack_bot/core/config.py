@@ -1,16 +1,27 @@
 import os
 import pathlib
 from functools import lru_cache
-from langchain_openai import ChatOpenAI
+from typing import Dict, Iterable
 import motor.motor_asyncio
 from pymongo import MongoClient
 from openai import AsyncClient
 
 from dotenv import load_dotenv
 
+from slack_bot.core.admission import AdmittedChatOpenAI, LLMAdmissionController
+
 
 load_dotenv()
 
+
+def parse_agent_models(value: str) -> Dict[str, str]:
+    """`name=model,name=model` as a dict; spaces around names, models and commas are ignored."""
+    return {
+        name.strip(): model.strip()
+        for name, model in (item.split('=', 1) for item in value.split(',') if '=' in item)
+    }
+
+
 class BaseConfig:
     BASE_DIR: pathlib.Path = pathlib.Path(__file__).parent.parent.parent
     SLACK_BOT_TOKEN = os.getenv('SLACK_BOT_TOKEN')
@@ -29,13 +40,110 @@ class BaseConfig:
         "client_x509_cert_url": os.getenv("SERVICE_ACCOUNT_INFO_CLIENT_CERT_URL"),
         "universe_domain": os.getenv("SERVICE_ACCOUNT_INFO_UNIVERSE_DOMAIN"),
     }
-    LLM_MINI = ChatOpenAI(model="gpt-4.1-mini", temperature=0.3, use_responses_api=True)
+    LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', 16))
+    LLM_BACKGROUND_MAX_IN_FLIGHT = int(os.getenv('LLM_BACKGROUND_MAX_IN_FLIGHT', 4))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv('LLM_TOKENS_PER_MINUTE', 0))
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv('LLM_REQUESTS_PER_MINUTE', 0))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 5))
+    LLM_FILE_SEARCH_TOKENS_ESTIMATE = int(os.getenv('LLM_FILE_SEARCH_TOKENS_ESTIMATE', 4000))
+    LLM_ADMISSION = LLMAdmissionController(
+        max_in_flight=LLM_MAX_IN_FLIGHT,
+        background_max_in_flight=LLM_BACKGROUND_MAX_IN_FLIGHT,
+        tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        max_retries=LLM_MAX_RETRIES
+    )
+    LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4.1-mini')
+    LLM_TEMPERATURE = float(os.getenv('LLM_TEMPERATURE', 0.3))
+    # Agent or chain name -> model; anything not listed uses LLM_MODEL. For example, to route
+    # with a smaller model and keep a larger one for query building:
+    # supervisor=gpt-4.1-nano,DocsAgent=gpt-4.1-nano,EmailAgent=gpt-4.1-nano,MongoDBAgent=gpt-4.1
+    LLM_AGENT_MODELS = parse_agent_models(os.getenv('LLM_AGENT_MODELS', ''))
+    LLM_MINI = AdmittedChatOpenAI(
+        model=LLM_MODEL, temperature=LLM_TEMPERATURE, use_responses_api=True, max_retries=0, admission=LLM_ADMISSION
+    )
     DB_CLIENT = motor.motor_asyncio.AsyncIOMotorClient(os.getenv("MONGO_DB_URL")).slack
     MONGO_CLIENT = MongoClient(os.getenv('MONGO_DB_URL'))
     BREVO_API_KEY = os.getenv('BREVO_API_KEY')
     FIREFLIES_TOKEN = os.getenv('FIREFLIES_TOKEN')
     OPENAI_CLIENT = AsyncClient(api_key=os.getenv('OPENAI_API_KEY'))
     VECTOR_STORE_ID = os.getenv('VECTOR_STORE_ID')
+    EVENT_WORKERS = int(os.getenv('EVENT_WORKERS', 8))
+    EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', 1000))
+    EVENT_DEDUP_BACKEND = os.getenv('EVENT_DEDUP_BACKEND', 'mongo')
+    EVENT_DEDUP_TTL = int(os.getenv('EVENT_DEDUP_TTL', 300))
+    MESSAGE_COALESCE_WINDOW = float(os.getenv('MESSAGE_COALESCE_WINDOW', 0))
+    MESSAGE_COALESCE_MAX_WAIT = float(os.getenv('MESSAGE_COALESCE_MAX_WAIT', 5))
+    SUPERSEDE_FOLLOW_UPS = os.getenv('SUPERSEDE_FOLLOW_UPS', 'false').lower() == 'true'
+    LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', 0.5))
+    LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', 0.25))
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 3600))
+    USER_CACHE_REFRESH_INTERVAL = float(os.getenv('USER_CACHE_REFRESH_INTERVAL', 900))
+    USER_CACHE_MIN_REFRESH_INTERVAL = float(os.getenv('USER_CACHE_MIN_REFRESH_INTERVAL', 60))
+    CHANNEL_CACHE_TTL = float(os.getenv('CHANNEL_CACHE_TTL', 86400))
+    HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'false').lower() == 'true'
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 20))
+    SLACK_API_URL = os.getenv('SLACK_API_URL', 'https://slack.com/api/')
+    FIREFLIES_API_URL = os.getenv('FIREFLIES_API_URL', 'https://api.fireflies.ai')
+    BREVO_API_URL = os.getenv('BREVO_API_URL', 'https://api.brevo.com/v3')
+    SLACK_STREAMING = os.getenv('SLACK_STREAMING', 'false').lower() == 'true'
+    SLACK_STREAM_UPDATE_INTERVAL = float(os.getenv('SLACK_STREAM_UPDATE_INTERVAL', 1.0))
+    SLACK_CHANNEL_POST_INTERVAL = float(os.getenv('SLACK_CHANNEL_POST_INTERVAL', 1.0))
+    SLACK_MESSAGE_MAX_CHARS = int(os.getenv('SLACK_MESSAGE_MAX_CHARS', 3500))
+    PRE_ROUTER_ENABLED = os.getenv('PRE_ROUTER_ENABLED', 'true').lower() == 'true'
+    PRE_ROUTER_THRESHOLD = float(os.getenv('PRE_ROUTER_THRESHOLD', 0.8))
+    PRE_ROUTER_CLASSIFIER = os.getenv('PRE_ROUTER_CLASSIFIER')
+    SUPERVISOR_FAN_OUT = os.getenv('SUPERVISOR_FAN_OUT', 'true').lower() == 'true'
+    DIRECT_ANSWER_AGENTS = [name.strip() for name in os.getenv('DIRECT_ANSWER_AGENTS', '').split(',') if name.strip()]
+    # Invalidation is per process; only enable with a single worker process.
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1000))
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 300))
+    HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', 2000))
+    HISTORY_MAX_MESSAGES = int(os.getenv('HISTORY_MAX_MESSAGES', 100))
+    HISTORY_SUMMARY_ENABLED = os.getenv('HISTORY_SUMMARY_ENABLED', 'true').lower() == 'true'
+    HISTORY_SUMMARY_BATCH = int(os.getenv('HISTORY_SUMMARY_BATCH', 10))
+    HISTORY_ENCODING = os.getenv('HISTORY_ENCODING', 'o200k_base')
+    # Resumes each channel's supervisor thread instead of rebuilding history per request; seed
+    # existing channels with `migrate_history checkpoints` first. Response cache keys track the
+    # last exchange themselves, so RESPONSE_CACHE_ENABLED behaves the same with it on.
+    CHECKPOINTER_ENABLED = os.getenv('CHECKPOINTER_ENABLED', 'false').lower() == 'true'
+    CHECKPOINT_KEEP = int(os.getenv('CHECKPOINT_KEEP', 2))
+    TOOL_RESULT_TOKEN_BUDGET = int(os.getenv('TOOL_RESULT_TOKEN_BUDGET', 1500))
+    TOOL_RESULT_MAX_ROWS = int(os.getenv('TOOL_RESULT_MAX_ROWS', 50))
+    OTEL_ENABLED = os.getenv('OTEL_ENABLED', 'false').lower() == 'true'
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'false').lower() == 'true'
+    PREFETCH_TASK_LIMIT = int(os.getenv('PREFETCH_TASK_LIMIT', 200))
+
+    def llm(self, name: str) -> AdmittedChatOpenAI:
+        """Chat model for an agent or chain, as configured in LLM_AGENT_MODELS."""
+        model = self.LLM_AGENT_MODELS.get(name, self.LLM_MODEL)
+        if model == self.LLM_MODEL:
+            return self.LLM_MINI
+        return self._chat_model(model)
+
+    def check_agent_models(self, agents: Iterable[str], chains: Iterable[str] = ()) -> None:
+        """Fail at startup on LLM_AGENT_MODELS or DIRECT_ANSWER_AGENTS entries that name no agent, e.g. a typo.
+
+        LLM_AGENT_MODELS may also name a chain (the supervisor, summaries);
+        DIRECT_ANSWER_AGENTS only the supervisor's agents.
+        """
+        agents = set(agents)
+        for setting, configured, names in (
+                ("LLM_AGENT_MODELS", self.LLM_AGENT_MODELS, agents | set(chains)),
+                ("DIRECT_ANSWER_AGENTS", self.DIRECT_ANSWER_AGENTS, agents),
+        ):
+            unknown = sorted(set(configured) - names)
+            if unknown:
+                raise ValueError(f"{setting}: unknown agent(s) {', '.join(unknown)}; "
+                                 f"expected one of {', '.join(sorted(names))}")
+
+    @lru_cache()
+    def _chat_model(self, model: str) -> AdmittedChatOpenAI:
+        return AdmittedChatOpenAI(
+            model=model, temperature=self.LLM_TEMPERATURE, use_responses_api=True, max_retries=0,
+            admission=self.LLM_ADMISSION
+        )
 
 class DevelopmentConfig(BaseConfig):
     Issuer = "http://localhost:8000"
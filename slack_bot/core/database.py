@@ -9,6 +9,7 @@ from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
 
 from slack_bot.core.config import settings
+from slack_bot.core.tracing import report_error
 
 
 class PyObjectId:
@@ -108,5 +109,5 @@ def update_snowflake_token():
             time.sleep(50 * 60)
             settings.set_snowflake_connection()
         except Exception as e:
-            print(e)
+            report_error("update_snowflake_token", e)
             time.sleep(60 * 30)
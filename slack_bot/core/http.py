@@ -0,0 +1,201 @@
+import importlib.util
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import aiohttp
+import httpx
+
+from slack_bot.core.config import settings
+from slack_bot.core.tracing import start_span
+
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+logger = logging.getLogger("slack_bot.http")
+
+
+@dataclass
+class ClientConfig:
+    base_url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    timeout: float = 20
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60
+
+
+class TracedTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport so every request is an `http` span, ended on the response or on a transport error."""
+
+    def __init__(self, name: str, transport: httpx.AsyncBaseTransport, requests: Counter, errors: Counter):
+        self.name = name
+        self.transport = transport
+        self.requests = requests
+        self.errors = errors
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests[self.name] += 1
+        span = start_span("http", self.name, method=request.method, path=request.url.path)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException as e:
+            self.errors[self.name] += 1
+            span.end(e)
+            raise
+        if response.status_code >= 400:
+            self.errors[self.name] += 1
+        span.set(status_code=response.status_code)
+        span.end(f"HTTP {response.status_code}" if response.status_code >= 400 else None)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def pool_usage(client: httpx.AsyncClient | None) -> Tuple[int | None, int | None]:
+    """Open and idle connections of a client's pool; (None, None) if httpx's private pool is not reachable."""
+    if client is None:
+        return 0, 0
+    try:
+        connections = client._transport.transport._pool.connections
+        return len(connections), sum(1 for connection in connections if connection.is_idle())
+    except AttributeError:
+        return None, None
+
+
+class HttpClientRegistry:
+    """Application-scoped outbound HTTP clients, one pooled client per host.
+
+    Clients are created on first use and closed in the FastAPI lifespan, so
+    every call to the same integration reuses kept-alive connections.
+    """
+
+    def __init__(self, http2: bool = False):
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP2_ENABLED is set but the h2 package is not installed; using HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._configs: Dict[str, ClientConfig] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._requests: Counter = Counter()
+        self._errors: Counter = Counter()
+
+    def register(self, name: str, config: ClientConfig) -> None:
+        self._configs[name] = config
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create_client(name, self._configs[name])
+        return client
+
+    def _create_client(self, name: str, config: ClientConfig,
+                       transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+        transport = transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            http2=self.http2,
+        )
+        return httpx.AsyncClient(
+            base_url=config.base_url,
+            headers=config.headers,
+            timeout=httpx.Timeout(config.timeout),
+            transport=TracedTransport(name, transport, self._requests, self._errors),
+        )
+
+    def aiohttp_session(self, name: str, limit: int = 20) -> aiohttp.ClientSession:
+        """Pooled aiohttp session for SDKs that do not use httpx (slackclient)."""
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            session = self._sessions[name] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=limit, keepalive_timeout=60),
+                trace_configs=[self._trace_config(name)],
+            )
+        return session
+
+    def _trace_config(self, name: str) -> aiohttp.TraceConfig:
+        async def on_request_start(session, context, params: aiohttp.TraceRequestStartParams) -> None:
+            self._requests[name] += 1
+            context.span = start_span("http", name, method=params.method, path=params.url.path)
+
+        async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams) -> None:
+            status = params.response.status
+            if status >= 400:
+                self._errors[name] += 1
+            context.span.set(status_code=status)
+            context.span.end(f"HTTP {status}" if status >= 400 else None)
+
+        async def on_request_exception(session, context, params: aiohttp.TraceRequestExceptionParams) -> None:
+            self._errors[name] += 1
+            context.span.end(params.exception)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        for session in self._sessions.values():
+            await session.close()
+        self._clients.clear()
+        self._sessions.clear()
+
+    def stats(self) -> dict:
+        clients = {}
+        for name, config in self._configs.items():
+            client = self._clients.get(name)
+            connections, idle = pool_usage(client)
+            clients[name] = {
+                "open": client is not None and not client.is_closed,
+                "max_connections": config.max_connections,
+                "connections": connections,
+                "idle_connections": idle,
+                "requests": self._requests[name],
+                "errors": self._errors[name],
+            }
+        sessions = {
+            name: {
+                "open": not session.closed,
+                "limit": session.connector.limit if session.connector else None,
+                "requests": self._requests[name],
+                "errors": self._errors[name],
+            }
+            for name, session in self._sessions.items()
+        }
+        return {"http2": self.http2, "clients": clients, "sessions": sessions}
+
+
+http_clients = HttpClientRegistry(http2=settings.HTTP2_ENABLED)
+http_clients.register("slack", ClientConfig(
+    base_url=settings.SLACK_API_URL,
+    headers={"Authorization": f"Bearer {settings.SLACK_BOT_TOKEN}"},
+    timeout=10,
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+))
+http_clients.register("fireflies", ClientConfig(
+    base_url=settings.FIREFLIES_API_URL,
+    headers={
+        "Authorization": f"Bearer {settings.FIREFLIES_TOKEN}",
+        "Content-Type": "application/json"
+    },
+    timeout=20,
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+))
+http_clients.register("brevo", ClientConfig(
+    base_url=settings.BREVO_API_URL,
+    headers={
+        "accept": "application/json",
+        "api-key": settings.BREVO_API_KEY or "",
+        "content-type": "application/json"
+    },
+    timeout=15,
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+))
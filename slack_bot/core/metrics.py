@@ -0,0 +1,94 @@
+import logging
+from typing import Callable, Dict, Iterator, Sequence
+
+import prometheus_client
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+logger = logging.getLogger("slack_bot.metrics")
+
+
+class LabeledMetric:
+    """A prometheus_client metric taking its label values as keyword arguments; missing ones are empty."""
+
+    def __init__(self, metric, labels: Sequence[str]):
+        self._metric = metric
+        self.labels = tuple(labels)
+
+    def _child(self, labels: Dict[str, str]):
+        if not self.labels:
+            return self._metric
+        return self._metric.labels(*(str(labels.get(name, "")) for name in self.labels))
+
+
+class Counter(LabeledMetric):
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        self._child(labels).inc(amount)
+
+
+class Histogram(LabeledMetric):
+    def observe(self, value: float, **labels: str) -> None:
+        self._child(labels).observe(value)
+
+
+class Gauge(Collector):
+    """A value read from a callback at scrape time, e.g. a queue depth; None leaves the series out."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float | None]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        gauge = GaugeMetricFamily(self.name, self.documentation)
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.warning("cannot read %s: %s", self.name, e)
+            value = None
+        if value is not None:
+            gauge.add_metric([], value)
+        yield gauge
+
+
+class MetricsRegistry:
+    """Application metrics on a prometheus_client registry, rendered for GET /metrics."""
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, name: str, create: Callable[[], object]):
+        if name not in self._metrics:
+            self._metrics[name] = create()
+        return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda: Counter(
+            prometheus_client.Counter(name, documentation, labels, registry=self.registry), labels
+        ))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(name, lambda: Histogram(
+            prometheus_client.Histogram(name, documentation, labels, registry=self.registry, buckets=buckets), labels
+        ))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float | None]) -> Gauge:
+        def create() -> Gauge:
+            gauge = Gauge(name, documentation, read)
+            self.registry.register(gauge)
+            return gauge
+
+        return self._register(name, create)
+
+    def render(self) -> str:
+        return generate_latest(self.registry).decode()
+
+
+metrics = MetricsRegistry()
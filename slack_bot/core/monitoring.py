@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from slack_bot.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Detects event loop stalls.
+
+    A heartbeat task measures how late the loop wakes it up. A watchdog
+    thread notices when the heartbeat stops altogether and logs the stack of
+    the loop thread, which points at the blocking call.
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25, samples: int = 1000):
+        self.interval = interval
+        self.threshold = threshold
+        self._lags = deque(maxlen=samples)
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._reported = False
+        self.blocked = 0
+        self.max_lag = 0.0
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-lag-heartbeat")
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += 1
+            self._last_beat = now
+            self._reported = False
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.threshold / 2):
+            stalled = time.monotonic() - self._last_beat - self.interval
+            if stalled <= self.threshold or self._reported:
+                continue
+            self._reported = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+            logger.warning("Event loop blocked for %.3fs, current stack:\n%s", stalled, stack)
+
+    def stats(self) -> dict:
+        lags = sorted(self._lags)
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "blocked": self.blocked,
+            "max_lag": self.max_lag,
+            "p99_lag": lags[int(0.99 * (len(lags) - 1))] if lags else None,
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_LAG_INTERVAL,
+    threshold=settings.LOOP_LAG_THRESHOLD
+)
@@ -0,0 +1,134 @@
+import importlib.util
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator
+
+from slack_bot.core.config import settings
+from slack_bot.core.metrics import metrics
+
+
+OTEL_AVAILABLE = importlib.util.find_spec("opentelemetry") is not None
+
+logger = logging.getLogger("slack_bot.trace")
+error_logger = logging.getLogger("slack_bot.errors")
+
+span_duration = metrics.histogram(
+    "slack_bot_span_duration_seconds",
+    "Duration of traced pipeline stages (events, agent runs, sub-agent hops, LLM calls, tools, HTTP calls).",
+    labels=("kind", "name", "status"),
+)
+errors_total = metrics.counter(
+    "slack_bot_errors_total",
+    "Errors reported by pipeline components, including ones that are handled and logged.",
+    labels=("component",),
+)
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+def get_tracer():
+    if not (settings.OTEL_ENABLED and OTEL_AVAILABLE):
+        return None
+    from opentelemetry import trace
+    return trace.get_tracer("slack_bot")
+
+
+class Span:
+    """One timed pipeline stage.
+
+    Ending a span records it in the `slack_bot_span_duration_seconds`
+    histogram, logs it as a JSON line on the `slack_bot.trace` logger and, if
+    OTEL_ENABLED and opentelemetry is installed, ends the matching
+    OpenTelemetry span.
+    """
+
+    def __init__(self, kind: str, name: str, parent: "Span | None" = None, **attributes: Any):
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes: Dict[str, Any] = attributes
+        self.started = time.monotonic()
+        self.duration: float | None = None
+        self.error: str | None = None
+        self.otel = self._start_otel()
+
+    def _start_otel(self):
+        tracer = get_tracer()
+        if tracer is None:
+            return None
+        from opentelemetry import trace
+        context = trace.set_span_in_context(self.parent.otel) if self.parent and self.parent.otel else None
+        attributes = {key: str(value) for key, value in self.attributes.items() if value is not None}
+        return tracer.start_span(f"{self.kind}.{self.name}", context=context, attributes=attributes)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+        if self.otel is not None:
+            for key, value in attributes.items():
+                if value is not None:
+                    self.otel.set_attribute(key, str(value))
+
+    def end(self, error: BaseException | str | None = None) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.monotonic() - self.started
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+        status = "error" if self.error else "ok"
+        span_duration.observe(self.duration, kind=self.kind, name=self.name, status=status)
+        if self.otel is not None:
+            from opentelemetry.trace import Status, StatusCode
+            if self.error:
+                self.otel.set_status(Status(StatusCode.ERROR, self.error))
+            self.otel.end()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent.span_id if self.parent else None,
+                "kind": self.kind,
+                "name": self.name,
+                "duration_ms": round(self.duration * 1000, 2),
+                "status": status,
+                "error": self.error,
+                **self.attributes,
+            }, default=str))
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def start_span(kind: str, name: str, parent: Span | None = None, **attributes: Any) -> Span:
+    return Span(kind, name, parent or current_span(), **attributes)
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes: Any) -> Iterator[Span]:
+    """Trace a block; spans started inside it, including from other tasks it creates, become children."""
+    current = start_span(kind, name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def report_error(component: str, error: BaseException | str) -> None:
+    """Log an error on the `slack_bot.errors` logger, count it and attach it to the current span."""
+    error_logger.error("[%s] Error: %s", component, error,
+                       exc_info=error if isinstance(error, BaseException) else None)
+    errors_total.inc(component=component)
+    current = current_span()
+    if current is not None:
+        current.set(error=str(error))
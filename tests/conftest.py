@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+# Settings are read at import time; give the required ones dummy values.
+os.environ.setdefault("SERVICE_ACCOUNT_INFO_PRIVATE_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("MONGO_DB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-test")
+
+import slack_bot.api.slack  # noqa: E402,F401  (resolves the slack <-> agent import cycle)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """An in-memory `slack` database in place of settings.DB_CLIENT."""
+    from mongomock_motor import AsyncMongoMockClient
+
+    from slack_bot.core.config import settings
+
+    client = AsyncMongoMockClient().slack
+    monkeypatch.setattr(settings, "DB_CLIENT", client)
+    return client
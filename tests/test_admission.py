@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from slack_bot.core import admission
+from slack_bot.core.admission import LLMAdmissionController, Priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def rate_limit_error(retry_after: str) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.test/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_interactive_calls_are_admitted_before_background_ones(clock):
+    async def scenario():
+        controller = LLMAdmissionController(max_in_flight=1)
+        admitted = []
+
+        async def call(name, priority):
+            waiter = await controller.acquire(10, priority)
+            admitted.append(name)
+            controller.release(waiter)
+
+        holder = await controller.acquire(10, Priority.INTERACTIVE)
+        calls = [
+            asyncio.create_task(call("background", Priority.BACKGROUND)),
+            asyncio.create_task(call("interactive 1", Priority.INTERACTIVE)),
+            asyncio.create_task(call("interactive 2", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        controller.release(holder)
+        await asyncio.wait_for(asyncio.gather(*calls), 1)
+        return admitted
+
+    assert asyncio.run(scenario()) == ["interactive 1", "interactive 2", "background"]
+
+
+def test_background_calls_leave_slots_for_interactive_ones(clock):
+    async def scenario():
+        controller = LLMAdmissionController(max_in_flight=2, background_max_in_flight=1)
+        await controller.acquire(10, Priority.BACKGROUND)
+        queued = asyncio.create_task(controller.acquire(10, Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(controller.acquire(10, Priority.INTERACTIVE), 1)
+        stats = controller.stats()["classes"]
+        queued.cancel()
+        return stats
+
+    stats = asyncio.run(scenario())
+
+    assert stats["background"]["in_flight"] == 1
+    assert stats["background"]["queued"] == 1
+    assert stats["interactive"]["in_flight"] == 1
+
+
+def test_tokens_used_beyond_the_estimate_delay_later_calls(clock):
+    async def scenario():
+        controller = LLMAdmissionController(tokens_per_minute=1000)
+        first = await controller.acquire(800, Priority.INTERACTIVE)
+        controller.release(first, tokens=1500)
+        debt = controller.tokens.available
+        second = asyncio.create_task(controller.acquire(100, Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        held = not second.done()
+        # 500 tokens of debt plus the 100 asked for refill in 36 seconds.
+        clock.now += 35
+        controller._dispatch()
+        await asyncio.sleep(0)
+        still_held = not second.done()
+        clock.now += 1
+        controller._dispatch()
+        await asyncio.sleep(0)
+        return debt, held, still_held, second.done()
+
+    assert asyncio.run(scenario()) == (-500, True, True, True)
+
+
+def test_rate_limit_pauses_admissions_for_retry_after(clock):
+    async def scenario():
+        controller = LLMAdmissionController(max_retries=1)
+        attempts = []
+
+        async def request():
+            attempts.append(clock.now)
+            if len(attempts) == 1:
+                raise rate_limit_error("30")
+            return "answer"
+
+        call = asyncio.create_task(controller.call(request, 10))
+        await asyncio.sleep(0)
+        other = asyncio.create_task(controller.acquire(10, Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        paused = not call.done() and not other.done()
+        cooldown = controller.stats()["cooldown"]
+        clock.now += 30
+        controller._dispatch()
+        result = await asyncio.wait_for(call, 1)
+        await asyncio.wait_for(other, 1)
+        return attempts, paused, cooldown, result, controller.stats()["classes"]["interactive"]["throttled"]
+
+    attempts, paused, cooldown, result, throttled = asyncio.run(scenario())
+
+    assert attempts == [1000.0, 1030.0]
+    assert paused
+    assert cooldown == 30
+    assert result == "answer"
+    assert throttled == 1
@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+
+from slack_bot.api.agent.cache import GLOBAL_AGENTS, ResponseCache, response_cache
+from slack_bot.api.agent.tools import query_mongo_tool
+from slack_bot.core.config import settings
+from slack_bot.api.agent.router import DEFAULT_RULES, SUPERVISOR_PATTERNS, PreRouter
+
+
+def recorded(cache: ResponseCache, *calls):
+    recorder = cache.recorder()
+    recorder.calls.extend(calls)
+    return recorder
+
+
+def test_repeated_question_hits_within_scope():
+    cache = ResponseCache()
+    key = cache.key("Show my tasks!", None, "C1", "U1")
+    cache.put(key, "3 tasks", recorded(cache, ("query_mongo_tool", {"type_query": "read"})))
+
+    assert cache.get(cache.key("show my  tasks", None, "C1", "U1")) == "3 tasks"
+    assert cache.get(cache.key("show my tasks", None, "C1", "U2")) is None
+
+
+def test_write_invalidates_answers_read_from_the_collection():
+    cache = ResponseCache()
+    key = cache.key("show my tasks", None, "C1", "U1")
+    cache.put(key, "3 tasks", recorded(cache, ("query_mongo_tool", {"type_query": "read"})))
+    cache.invalidate("tasks")
+
+    assert cache.get(key) is None
+    assert cache.invalidated == 1
+
+
+def test_follow_ups_are_not_served_from_cache():
+    cache = ResponseCache()
+    read = ("query_mongo_tool", {"type_query": "read", "cursor": 10})
+    key = cache.key("show more", None, "C1", "U1")
+    cache.put(key, "tasks 11-20", recorded(cache, read))
+    cache.record_turn("C1", "show more", "tasks 11-20")
+
+    assert cache.get(cache.key("show more", None, "C1", "U1")) is None
+
+
+def test_answer_read_during_a_write_is_not_cached(monkeypatch):
+    recorders = []
+
+    class Tasks:
+        async def update_one(self, filter, update):
+            # A run starting now reads the collection before the write has landed.
+            recorders.append(response_cache.recorder())
+
+    monkeypatch.setattr(settings, "DB_CLIENT", SimpleNamespace(tasks=Tasks()))
+    asyncio.run(query_mongo_tool.ainvoke({
+        "query": {"filter": {"_id": 1}, "update": {"$set": {"is_completed": True}}},
+        "type_query": "update",
+    }))
+    recorder = recorders[0]
+    recorder.calls.append(("query_mongo_tool", {"type_query": "read"}))
+    key = response_cache.key("show my tasks", None, "C1", "U1")
+    response_cache.put(key, "3 tasks", recorder)
+
+    assert response_cache.get(key) is None
+
+
+def test_global_agents_are_reachable_from_the_pre_router():
+    router = PreRouter(DEFAULT_RULES, supervisor_patterns=SUPERVISOR_PATTERNS)
+    routable = {route_rule.agent_name for route_rule in DEFAULT_RULES if route_rule.confidence >= router.threshold}
+    assert set(GLOBAL_AGENTS) <= routable
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint, uuid6
+
+from slack_bot.api.agent import migrate_history
+from slack_bot.api.agent.checkpoint import MongoCheckpointSaver, checkpointer
+
+
+def checkpoint(messages: list) -> dict:
+    value = empty_checkpoint()
+    value["id"] = str(uuid6())
+    value["channel_values"] = {"messages": messages}
+    value["channel_versions"] = {"messages": 1}
+    return value
+
+
+async def put(saver: MongoCheckpointSaver, thread_id: str, parent: dict | None, messages: list) -> dict:
+    config = parent or {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    return await saver.aput(config, checkpoint(messages), {"source": "loop", "step": 1}, {"messages": 1})
+
+
+def test_put_and_get_round_trip(db):
+    saver = MongoCheckpointSaver(db=db, keep=None)
+
+    async def scenario():
+        await saver.setup()
+        first = await put(saver, "C1", None, [HumanMessage(content="hi")])
+        second = await put(saver, "C1", first, [HumanMessage(content="hi"), HumanMessage(content="again")])
+        await saver.aput_writes(second, [("messages", HumanMessage(content="pending"))], task_id="task-1")
+        return first, second, await saver.aget_tuple({"configurable": {"thread_id": "C1"}})
+
+    first, second, latest = asyncio.run(scenario())
+
+    assert latest.config == second
+    assert latest.parent_config == first
+    assert [message.content for message in latest.checkpoint["channel_values"]["messages"]] == ["hi", "again"]
+    assert latest.metadata["step"] == 1
+    assert [(task_id, channel, value.content) for task_id, channel, value in latest.pending_writes] == \
+        [("task-1", "messages", "pending")]
+
+
+def test_get_by_id_and_list(db):
+    saver = MongoCheckpointSaver(db=db, keep=None)
+
+    async def scenario():
+        first = await put(saver, "C1", None, [])
+        second = await put(saver, "C1", first, [])
+        await put(saver, "C2", None, [])
+        by_id = await saver.aget_tuple(first)
+        listed = [item.config async for item in saver.alist({"configurable": {"thread_id": "C1"}})]
+        before = [item.config async for item in saver.alist({"configurable": {"thread_id": "C1"}}, before=second)]
+        return first, second, by_id, listed, before
+
+    first, second, by_id, listed, before = asyncio.run(scenario())
+
+    assert by_id.config == first
+    assert listed == [second, first]
+    assert before == [first]
+
+
+def test_put_writes_is_idempotent_per_task(db):
+    saver = MongoCheckpointSaver(db=db, keep=None)
+
+    async def scenario():
+        config = await put(saver, "C1", None, [])
+        await saver.aput_writes(config, [("messages", "a")], task_id="task-1")
+        await saver.aput_writes(config, [("messages", "b")], task_id="task-1")
+        return await saver.aget_tuple(config)
+
+    assert asyncio.run(scenario()).pending_writes == [("task-1", "messages", "a")]
+
+
+def test_prunes_to_keep_newest_checkpoints(db):
+    saver = MongoCheckpointSaver(db=db, keep=2)
+
+    async def scenario():
+        config = None
+        created = []
+        for _ in range(4):
+            config = await put(saver, "C1", config, [])
+            await saver.aput_writes(config, [("messages", "x")], task_id="task")
+            created.append(config)
+        listed = [item.config async for item in saver.alist({"configurable": {"thread_id": "C1"}})]
+        return created, listed, await db.checkpoint_writes.count_documents({})
+
+    created, listed, writes = asyncio.run(scenario())
+
+    assert listed == [created[3], created[2]]
+    assert writes == 2
+
+
+@pytest.fixture
+def migration_db(db, monkeypatch):
+    monkeypatch.setattr(checkpointer, "db", db)
+    asyncio.run(db.messages.insert_many([
+        {"sessionId": channel_id, "type": message_type, "content": f"{channel_id} {message_type}"}
+        for channel_id in ("C1", "C2") for message_type in ("human", "ai")
+    ]))
+    asyncio.run(put(checkpointer, "C2", None, []))
+    return db
+
+
+def test_checkpoint_migration_dry_run_writes_nothing(migration_db):
+    migrated = asyncio.run(migrate_history.migrate_to_checkpoints(dry_run=True))
+
+    assert migrated == 1
+    assert asyncio.run(checkpointer.aget_tuple({"configurable": {"thread_id": "C1"}})) is None
+
+
+def test_checkpoint_migration_seeds_threads_without_one(migration_db):
+    migrated = asyncio.run(migrate_history.migrate_to_checkpoints())
+
+    assert migrated == 1
+    seeded = asyncio.run(checkpointer.aget_tuple({"configurable": {"thread_id": "C1"}}))
+    assert [message.content for message in seeded.checkpoint["channel_values"]["messages"]] == ["C1 human", "C1 ai"]
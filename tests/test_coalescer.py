@@ -0,0 +1,124 @@
+import asyncio
+
+from slack_bot.api.slack.coalescer import MessageCoalescer
+
+
+def message(event_id: str, user: str, text: str, ts: str) -> dict:
+    return {
+        "event_id": event_id,
+        "event": {"type": "message", "channel": "C1", "user": user, "text": text, "ts": ts},
+        "run_versions": {ts: 0},
+    }
+
+
+class Submitted:
+    def __init__(self, accept: bool = True):
+        self.accept = accept
+        self.bodies = []
+
+    async def __call__(self, key: str, body: dict) -> bool:
+        self.bodies.append((key, body))
+        return self.accept
+
+
+def test_messages_are_held_until_the_user_is_quiet():
+    async def scenario():
+        submitted = Submitted()
+        coalescer = MessageCoalescer(submitted, window=0.05, max_wait=1)
+        await coalescer.add("C1", message("Ev1", "U1", "hi", "1.0"))
+        await asyncio.sleep(0.03)
+        await coalescer.add("C1", message("Ev2", "U1", "how are my tasks?", "2.0"))
+        await asyncio.sleep(0.03)
+        held = list(submitted.bodies)
+        await asyncio.sleep(0.05)
+        return held, submitted.bodies, coalescer.stats()
+
+    held, bodies, stats = asyncio.run(scenario())
+
+    assert held == []
+    assert len(bodies) == 1
+    key, body = bodies[0]
+    assert key == "C1"
+    assert body["event"]["text"] == "hi\nhow are my tasks?"
+    assert body["event"]["ts"] == "2.0"
+    assert body["coalesced_event_ids"] == ["Ev1", "Ev2"]
+    assert body["run_versions"] == {"1.0": 0, "2.0": 0}
+    assert stats["merged"] == 1
+    assert stats["pending"] == 0
+
+
+def test_max_wait_caps_the_hold():
+    async def scenario():
+        submitted = Submitted()
+        coalescer = MessageCoalescer(submitted, window=0.05, max_wait=0.08)
+        for i in range(4):
+            await coalescer.add("C1", message(f"Ev{i}", "U1", str(i), f"{i}.0"))
+            await asyncio.sleep(0.03)
+        await asyncio.sleep(0.06)
+        return [body["event"]["text"] for _, body in submitted.bodies]
+
+    texts = asyncio.run(scenario())
+
+    assert len(texts) == 2
+    assert "\n".join(texts) == "0\n1\n2\n3"
+
+
+def test_users_are_merged_separately():
+    async def scenario():
+        submitted = Submitted()
+        coalescer = MessageCoalescer(submitted, window=0.05)
+        await coalescer.add("C1", message("Ev1", "U1", "a1", "1.0"))
+        await coalescer.add("C1", message("Ev2", "U2", "b1", "2.0"))
+        await coalescer.add("C1", message("Ev3", "U1", "a2", "3.0"))
+        await asyncio.sleep(0.1)
+        return {body["event"]["user"]: body["event"]["text"] for _, body in submitted.bodies}
+
+    assert asyncio.run(scenario()) == {"U1": "a1\na2", "U2": "b1"}
+
+
+def test_other_events_are_not_held():
+    async def scenario():
+        submitted = Submitted()
+        coalescer = MessageCoalescer(submitted, window=10)
+        edit = {"event_id": "Ev1", "event": {"type": "message", "subtype": "message_changed", "channel": "C1"}}
+        accepted = await coalescer.add("C1", edit)
+        return accepted, submitted.bodies
+
+    accepted, bodies = asyncio.run(scenario())
+
+    assert accepted
+    assert [body["event_id"] for _, body in bodies] == ["Ev1"]
+
+
+def test_stop_flushes_held_messages():
+    async def scenario():
+        submitted = Submitted()
+        coalescer = MessageCoalescer(submitted, window=10)
+        await coalescer.add("C1", message("Ev1", "U1", "a", "1.0"))
+        await coalescer.add("C1", message("Ev2", "U1", "b", "2.0"))
+        await coalescer.stop()
+        return submitted.bodies, coalescer.stats()
+
+    bodies, stats = asyncio.run(scenario())
+
+    assert [body["event"]["text"] for _, body in bodies] == ["a\nb"]
+    assert stats["pending"] == 0
+
+
+def test_dropped_flush_hands_back_every_message():
+    async def scenario():
+        dropped = []
+
+        async def on_drop(bodies):
+            dropped.extend(body["event_id"] for body in bodies)
+
+        coalescer = MessageCoalescer(Submitted(accept=False), window=10, on_drop=on_drop)
+        await coalescer.add("C1", message("Ev1", "U1", "a", "1.0"))
+        await coalescer.add("C1", message("Ev2", "U1", "b", "2.0"))
+        await coalescer.stop()
+        return dropped, coalescer.stats()
+
+    dropped, stats = asyncio.run(scenario())
+
+    assert dropped == ["Ev1", "Ev2"]
+    assert stats["dropped"] == 2
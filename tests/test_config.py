@@ -0,0 +1,34 @@
+import pytest
+
+from slack_bot.core.config import BaseConfig, parse_agent_models
+
+
+def test_agent_models_ignore_spaces_around_names_and_models():
+    assert parse_agent_models(" supervisor = gpt-4.1-nano , DocsAgent=gpt-4.1,broken") == {
+        "supervisor": "gpt-4.1-nano",
+        "DocsAgent": "gpt-4.1",
+    }
+
+
+def test_unknown_agent_names_are_rejected(monkeypatch):
+    config = BaseConfig()
+    monkeypatch.setattr(config, "LLM_AGENT_MODELS", {"supervisor": "gpt-4.1-nano", "DocAgent": "gpt-4.1"})
+
+    config.check_agent_models(["DocAgent"], ["supervisor"])
+    with pytest.raises(ValueError, match="LLM_AGENT_MODELS: unknown agent.s. DocAgent"):
+        config.check_agent_models(["DocsAgent"], ["supervisor"])
+
+
+def test_unknown_direct_answer_agents_are_rejected(monkeypatch):
+    config = BaseConfig()
+    monkeypatch.setattr(config, "LLM_AGENT_MODELS", {})
+    monkeypatch.setattr(config, "DIRECT_ANSWER_AGENTS", ["DocsAgent"])
+
+    config.check_agent_models(["DocsAgent"], ["supervisor"])
+    monkeypatch.setattr(config, "DIRECT_ANSWER_AGENTS", ["DocAgent"])
+    with pytest.raises(ValueError, match="DIRECT_ANSWER_AGENTS: unknown agent.s. DocAgent"):
+        config.check_agent_models(["DocsAgent"], ["supervisor"])
+    # Chains have no edge to end the run on.
+    monkeypatch.setattr(config, "DIRECT_ANSWER_AGENTS", ["supervisor"])
+    with pytest.raises(ValueError, match="DIRECT_ANSWER_AGENTS"):
+        config.check_agent_models(["DocsAgent"], ["supervisor"])
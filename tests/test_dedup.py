@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import FastAPI
+
+from slack_bot.api.slack import slack_router, views
+from slack_bot.api.slack.dedup import MongoDedupStore
+
+
+class FakeCoalescer:
+    def __init__(self, accept: bool):
+        self.accept = accept
+        self.added = []
+
+    async def add(self, key: str, body: dict) -> bool:
+        self.added.append(body["event_id"])
+        return self.accept
+
+
+def event(event_id: str) -> dict:
+    return {
+        "type": "event_callback",
+        "event_id": event_id,
+        "event": {"type": "reaction_added", "channel": "C1", "user": "U1"},
+    }
+
+
+async def post(client: httpx.AsyncClient, body: dict, retry_num: int = 0) -> httpx.Response:
+    headers = {"X-Slack-Retry-Num": str(retry_num)} if retry_num else {}
+    return await client.post("/slack/events", json=body, headers=headers)
+
+
+def serve(monkeypatch, store: MongoDedupStore, coalescer: FakeCoalescer) -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(slack_router)
+    monkeypatch.setattr(views, "dedup_store", store)
+    monkeypatch.setattr(views, "message_coalescer", coalescer)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_lease_is_held_until_it_expires(db):
+    async def scenario():
+        store = MongoDedupStore(ttl=60)
+        await store.setup()
+        first = await store.acquire("Ev1")
+        duplicate = await store.acquire("Ev1", retry_num=1)
+        await store.collection.update_one(
+            {"_id": "Ev1"}, {"$set": {"createdAt": datetime.now(timezone.utc) - timedelta(seconds=61)}}
+        )
+        stale = await store.acquire("Ev1", retry_num=2)
+        indexes = await store.collection.index_information()
+        return first, duplicate, stale, indexes, store.stats()
+
+    first, duplicate, stale, indexes, stats = asyncio.run(scenario())
+
+    assert (first, duplicate, stale) == (True, False, True)
+    assert indexes["createdAt_1"]["expireAfterSeconds"] == 60
+    assert stats["acquired"] == 2
+    assert stats["duplicates"] == 1
+    assert stats["retries"] == 2
+
+
+def test_retries_of_a_handled_event_are_not_retried_again(db, monkeypatch):
+    async def scenario():
+        coalescer = FakeCoalescer(accept=True)
+        async with serve(monkeypatch, MongoDedupStore(), coalescer) as client:
+            first = await post(client, event("Ev1"))
+            retry = await post(client, event("Ev1"), retry_num=1)
+        return first, retry, coalescer.added
+
+    first, retry, added = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert "X-Slack-No-Retry" not in first.headers
+    assert retry.status_code == 200
+    assert retry.headers["X-Slack-No-Retry"] == "1"
+    assert added == ["Ev1"]
+
+
+def test_a_full_queue_releases_the_lease_for_slacks_retry(db, monkeypatch):
+    async def scenario():
+        coalescer = FakeCoalescer(accept=False)
+        store = MongoDedupStore()
+        async with serve(monkeypatch, store, coalescer) as client:
+            rejected = await post(client, event("Ev1"))
+            leases = await store.collection.count_documents({})
+            coalescer.accept = True
+            retry = await post(client, event("Ev1"), retry_num=1)
+        return rejected, leases, retry, coalescer.added
+
+    rejected, leases, retry, added = asyncio.run(scenario())
+
+    assert rejected.status_code == 503
+    assert leases == 0
+    assert retry.status_code == 200
+    assert "X-Slack-No-Retry" not in retry.headers
+    assert added == ["Ev1", "Ev1"]
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+from collections import Counter
+
+import httpx
+
+from slack_bot.api.slack.dispatcher import SlackDispatcher, split_text
+from slack_bot.api.slack.streaming import SlackMessageStream
+from slack_bot.api.agent.agent import AgentUpdate
+from slack_bot.core.http import http_clients
+
+
+class SlackStub:
+    """Slack Web API over httpx.MockTransport: records calls and keeps the channel's messages."""
+
+    def __init__(self, rate_limited: dict | None = None):
+        self.calls = Counter()
+        self.messages = {}
+        self.sent_at = {}
+        self.rate_limited = dict(rate_limited or {})
+        self._next_ts = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        method = request.url.path.rsplit("/", 1)[-1]
+        payload = json.loads(request.content)
+        channel = payload["channel"]
+        if self.rate_limited.get(channel):
+            self.rate_limited[channel] -= 1
+            return httpx.Response(429, headers={"Retry-After": "0.2"})
+        self.calls[method] += 1
+        self.sent_at.setdefault(channel, []).append(time.monotonic())
+        if method == "chat.postMessage":
+            self._next_ts += 1
+            ts = f"{self._next_ts}.0"
+            self.messages[ts] = payload["text"]
+            return httpx.Response(200, json={"ok": True, "ts": ts})
+        if method == "chat.update":
+            self.messages[payload["ts"]] = payload["text"]
+        elif method == "chat.delete":
+            self.messages.pop(payload["ts"], None)
+        return httpx.Response(200, json={"ok": True, "ts": payload.get("ts")})
+
+
+def install(stub: SlackStub) -> None:
+    http_clients._clients["slack"] = httpx.AsyncClient(
+        base_url="https://slack.test/api/", transport=httpx.MockTransport(stub.handle)
+    )
+
+
+def test_streaming_past_the_limit_posts_each_overflow_chunk_once(monkeypatch):
+    stub = SlackStub()
+    install(stub)
+    dispatcher = SlackDispatcher(min_interval=0, max_chars=100)
+    monkeypatch.setattr("slack_bot.api.slack.utils.slack_dispatcher", dispatcher)
+
+    async def stream_answer():
+        stream = SlackMessageStream("C1", min_interval=0)
+        await stream.start()
+        text = ""
+        for i in range(30):
+            text += f"word{i:02d} " * 5
+            await stream.update(AgentUpdate(text=text.strip(), status="Writing"))
+        await stream.update(AgentUpdate(text=text.strip(), final=True))
+        return text.strip()
+
+    answer = asyncio.run(stream_answer())
+
+    chunks = len(answer) // 100 + 1
+    # The placeholder plus one post per overflow chunk; everything else is an edit.
+    assert stub.calls["chat.postMessage"] == chunks
+    assert len(stub.messages) == chunks
+    assert " ".join(stub.messages[ts] for ts in sorted(stub.messages, key=float)).split() == answer.split()
+
+
+def test_shrinking_update_deletes_unused_overflow_messages():
+    stub = SlackStub()
+    install(stub)
+    dispatcher = SlackDispatcher(min_interval=0, max_chars=20)
+
+    async def run():
+        ts = await dispatcher.post_message("C1", "one two three four five six seven eight nine ten")
+        await dispatcher.update_message("C1", ts, "short")
+        return ts
+
+    ts = asyncio.run(run())
+
+    assert stub.messages == {ts: "short"}
+    assert stub.calls["chat.delete"] == 2
+
+
+def test_rate_limit_pauses_only_the_limited_channel():
+    stub = SlackStub(rate_limited={"C1": 1})
+    install(stub)
+    dispatcher = SlackDispatcher(min_interval=0)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(dispatcher.post_message("C1", "a"), dispatcher.post_message("C2", "b"))
+        return started
+
+    started = asyncio.run(run())
+
+    assert stub.sent_at["C2"][0] - started < 0.1
+    assert stub.sent_at["C1"][0] - started >= 0.2
+
+
+def test_split_never_yields_blank_chunks():
+    text = "\n\n" + "word " * 30 + "\n\n \n" + "x" * 50
+
+    chunks = split_text(text, 40)
+
+    assert all(chunk.strip() for chunk in chunks)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert "".join("".join(chunks).split()) == "".join(text.split())
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from slack_bot.api.agent import history as history_module
+from slack_bot.api.agent.db_requests import setup_message_history
+from slack_bot.api.agent.history import HistoryCompactor
+
+
+@pytest.fixture(autouse=True)
+def fixed_token_count(monkeypatch):
+    monkeypatch.setattr(history_module, "count_tokens", lambda text: 10)
+
+
+def fake_summarizer(compactor: HistoryCompactor, summarized: list):
+    async def summarize_messages(summary, messages):
+        summarized.extend(message.content for message in messages)
+        return f"{summary or ''}|{len(messages)}"
+
+    compactor.summarize_messages = summarize_messages
+
+
+def store(db, channel_id: str, count: int):
+    asyncio.run(db.messages.insert_many([
+        {"sessionId": channel_id, "type": "human", "content": f"m{index}"} for index in range(count)
+    ]))
+
+
+async def load_and_compact(compactor: HistoryCompactor, channel_id: str):
+    history = await compactor.load(channel_id)
+    task = compactor._compacting.get(channel_id)
+    if task is not None:
+        await task
+    return history
+
+
+def test_compaction_pages_through_messages_older_than_the_window(db):
+    # 250 messages, 100 loaded per window and 5 fit the budget: 245 must end up in the summary.
+    store(db, "C1", 250)
+    compactor = HistoryCompactor(token_budget=70, max_messages=100, summary_batch=10)
+    summarized = []
+    fake_summarizer(compactor, summarized)
+
+    history = asyncio.run(load_and_compact(compactor, "C1"))
+
+    assert [message.content for message in history.messages] == [f"m{index}" for index in range(245, 250)]
+    assert summarized == [f"m{index}" for index in range(245)]
+    assert compactor.compactions == 3
+
+    history = asyncio.run(load_and_compact(compactor, "C1"))
+    assert len(history.messages) == 5
+    assert compactor.compactions == 3
+
+
+def test_compaction_waits_for_a_full_batch(db):
+    store(db, "C1", 12)
+    compactor = HistoryCompactor(token_budget=70, max_messages=100, summary_batch=10)
+    summarized = []
+    fake_summarizer(compactor, summarized)
+
+    asyncio.run(load_and_compact(compactor, "C1"))
+    assert summarized == []
+
+    store(db, "C1", 3)
+    asyncio.run(load_and_compact(compactor, "C1"))
+    assert len(summarized) == 10
+
+
+def test_legacy_documents_are_read_from_their_blob(db):
+    asyncio.run(db.messages.insert_many([
+        {"sessionId": "C1", "History": json.dumps({"type": "human", "data": {"content": "legacy question"}})},
+        {"sessionId": "C1", "History": json.dumps({"type": "ai", "data": {"content": "legacy answer"}})},
+        {"sessionId": "C1", "type": "invalid", "content": None, "History": "not json"},
+        {"sessionId": "C1", "type": "human", "content": "typed question", "History": "{}"},
+    ]))
+    compactor = HistoryCompactor(token_budget=1000, summarize=False)
+
+    history = asyncio.run(compactor.load("C1"))
+
+    assert [(message.type, message.content) for message in history.messages] == [
+        ("human", "legacy question"), ("ai", "legacy answer"), ("human", "typed question")
+    ]
+
+
+def test_setup_drops_the_old_session_index(db):
+    asyncio.run(db.messages.create_index("sessionId"))
+
+    asyncio.run(setup_message_history())
+    asyncio.run(setup_message_history())
+
+    assert set(asyncio.run(db.messages.index_information())) == {"_id_", "sessionId_1__id_1"}
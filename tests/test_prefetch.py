@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from slack_bot.api.agent.prefetch import Prefetcher, RequestContext, Unsupported, _request_context, evaluate_task_read
+
+USER = "U1"
+TASKS = [
+    {"_id": 1, "employees_ids": [USER], "task_description": "Fix API", "is_completed": False, "priority": 2,
+     "deadline": datetime(2025, 6, 20), "tags": ["backend", "api"]},
+    {"_id": 2, "employees_ids": [USER, "U2"], "task_description": "Write docs", "is_completed": True, "priority": 1,
+     "deadline": datetime(2025, 6, 24), "tags": ["docs"], "progress": "half done"},
+    {"_id": 3, "employees_ids": [USER], "task_description": "Review PRs", "is_completed": False, "priority": 3,
+     "deadline": None, "tags": []},
+    {"_id": 4, "employee_id": USER, "task_description": "Old schema", "priority": 2.5},
+]
+SCOPE = {"$match": {"employees_ids": USER}}
+
+# Every supported operator and stage; each read must give the same documents as Mongo (mongomock).
+CASES = {
+    "equality": [SCOPE, {"$match": {"task_description": "Fix API"}}],
+    "array element": [SCOPE, {"$match": {"tags": "docs"}}],
+    "whole array": [SCOPE, {"$match": {"tags": ["backend", "api"]}}],
+    "null matches missing": [SCOPE, {"$match": {"progress": None}}],
+    "$eq": [SCOPE, {"$match": {"is_completed": {"$eq": False}}}],
+    "$ne": [SCOPE, {"$match": {"is_completed": {"$ne": True}}}],
+    "$in": [SCOPE, {"$match": {"priority": {"$in": [1, 3]}}}],
+    "$in on arrays": [SCOPE, {"$match": {"tags": {"$in": ["api", "docs"]}}}],
+    "$nin": [SCOPE, {"$match": {"tags": {"$nin": ["docs"]}}}],
+    "$exists": [SCOPE, {"$match": {"progress": {"$exists": True}}}],
+    "$exists false": [SCOPE, {"$match": {"progress": {"$exists": False}}}],
+    "$gt": [SCOPE, {"$match": {"priority": {"$gt": 1}}}],
+    "$gte on dates": [SCOPE, {"$match": {"deadline": {"$gte": datetime(2025, 6, 21)}}}],
+    "$lt": [SCOPE, {"$match": {"priority": {"$lt": 3}}}],
+    "$lte with range": [SCOPE, {"$match": {"priority": {"$gte": 2, "$lte": 3}}}],
+    "date vs string": [SCOPE, {"$match": {"deadline": {"$gt": "2025-01-01"}}}],
+    "$and": [SCOPE, {"$match": {"$and": [{"is_completed": False}, {"priority": {"$gt": 2}}]}}],
+    "scope by employee_id": [{"$match": {"employee_id": USER}}],
+    "scope by $eq": [{"$match": {"employees_ids": {"$eq": USER}}}],
+    "$project include": [SCOPE, {"$project": {"task_description": 1, "priority": 1}}],
+    "$project exclude": [SCOPE, {"$project": {"_id": 0, "tags": 0, "deadline": 0}}],
+    "$sort": [SCOPE, {"$sort": {"priority": -1}}],
+    "$sort nulls first": [SCOPE, {"$sort": {"deadline": 1}}],
+    "$skip and $limit": [SCOPE, {"$sort": {"priority": 1}}, {"$skip": 1}, {"$limit": 1}],
+    "$count": [SCOPE, {"$match": {"is_completed": False}}, {"$count": "open"}],
+}
+
+UNSUPPORTED = {
+    "not scoped": [{"$match": {"is_completed": False}}],
+    "other user": [{"$match": {"employees_ids": "U2"}}],
+    "$regex": [SCOPE, {"$match": {"task_description": {"$regex": "API"}}}],
+    "$or": [SCOPE, {"$match": {"$or": [{"priority": 1}, {"priority": 3}]}}],
+    "dotted field": [SCOPE, {"$match": {"meta.owner": USER}}],
+    "$group": [SCOPE, {"$group": {"_id": "$is_completed"}}],
+    "false vs 0": [SCOPE, {"$match": {"is_completed": 0}}],
+    "$in with 1 for true": [SCOPE, {"$match": {"is_completed": {"$in": [1]}}}],
+    "$gt with a bool": [SCOPE, {"$match": {"priority": {"$gt": False}}}],
+    "$ne with 0": [SCOPE, {"$match": {"is_completed": {"$ne": 0}}}],
+}
+
+
+@pytest.fixture(scope="module")
+def tasks():
+    collection = mongomock.MongoClient().slack.tasks
+    collection.insert_many([dict(task) for task in TASKS])
+    return collection
+
+
+@pytest.mark.parametrize("pipeline", CASES.values(), ids=CASES.keys())
+def test_reads_match_mongo(tasks, pipeline):
+    assert evaluate_task_read(TASKS, pipeline, USER) == list(tasks.aggregate(pipeline))
+
+
+def test_count_of_nothing_is_no_document():
+    # As in MongoDB; mongomock returns a zero count instead.
+    assert evaluate_task_read(TASKS, [SCOPE, {"$match": {"priority": 99}}, {"$count": "none"}], USER) == []
+
+
+@pytest.mark.parametrize("pipeline", UNSUPPORTED.values(), ids=UNSUPPORTED.keys())
+def test_reads_left_to_mongo(pipeline):
+    with pytest.raises(Unsupported):
+        evaluate_task_read(TASKS, pipeline, USER)
+
+
+def test_discard_cancels_the_lookup_and_releases_waiting_reads():
+    async def scenario():
+        prefetcher = Prefetcher(enabled=True)
+        started = asyncio.Event()
+
+        async def slow_tasks():
+            started.set()
+            await asyncio.sleep(10)
+
+        lookup = asyncio.create_task(slow_tasks())
+        _request_context.set(RequestContext("C1", USER, lookups={"user_tasks": (USER, lookup)}))
+        read = asyncio.create_task(prefetcher.read_tasks([SCOPE]))
+        await started.wait()
+        prefetcher.discard("user_tasks")
+        return await read, lookup
+
+    result, lookup = asyncio.run(scenario())
+
+    assert result is None
+    assert lookup.cancelled()
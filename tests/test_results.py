@@ -0,0 +1,43 @@
+import re
+
+from bson import ObjectId
+
+from slack_bot.api.agent.results import ToolResultShaper, format_value
+
+PART_RE = re.compile(r"characters (\d+)-(\d+) of (\d+)")
+
+
+def test_oversized_transcription_is_paged_within_the_field():
+    transcript = [{"Anna": f"sentence number {index} of the call."} for index in range(400)]
+    docs = [
+        {"id": "call-1", "summary": "Planning", "transcription": transcript},
+        {"id": "call-2", "summary": "Review", "transcription": []},
+    ]
+    shaper = ToolResultShaper(token_budget=300, max_rows=50)
+
+    parts, cursor, offset = [], 0, 0
+    while True:
+        result = shaper.format("query_mongo_transcription_tool", docs[cursor:], cursor,
+                               page_field="transcription", offset=offset)
+        summary, header, row = result.split("\n")
+        assert header == "id | summary | transcription"
+        start, end, _ = map(int, PART_RE.search(summary).groups())
+        assert start == offset
+        parts.append(row.split(" | ", 2)[2])
+        if f"offset={end}" not in summary:
+            break
+        offset = end
+        assert shaper.max_tokens["query_mongo_transcription_tool"] <= 300
+
+    assert "".join(parts) == format_value(transcript)
+    assert len(parts) > 1
+    assert summary.endswith("call again with cursor=1")
+
+
+def test_generated_ids_are_left_out_and_other_ids_are_shown_in_full():
+    shaper = ToolResultShaper()
+    tasks = [{"_id": ObjectId(), "task_description": "Fix API"}]
+    assert shaper.format("query_mongo_tool", tasks).split("\n")[1] == "task_description"
+
+    groups = [{"_id": "Anna", "count": 3}]
+    assert shaper.format("query_mongo_tool", groups).split("\n")[1:] == ["_id | count", "Anna | 3"]
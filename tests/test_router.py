@@ -0,0 +1,22 @@
+from slack_bot.api.agent.router import DEFAULT_RULES, SUPERVISOR_PATTERNS, PreRouter
+
+
+def make_router() -> PreRouter:
+    return PreRouter(DEFAULT_RULES, supervisor_patterns=SUPERVISOR_PATTERNS)
+
+
+def test_single_intent_requests_are_dispatched():
+    router = make_router()
+    assert router.route("show my open tasks").agent_name == "MongoDBAgent"
+    assert router.route("find the call transcripts from Monday").agent_name == "MongoDBTranscriptionAgent"
+
+
+def test_email_and_rag_requests_go_to_the_supervisor():
+    router = make_router()
+    assert router.route("list my tasks and email them to Anna") is None
+    assert router.route("what is our refund policy") is None
+    assert router.fallbacks == 2
+
+
+def test_every_rule_can_dispatch():
+    assert all(route_rule.confidence >= make_router().threshold for route_rule in DEFAULT_RULES)
@@ -0,0 +1,112 @@
+import asyncio
+
+from slack_bot.api.slack import views
+from slack_bot.api.slack.runs import AgentRun, RunRegistry
+
+
+class Agent:
+    """An agent_run that answers with the run's text once released, recording what it was started with."""
+
+    def __init__(self):
+        self.started = []
+        self.running = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, run: AgentRun) -> str:
+        self.started.append(run.text)
+        self.running.set()
+        await self.release.wait()
+        return f"answer: {run.text}"
+
+
+def test_edit_cancels_the_run_and_reruns_with_the_new_text():
+    async def scenario():
+        registry = RunRegistry()
+        agent = Agent()
+        version = registry.track("C1", "1.0", "first")
+        old = asyncio.create_task(registry.run("C1", "U1", "first", {"1.0": version}, agent))
+        await agent.running.wait()
+        text, versions = registry.supersede_message("C1", "1.0", "edited")
+        agent.release.set()
+        new = await registry.run("C1", "U1", text, versions, agent)
+        return await old, new, agent.started, registry
+
+    old, new, started, registry = asyncio.run(scenario())
+
+    assert old is None
+    assert new == "answer: edited"
+    assert started == ["first", "edited"]
+    assert registry.stats()["cancelled"] == 1
+    assert registry.stats()["completed"] == 1
+    assert not registry.is_tracked("C1", "1.0")
+
+
+def test_delete_cancels_the_run():
+    async def scenario():
+        registry = RunRegistry()
+        agent = Agent()
+        version = registry.track("C1", "1.0", "first")
+        run = asyncio.create_task(registry.run("C1", "U1", "first", {"1.0": version}, agent))
+        await agent.running.wait()
+        rerun = registry.supersede_message("C1", "1.0", None)
+        return rerun, await run, registry
+
+    rerun, result, registry = asyncio.run(scenario())
+
+    assert rerun is None
+    assert result is None
+    assert registry.stats()["cancelled"] == 1
+    assert not registry.is_tracked("C1", "1.0")
+
+
+def test_a_queued_run_superseded_before_it_starts_is_skipped():
+    async def scenario():
+        registry = RunRegistry()
+        agent = Agent()
+        version = registry.track("C1", "1.0", "first")
+        registry.supersede_message("C1", "1.0", "edited")
+        return await registry.run("C1", "U1", "first", {"1.0": version}, agent), agent.started, registry
+
+    result, started, registry = asyncio.run(scenario())
+
+    assert result is None
+    assert started == []
+    assert registry.stats()["skipped"] == 1
+
+
+def test_editing_or_deleting_one_message_of_a_group_keeps_the_others():
+    registry = RunRegistry()
+    registry.track("C1", "1.0", "a")
+    registry.track("C1", "2.0", "b")
+    registry.link("C1", ["1.0", "2.0"])
+
+    edited = registry.supersede_message("C1", "1.0", "A")
+    deleted = registry.supersede_message("C1", "2.0", None)
+
+    assert edited == ("A\nb", {"1.0": 1, "2.0": 1})
+    assert deleted == ("A", {"1.0": 2})
+
+
+def test_follow_up_supersedes_the_users_run_and_merges_the_text(monkeypatch):
+    registry = RunRegistry(supersede_follow_ups=True)
+    monkeypatch.setattr(views, "run_registry", registry)
+
+    def message(text: str, ts: str) -> dict:
+        return {"event": {"type": "message", "channel": "C1", "user": "U1", "text": text, "ts": ts}}
+
+    async def scenario():
+        agent = Agent()
+        first = message("show my tasks", "1.0")
+        views.track_message(first)
+        run = asyncio.create_task(registry.run("C1", "U1", "show my tasks", first["run_versions"], agent))
+        await agent.running.wait()
+        follow_up = message("only open ones", "2.0")
+        views.track_message(follow_up)
+        return await run, follow_up
+
+    result, follow_up = asyncio.run(scenario())
+
+    assert result is None
+    assert follow_up["event"]["text"] == "show my tasks\nonly open ones"
+    assert follow_up["run_versions"] == {"1.0": 1, "2.0": 0}
+    assert registry.supersede_message("C1", "1.0", None) == ("only open ones", {"2.0": 1})
@@ -0,0 +1,104 @@
+import asyncio
+
+from slack_bot.api.slack.scheduler import EventScheduler
+
+
+def test_channels_take_turns():
+    async def scenario():
+        handled = []
+        done = asyncio.Event()
+
+        async def handler(body):
+            handled.append(body)
+            if len(handled) == 5:
+                done.set()
+
+        scheduler = EventScheduler(handler, workers=1)
+        for key, body in [("C1", "a1"), ("C1", "a2"), ("C1", "a3"), ("C2", "b1"), ("C3", "c1")]:
+            assert await scheduler.submit(key, body)
+        await asyncio.wait_for(done.wait(), 1)
+        await scheduler.stop()
+        return handled
+
+    assert asyncio.run(scenario()) == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_one_channel_is_handled_in_order_and_one_at_a_time():
+    async def scenario():
+        handled = []
+        running = set()
+
+        async def handler(body):
+            key, _ = body
+            assert key not in running
+            running.add(key)
+            await asyncio.sleep(0.01)
+            running.discard(key)
+            handled.append(body)
+
+        scheduler = EventScheduler(handler, workers=4)
+        for i in range(3):
+            for key in ("C1", "C2"):
+                await scheduler.submit(key, (key, i))
+        while len(handled) < 6:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return handled
+
+    handled = asyncio.run(scenario())
+
+    assert [i for key, i in handled if key == "C1"] == [0, 1, 2]
+    assert [i for key, i in handled if key == "C2"] == [0, 1, 2]
+
+
+def test_a_full_queue_rejects_events():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def handler(body):
+            await release.wait()
+
+        scheduler = EventScheduler(handler, workers=1, max_queue_size=2)
+        accepted = [await scheduler.submit("C1", i) for i in range(3)]
+        stats = scheduler.stats()
+        release.set()
+        await scheduler.stop()
+        return accepted, stats
+
+    accepted, stats = asyncio.run(scenario())
+
+    assert accepted == [True, True, False]
+    assert stats["queue_depth"] == 2
+    assert stats["rejected"] == 1
+
+
+def test_workers_survive_failures_and_drop_idle_channels():
+    async def scenario():
+        handled = []
+
+        async def handler(body):
+            if body == "boom":
+                raise RuntimeError(body)
+            handled.append(body)
+
+        scheduler = EventScheduler(handler, workers=1)
+        await scheduler.submit("C1", "boom")
+        await scheduler.submit("C2", "ok")
+        while scheduler.stats()["processed"] < 1:
+            await asyncio.sleep(0.01)
+        workers = list(scheduler._tasks)
+        await scheduler.submit("C1", "again")
+        while scheduler.stats()["processed"] < 2:
+            await asyncio.sleep(0.01)
+        state = dict(scheduler._queues), set(scheduler._active), scheduler._tasks == workers
+        await scheduler.stop()
+        return handled, scheduler.stats(), state, workers
+
+    handled, stats, (queues, active, same_workers), workers = asyncio.run(scenario())
+
+    assert handled == ["ok", "again"]
+    assert stats["failed"] == 1
+    assert stats["queue_depth"] == 0
+    assert queues == {} and active == set()
+    assert same_workers
+    assert all(worker.done() for worker in workers)
@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import tool
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import StatusCode
+
+from slack_bot.api.agent.usage import TracingCallbackHandler
+from slack_bot.core.config import settings
+from slack_bot.core.http import ClientConfig, http_clients
+from slack_bot.core.metrics import MetricsRegistry
+from slack_bot.core.tracing import report_error, span
+
+EXPORTER = InMemorySpanExporter()
+PROVIDER = TracerProvider()
+PROVIDER.add_span_processor(SimpleSpanProcessor(EXPORTER))
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    monkeypatch.setattr(settings, "OTEL_ENABLED", True)
+    monkeypatch.setattr(trace, "get_tracer", PROVIDER.get_tracer)
+    EXPORTER.clear()
+    return EXPORTER
+
+
+def client(handler) -> httpx.AsyncClient:
+    return http_clients._create_client(
+        "fireflies", ClientConfig(base_url="https://fireflies.test"), transport=httpx.MockTransport(handler)
+    )
+
+
+def test_agent_tool_and_http_calls_become_spans(exporter):
+    fireflies = client(lambda request: httpx.Response(200, json={"data": []}))
+
+    @tool
+    async def fetch_transcripts(query: str) -> str:
+        """Fetch transcripts."""
+        response = await fireflies.post("/graphql", json={"query": query})
+        return response.text
+
+    async def agent(query: str, config: RunnableConfig) -> str:
+        return await fetch_transcripts.ainvoke({"query": query}, config=config)
+
+    async def run():
+        with span("agent", "run") as root:
+            handler = TracingCallbackHandler(root, agent_names=["MongoDBTranscriptionAgent"])
+            await RunnableLambda(agent, name="MongoDBTranscriptionAgent").ainvoke(
+                "calls", config={"callbacks": [handler]}
+            )
+
+    asyncio.run(run())
+
+    spans = {finished.name: finished for finished in exporter.get_finished_spans()}
+    assert set(spans) == {"agent.run", "agent.MongoDBTranscriptionAgent", "tool.fetch_transcripts", "http.fireflies"}
+    assert len({finished.context.trace_id for finished in spans.values()}) == 1
+    assert spans["tool.fetch_transcripts"].parent.span_id == spans["agent.MongoDBTranscriptionAgent"].context.span_id
+    assert spans["agent.MongoDBTranscriptionAgent"].parent.span_id == spans["agent.run"].context.span_id
+    assert spans["http.fireflies"].attributes["status_code"] == "200"
+
+
+def test_http_span_ends_on_transport_errors(exporter):
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def run():
+        with pytest.raises(httpx.ConnectError):
+            await client(refuse).get("/graphql")
+
+    asyncio.run(run())
+
+    finished, = exporter.get_finished_spans()
+    assert finished.name == "http.fireflies"
+    assert finished.status.status_code == StatusCode.ERROR
+
+
+def test_report_error_logs_counts_and_marks_the_span(exporter, caplog):
+    with span("event", "message") as current:
+        report_error("Dispatcher", ValueError("boom"))
+
+    assert "[Dispatcher] Error: boom" in caplog.text
+    assert current.attributes["error"] == "boom"
+    assert exporter.get_finished_spans()[0].attributes["error"] == "boom"
+
+
+def test_metrics_render_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter("test_calls_total", "Calls.", labels=("agent",)).inc(2, agent="DocsAgent")
+    registry.histogram("test_latency_seconds", "Latency.", buckets=(1.0,)).observe(0.5)
+    registry.gauge("test_depth", "Depth.", lambda: 3)
+    registry.gauge("test_unknown", "Unknown.", lambda: None)
+
+    text = registry.render()
+
+    assert 'test_calls_total{agent="DocsAgent"} 2.0' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 1.0' in text
+    assert "test_depth 3.0" in text
+    assert "\ntest_unknown " not in text
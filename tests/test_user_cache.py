@@ -0,0 +1,61 @@
+import asyncio
+from collections import Counter
+
+from slack.errors import SlackApiError
+
+from slack_bot.api.slack import utils
+from slack_bot.api.slack.utils import UserProfileCache, get_users_info
+
+
+class FakeSlackClient:
+    """users.list knows U1 and U2; users.info also knows the bot B1, everything else is not found."""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    async def users_list(self, limit, cursor=None):
+        self.calls["users.list"] += 1
+        return {"members": [user("U1"), user("U2")]}
+
+    async def users_info(self, user):
+        self.calls["users.info"] += 1
+        if user == "B1":
+            return {"user": {"id": "B1", "is_bot": True}}
+        raise SlackApiError("user_not_found", {"ok": False, "error": "user_not_found"})
+
+
+def user(user_id: str) -> dict:
+    return {"id": user_id, "profile": {"first_name": "User", "last_name": user_id}}
+
+
+def test_ids_users_list_never_returns_do_not_refresh_it_again(monkeypatch):
+    client = FakeSlackClient()
+    cache = UserProfileCache(bulk_threshold=2, min_refresh_interval=60)
+    monkeypatch.setattr(utils, "slack_client", client)
+    monkeypatch.setattr(utils, "user_profile_cache", cache)
+    ids = ["U1", "U2", "B1", "U404", "U405"]
+
+    first = asyncio.run(get_users_info(ids))
+    calls = Counter(client.calls)
+    second = asyncio.run(get_users_info(ids))
+
+    assert [profile and profile.name for profile in first] == ["User U1", "User U2", None, None, None]
+    assert second == first
+    assert calls == {"users.list": 1, "users.info": 3}
+    assert client.calls == calls
+    assert all(cache.contains(user_id) for user_id in ids)
+
+
+def test_bulk_refreshes_are_rate_limited(monkeypatch):
+    client = FakeSlackClient()
+    cache = UserProfileCache(bulk_threshold=1, min_refresh_interval=60)
+    monkeypatch.setattr(utils, "slack_client", client)
+
+    async def scenario():
+        await cache.refresh_for(["U7", "U8"])
+        await cache.refresh_for(["U7", "U8"])
+
+    asyncio.run(scenario())
+
+    assert client.calls["users.list"] == 1
+    assert cache.stats()["refreshes_skipped"] == 1